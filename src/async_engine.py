@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Silnik asyncio dla Smart File Organizer
+Wiele operacji na metadanych i przeniesień w locie jednoczesnie - dla udziałów
+sieciowych (SMB/NFS), gdzie każde stat, sprawdzenie i przeniesienie to pełny RTT
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from planner import TRANSFER_ACTIONS
+
+
+class AsyncEngine:
+    """
+    Potok plików na pętli asyncio
+
+    Każdy plik przechodzi dwa etapy z osobnymi limitami: planowanie
+    (stat, klasyfikacja, rezerwacja nazwy - Config.ASYNC_CONCURRENCY
+    w locie) i przeniesienie (Config.ASYNC_TRANSFERS w locie, bo kopie
+    między udziałami dzielą przepustowosć łącza). Blokujące wywołania
+    systemowe wykonywane są w puli wątków (run_in_executor) - pętla tylko
+    pilnuje limitów, więc setki operacji czekają na RTT równoczesnie.
+
+    Etapy to te same plan_file i apply_entry co w potoku wątków.
+    Wpisy ze skanowania pobierane są w wątku wołającym (indeks stanu
+    i punkt kontrolny działają w jednym wątku, jak w run_pipeline).
+    """
+
+    def __init__(self, plan, apply=None, concurrency=None, transfers=None):
+        """
+        Args:
+            plan (callable): Planowanie pliku - wpis -> PlanEntry (plan_file z kontekstem)
+            apply (callable): Wykonanie - (PlanEntry, started) -> wynik (apply_entry z kontekstem);
+                              None = tylko planowanie (tryb próbny)
+            concurrency (int): Limit plików w locie (domyslnie Config.ASYNC_CONCURRENCY)
+            transfers (int): Limit równoczesnych przeniesień (domyslnie Config.ASYNC_TRANSFERS)
+        """
+        self.plan = plan
+        self.apply = apply
+        self.concurrency = concurrency or Config.ASYNC_CONCURRENCY
+        self.transfers = min(transfers or Config.ASYNC_TRANSFERS, self.concurrency)
+
+    async def _process(self, item, pool, transfer_slots):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        plan_entry = await loop.run_in_executor(pool, self.plan, item)
+        if self.apply is None:
+            return plan_entry
+        if plan_entry.action not in TRANSFER_ACTIONS:
+            # Pominięcia i błędy nie dotykają dysku - wynik powstaje od razu w pętli
+            return self.apply(plan_entry, started=started)
+        async with transfer_slots:
+            return await loop.run_in_executor(pool, lambda: self.apply(plan_entry, started=started))
+
+    def run(self, items):
+        """
+        Przetwarza elementy, oddając wyniki w kolejnosci zakończenia
+
+        Ten sam kontrakt co executor.run_pipeline - wołający (tally_results)
+        dostaje zwykły iterator. Pętla zdarzeń działa tylko wtedy, gdy
+        wołający czeka na kolejne wyniki, więc w locie jest najwyżej
+        concurrency plików, a pamięć nie rosnie z liczbą plików.
+        """
+        loop = asyncio.new_event_loop()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='organizer-io')
+        iterator = iter(items)
+        tasks = set()
+        exhausted = False
+        transfer_slots = None
+
+        async def next_results():
+            nonlocal tasks, exhausted, transfer_slots
+            if transfer_slots is None:
+                # Semafor tworzony wewnątrz pętli, która będzie go używać
+                transfer_slots = asyncio.Semaphore(self.transfers)
+            while not exhausted and len(tasks) < self.concurrency:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                tasks.add(asyncio.ensure_future(self._process(item, pool, transfer_slots)))
+            if not tasks:
+                return None
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            return [task.result() for task in done]
+
+        try:
+            while True:
+                results = loop.run_until_complete(next_results())
+                if results is None:
+                    break
+                yield from results
+        finally:
+            # Przerwanie (Ctrl+C, błąd wołającego): operacje w toku kończą się,
+            # nowe nie są zaczynane - dziennik cofania zostaje spójny
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            pool.shutdown(wait=True)
+            loop.close()
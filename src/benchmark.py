@@ -0,0 +1,582 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarki wydajnosci dla Smart File Organizer
+Uruchomienie: python benchmark.py [classifier | rules | startup | tree --files 100000 --depth 3 --json wynik.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from config import Config
+from classifier import FileClassifier
+from file_organizer import get_file_category, organize_files
+from scanner import ScanStats
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+KB = 1024
+MB = 1024 * 1024
+MAX_GENERATED_SIZE = 64 * MB    # Górny limit rozmiaru jednego wygenerowanego pliku
+
+
+def build_large_mapping(extra_extensions=300):
+    """
+    Tworzy rozbudowany słownik kategorii (jak w dużych wdrożeniach)
+
+    Args:
+        extra_extensions (int): Liczba dodatkowych rozszerzeń
+
+    Returns:
+        dict: Słownik kategorii i rozszerzeń
+    """
+    categories = {name: list(extensions) for name, extensions in Config.FILE_CATEGORIES.items()}
+    custom = [name for name in categories if name != 'Others']
+
+    for i in range(extra_extensions):
+        categories[custom[i % len(custom)]].append(f".x{i:03d}")
+
+    # 'Others' musi zostać ostatnią kategorią
+    categories['Others'] = categories.pop('Others')
+    return categories
+
+
+def bench_classifier(file_count=100_000, extra_extensions=300, repeat=3):
+    """
+    Porównuje get_file_category (liniowe skanowanie) z FileClassifier
+
+    Args:
+        file_count (int): Liczba nazw plików w próbce
+        extra_extensions (int): Liczba dodatkowych rozszerzeń w mapowaniu
+        repeat (int): Liczba powtórzeń pomiaru (bierzemy najlepszy)
+
+    Returns:
+        dict: Czasy w sekundach i przyspieszenie
+    """
+    categories = build_large_mapping(extra_extensions)
+    extensions = [ext for exts in categories.values() for ext in exts]
+    extensions += Config.EXCLUDED_EXTENSIONS + ['.unknown', '']
+
+    rng = random.Random(42)
+    filenames = [f"plik_{i}{rng.choice(extensions)}" for i in range(file_count)]
+
+    classifier = FileClassifier(categories, Config.EXCLUDED_EXTENSIONS)
+
+    def legacy():
+        for filename in filenames:
+            if Config.is_file_excluded(filename):
+                continue
+            extension = Path(filename).suffix
+            if extension:
+                get_file_category(extension, categories)
+
+    def compiled():
+        classify = classifier.classify
+        for filename in filenames:
+            classify(filename)
+
+    legacy_time = min(timeit.repeat(legacy, number=1, repeat=repeat))
+    compiled_time = min(timeit.repeat(compiled, number=1, repeat=repeat))
+
+    print("⏱️  BENCHMARK KLASYFIKATORA")
+    print("=" * 50)
+    print(f"📄 Plików: {file_count}, rozszerzeń w mapowaniu: {len(classifier.index)}")
+    print(f"🐢 get_file_category: {legacy_time:.3f} s ({file_count / legacy_time:,.0f} plików/s)")
+    print(f"🚀 FileClassifier:    {compiled_time:.3f} s ({file_count / compiled_time:,.0f} plików/s)")
+    print(f"📈 Przyspieszenie: {legacy_time / compiled_time:.1f}x")
+
+    return {
+        'files': file_count,
+        'legacy_seconds': legacy_time,
+        'compiled_seconds': compiled_time,
+        'speedup': legacy_time / compiled_time,
+    }
+
+
+def build_rules(rule_count=500):
+    """ Tworzy zestaw reguł (regex, glob, rozszerzenia, predykaty) jak w dużych wdrożeniach """
+    rules = []
+    for i in range(rule_count):
+        kind = i % 4
+        if kind == 0:
+            rules.append({'regex': rf'^raport_{i:04d}_\w+\.csv$', 'destination': f'Raporty/{i}'})
+        elif kind == 1:
+            rules.append({'glob': f'*_{i:04d}.pdf', 'min_size_mb': 0, 'destination': f'Dokumenty/{i}'})
+        elif kind == 2:
+            rules.append({'regex': rf'klient{i:04d}', 'max_age_days': 365, 'destination': f'Klienci/{i}'})
+        else:
+            rules.append({'extensions': [f'.r{i:03d}'], 'destination': f'Dane/{i}'})
+    return rules
+
+
+def bench_rules(file_count=100_000, rule_count=500, repeat=3):
+    """
+    Porównuje sprawdzanie reguł po kolei z RuleEngine
+
+    Returns:
+        dict: Czasy w sekundach i przyspieszenie
+    """
+    import fnmatch
+    import re
+    from rules import RuleEngine
+
+    rules = build_rules(rule_count)
+    engine = RuleEngine(rules, os.sep)
+
+    rng = random.Random(42)
+    names = []
+    for i in range(file_count):
+        rule_id = rng.randrange(rule_count)
+        # Około 20% nazw pasuje do którejs reguły
+        if rng.random() < 0.8:
+            names.append(f"plik_{i}{rng.choice(['.txt', '.jpg', '.pdf', '.csv', ''])}")
+        elif rule_id % 4 == 0:
+            names.append(f"raport_{rule_id:04d}_{i}.csv")
+        elif rule_id % 4 == 1:
+            names.append(f"skan_{rule_id:04d}.pdf")
+        elif rule_id % 4 == 2:
+            names.append(f"umowa_klient{rule_id:04d}.docx")
+        else:
+            names.append(f"dane_{i}.r{rule_id:03d}")
+    info = os.stat(__file__)
+
+    # Sprawdzanie po kolei: pierwsza reguła, której wszystkie warunki są spełnione
+    linear_rules = []
+    for rule in rules:
+        if 'regex' in rule:
+            test = re.compile(rule['regex']).search
+        elif 'glob' in rule:
+            test = re.compile(fnmatch.translate(rule['glob']), re.IGNORECASE).match
+        else:
+            suffixes = tuple(rule['extensions'])
+            test = lambda name, suffixes=suffixes: name.lower().endswith(suffixes)
+        linear_rules.append(test)
+
+    def linear():
+        for name in names:
+            for test in linear_rules:
+                if test(name):
+                    break
+
+    def compiled():
+        match = engine.match
+        for name in names:
+            match(name, os.sep + name, info)
+
+    linear_time = min(timeit.repeat(linear, number=1, repeat=repeat))
+    compiled_time = min(timeit.repeat(compiled, number=1, repeat=repeat))
+
+    print("⏱️  BENCHMARK REGUŁ")
+    print("=" * 50)
+    print(f"📄 Plików: {file_count}, reguł: {rule_count}")
+    print(f"🐢 Reguły po kolei: {linear_time:.3f} s ({file_count / linear_time:,.0f} plików/s)")
+    print(f"🚀 RuleEngine:      {compiled_time:.3f} s ({file_count / compiled_time:,.0f} plików/s)")
+    print(f"📈 Przyspieszenie: {linear_time / compiled_time:.1f}x")
+
+    return {
+        'files': file_count,
+        'rules': rule_count,
+        'linear_seconds': linear_time,
+        'compiled_seconds': compiled_time,
+        'speedup': linear_time / compiled_time,
+    }
+
+
+STARTUP_BUDGET_MS = 50
+# Moduły, których start CLI (--help, parsowanie argumentów) nie może importować -
+# ładuje je dopiero wybrana komenda
+STARTUP_FORBIDDEN_MODULES = ('file_organizer', 'scheduler', 'schedule', 'watcher', 'undo', 'dedup', 'state',
+                             'logging', 'asyncio', 'http.server', 'sqlite3', 'multiprocessing',
+                             'concurrent.futures')
+
+
+def bench_startup(runs=20, budget_ms=STARTUP_BUDGET_MS, command=('organize', '--help')):
+    """
+    Czas startu CLI (python cli.py organize --help) wobec budżetu
+
+    Mediana z runs uruchomień, dla porównania także sam interpreter
+    (python -c pass). Dodatkowo -X importtime sprawdza, że start nie
+    importuje podsystemów - ten warunek nie zależy od szybkosci maszyny.
+
+    Returns:
+        dict: Czasy w ms, zaimportowane zabronione moduły i passed (czy w budżecie)
+    """
+    import statistics
+    import subprocess
+
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py')
+
+    def median_ms(arguments):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *arguments], stdout=subprocess.DEVNULL, check=True)
+            times.append((time.perf_counter() - started) * 1000)
+        return statistics.median(times)
+
+    interpreter_ms = median_ms(['-c', 'pass'])
+    startup_ms = median_ms([cli, *command])
+
+    # Linie "import time: własny | łącznie | moduł" na stderr
+    trace = subprocess.run([sys.executable, '-X', 'importtime', cli, *command],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True).stderr
+    imported = {line.rsplit('|', 1)[1].strip() for line in trace.splitlines() if line.startswith('import time:')}
+    forbidden = sorted(module for module in STARTUP_FORBIDDEN_MODULES if module in imported)
+    passed = startup_ms <= budget_ms and not forbidden
+
+    print("⏱️  BENCHMARK STARTU CLI")
+    print("=" * 50)
+    print(f"🐍 Sam interpreter: {interpreter_ms:.1f} ms")
+    print(f"🚀 cli.py {' '.join(command)}: {startup_ms:.1f} ms (budżet {budget_ms} ms, "
+          f"narzut CLI {startup_ms - interpreter_ms:.1f} ms)")
+    print(f"📦 Zaimportowane moduły: {len(imported)}")
+    if forbidden:
+        print(f"❌ Start importuje podsystemy: {', '.join(forbidden)}")
+    print("✅ W budżecie" if passed else "❌ Poza budżetem")
+
+    return {
+        'command': list(command),
+        'runs': runs,
+        'interpreter_ms': interpreter_ms,
+        'startup_ms': startup_ms,
+        'budget_ms': budget_ms,
+        'modules': len(imported),
+        'forbidden_imports': forbidden,
+        'passed': passed,
+    }
+
+
+# Rozkłady rozmiarów plików: funkcja (rng) -> rozmiar w bajtach
+SIZE_DISTRIBUTIONS = {
+    'empty': lambda rng: 0,
+    'small': lambda rng: int(rng.lognormvariate(math.log(4 * KB), 1.0)),
+    'mixed': lambda rng: int(rng.lognormvariate(math.log(4 * KB), 1.0)) if rng.random() < 0.80 else
+                         int(rng.lognormvariate(math.log(256 * KB), 1.0)) if rng.random() < 0.9 else
+                         int(rng.lognormvariate(math.log(8 * MB), 0.7)),
+    'large': lambda rng: rng.randint(1 * MB, 16 * MB),
+}
+
+
+def extension_mix(name):
+    """
+    Zwraca listę (rozszerzenie, waga) dla nazwanego zestawu rozszerzeń
+
+    default - wszystkie rozszerzenia z konfiguracji po równo
+    media   - głównie zdjęcia, filmy i muzyka
+    messy   - jak w folderze Pobrane: wykluczone, nieznane, bez rozszerzenia, wielkie litery
+    """
+    known = [ext for extensions in Config.FILE_CATEGORIES.values() for ext in extensions]
+    if name == 'default':
+        return [(ext, 1) for ext in known]
+    if name == 'media':
+        media = Config.FILE_CATEGORIES['Images'] + Config.FILE_CATEGORIES['Videos'] + Config.FILE_CATEGORIES['Audio']
+        return [(ext, 8 if ext in media else 1) for ext in known]
+    if name == 'messy':
+        mix = [(ext, 7) for ext in known] + [(ext.upper(), 1) for ext in known]
+        share = len(known) * 8 // 9    # Po ok. 10% dla każdej grupy "trudnych" nazw
+        mix += [(ext, share / len(Config.EXCLUDED_EXTENSIONS)) for ext in Config.EXCLUDED_EXTENSIONS]
+        mix += [('.unknown', share), ('', share), ('.tar.gz', share)]
+        return mix
+    raise ValueError(f"Nieznany zestaw rozszerzeń: {name}")
+
+
+def default_bench_directory():
+    """ Folder na drzewa testowe - tmpfs (/dev/shm) jesli jest dostępny """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def generate_tree(root, file_count, depth=0, fanout=4, sizes='small', extensions='default',
+                  sparse=False, seed=42):
+    """
+    Generuje syntetyczne drzewo plików
+
+    Pliki rozkładane są losowo po wszystkich folderach drzewa o zadanej
+    głębokosci i liczbie podfolderów. Każdy plik zaczyna się od unikalnego
+    nagłówka, więc nie powstają przypadkowe duplikaty zawartosci.
+
+    Args:
+        root (str): Folder, w którym powstanie drzewo
+        file_count (int): Liczba plików (1k - 1M)
+        depth (int): Głębokosć zagnieżdżenia folderów (0 = wszystko w root)
+        fanout (int): Liczba podfolderów w każdym folderze
+        sizes (str): Rozkład rozmiarów (klucz SIZE_DISTRIBUTIONS)
+        extensions (str): Zestaw rozszerzeń (patrz extension_mix)
+        sparse (bool): Pliki rzadkie (bez zapisu danych) - szybkie generowanie dużych drzew
+        seed (int): Ziarno losowania (to samo ziarno = to samo drzewo)
+
+    Returns:
+        dict: Parametry i statystyki drzewa (files, bytes, directories, seconds)
+    """
+    rng = random.Random(seed)
+    size_of = SIZE_DISTRIBUTIONS[sizes]
+    mix = extension_mix(extensions)
+    suffixes = [ext for ext, _ in mix]
+    weights = [weight for _, weight in mix]
+    filler = os.urandom(MB)
+
+    start = time.perf_counter()
+    directories = [root]
+    level = [root]
+    for current_depth in range(depth):
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                next_level.append(os.path.join(parent, f"dir_{current_depth}_{index}"))
+        directories.extend(next_level)
+        level = next_level
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+    total_bytes = 0
+    for index in range(file_count):
+        size = min(size_of(rng), MAX_GENERATED_SIZE)
+        suffix = rng.choices(suffixes, weights)[0]
+        path = os.path.join(rng.choice(directories), f"file_{index:07d}{suffix}")
+        header = f"{index}\n".encode()
+        with open(path, 'wb') as file:
+            if size:
+                file.write(header[:size])
+                if sparse:
+                    file.truncate(size)
+                else:
+                    remaining = size - min(len(header), size)
+                    while remaining > 0:
+                        chunk = min(remaining, MB)
+                        file.write(filler[:chunk])
+                        remaining -= chunk
+        total_bytes += size
+
+    return {
+        'files': file_count,
+        'bytes': total_bytes,
+        'directories': len(directories),
+        'depth': depth,
+        'fanout': fanout,
+        'sizes': sizes,
+        'extensions': extensions,
+        'sparse': sparse,
+        'seed': seed,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+@contextlib.contextmanager
+def config_overrides(**settings):
+    """ Tymczasowo zmienia ustawienia Config (przywraca je po wyjsciu) """
+    previous = {name: getattr(Config, name) for name in settings}
+    for name, value in settings.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+
+def _run_organize(source, destination, workers, scan_stats, work_dir):
+    organize_files(source, destination, workers=workers, scan_stats=scan_stats)
+
+
+def _run_plan(source, destination, workers, scan_stats, work_dir):
+    organize_files(source, destination, workers=workers, dry_run=True,
+                   plan_path=os.path.join(work_dir, 'plan.jsonl'), scan_stats=scan_stats)
+
+
+# Tryby benchmarku: nazwa -> (funkcja uruchamiająca, ustawienia Config, czy przed
+# pomiarem wykonać jeden niemierzony przebieg). Nowe tryby organizera dopisujemy tutaj.
+MODES = {
+    'organize': (_run_organize, {'MOVE_FILES': True}, False),
+    'copy': (_run_organize, {'MOVE_FILES': False}, False),
+    'plan': (_run_plan, {}, False),
+    # Ponowny przebieg po niezmienionym drzewie (pierwszy buduje indeks stanu)
+    'incremental': (_run_organize, {'MOVE_FILES': False, 'INCREMENTAL': True}, True),
+    'dedup': (_run_organize, {'MOVE_FILES': True, 'DEDUP_POLICY': 'skip'}, False),
+}
+
+
+def _peak_rss_mb():
+    """ Szczytowe zużycie pamięci bieżącego procesu (MB) lub None """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS - bajty
+    return peak / MB if sys.platform == 'darwin' else peak / KB
+
+
+def _io_syscalls():
+    """ Liczba wywołań read/write procesu (/proc/self/io, tylko Linux) """
+    try:
+        with open('/proc/self/io') as file:
+            counters = dict(line.split(': ') for line in file.read().splitlines())
+        return int(counters['syscr']) + int(counters['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _measure(mode, source, destination, workers, work_dir, recursive, log_enabled):
+    """ Wykonuje jeden pomiar (w osobnym procesie - własne szczytowe RSS) """
+    run, settings, warm_up = MODES[mode]
+    # Dziennik cofania i punkty kontrolne wyłączone (tryb może je włączyć), a wszystkie pliki
+    # stanu w work_dir - pomiary nie piszą do prawdziwego folderu stanu użytkownika
+    settings = dict({'UNDO_ENABLED': False, 'CHECKPOINT_ENABLED': False}, **settings)
+    settings.update(RECURSIVE=recursive, MAX_DEPTH=0, LOG_ENABLED=log_enabled,
+                    LOG_DIRECTORY=os.path.join(work_dir, 'logs'),
+                    STATE_FILE=os.path.join(work_dir, 'scan_state.sqlite'),
+                    HASH_CACHE_FILE=os.path.join(work_dir, 'hash_cache.sqlite'),
+                    UNDO_DIRECTORY=os.path.join(work_dir, 'undo'),
+                    CHECKPOINT_DIRECTORY=os.path.join(work_dir, 'checkpoints'),
+                    LOCK_DIRECTORY=os.path.join(work_dir, 'locks'))
+    scan_stats = ScanStats()
+
+    with config_overrides(**settings), open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        if warm_up:
+            run(source, destination, workers, ScanStats(), work_dir)
+        io_before = _io_syscalls()
+        start = time.perf_counter()
+        run(source, destination, workers, scan_stats, work_dir)
+        seconds = time.perf_counter() - start
+        io_after = _io_syscalls()
+
+    return {
+        'seconds': seconds,
+        'syscalls': {
+            'entries': scan_stats.entries,
+            'stat': scan_stats.stat_calls,
+            'exists': scan_stats.exists_checks,
+            'per_file': scan_stats.syscalls_per_file(),
+            'read_write': io_after - io_before if io_before is not None else None,
+        },
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def bench_tree(file_count=10_000, depth=0, fanout=4, sizes='small', extensions='default', modes=('organize',),
+               workers=(1,), sparse=False, base_dir=None, log_enabled=False, seed=42):
+    """
+    Mierzy tryby organizera na syntetycznym drzewie plików
+
+    Dla każdej pary (tryb, liczba wątków) generowane jest świeże drzewo
+    (przenoszenie je zużywa), a pomiar odbywa się w osobnym procesie.
+
+    Returns:
+        dict: Wynik w formacie JSON (środowisko, parametry drzewa, wyniki pomiarów)
+    """
+    base_dir = base_dir or default_bench_directory()
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'base_dir': base_dir,
+        'tree': None,
+        'results': [],
+    }
+
+    print("⏱️  BENCHMARK DRZEWA PLIKÓW")
+    print("=" * 50)
+
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"Nieznany tryb benchmarku: {mode} (dostępne: {', '.join(MODES)})")
+        for worker_count in workers:
+            work_dir = tempfile.mkdtemp(prefix='organizer_bench_', dir=base_dir)
+            try:
+                source = os.path.join(work_dir, 'source')
+                destination = os.path.join(work_dir, 'organized')
+                tree = generate_tree(source, file_count, depth, fanout, sizes, extensions, sparse, seed)
+                if report['tree'] is None:
+                    report['tree'] = tree
+
+                with context.Pool(1) as pool:
+                    result = pool.apply(_measure, (mode, source, destination, worker_count, work_dir,
+                                                   depth > 0, log_enabled))
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            seconds = result['seconds']
+            result.update({
+                'mode': mode,
+                'workers': worker_count,
+                'files_per_sec': tree['files'] / seconds if seconds else None,
+                'bytes_per_sec': tree['bytes'] / seconds if seconds else None,
+            })
+            report['results'].append(result)
+            print(f"🚀 {mode:<12} wątki: {worker_count:<3} {seconds:8.3f} s  "
+                  f"{result['files_per_sec']:>12,.0f} plików/s  {result['bytes_per_sec'] / MB:>9.1f} MB/s  "
+                  f"stat/plik: {result['syscalls']['per_file']:.2f}  RSS: {result['peak_rss_mb'] or 0:.0f} MB")
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki Smart File Organizer")
+    commands = parser.add_subparsers(dest='command')
+
+    classifier = commands.add_parser('classifier', help="Klasyfikator rozszerzeń (domyslnie)")
+    classifier.add_argument('--files', type=int, default=100_000)
+    classifier.add_argument('--extra-extensions', type=int, default=300)
+
+    rules = commands.add_parser('rules', help="Dopasowanie reguł (RuleEngine)")
+    rules.add_argument('--files', type=int, default=100_000)
+    rules.add_argument('--rules', type=int, default=500)
+    rules.add_argument('--json', help="Zapisz wynik do pliku JSON")
+
+    startup = commands.add_parser('startup', help="Czas startu CLI (kod wyjscia 1 poza budżetem)")
+    startup.add_argument('--runs', type=int, default=20)
+    startup.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    startup.add_argument('--json', help="Zapisz wynik do pliku JSON")
+
+    tree = commands.add_parser('tree', help="Organizacja syntetycznego drzewa plików")
+    tree.add_argument('--files', type=int, default=10_000, help="Liczba plików (1k - 1M)")
+    tree.add_argument('--depth', type=int, default=0, help="Głębokosć zagnieżdżenia folderów")
+    tree.add_argument('--fanout', type=int, default=4, help="Podfolderów w każdym folderze")
+    tree.add_argument('--sizes', choices=sorted(SIZE_DISTRIBUTIONS), default='small')
+    tree.add_argument('--extensions', choices=('default', 'media', 'messy'), default='default')
+    tree.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['organize'])
+    tree.add_argument('--workers', nargs='+', type=int, default=[1])
+    tree.add_argument('--sparse', action='store_true', help="Pliki rzadkie (bez zapisu danych)")
+    tree.add_argument('--base-dir', help="Folder na drzewa testowe (domyslnie tmpfs)")
+    tree.add_argument('--log', action='store_true', help="Włącz logowanie do pliku podczas pomiaru")
+    tree.add_argument('--seed', type=int, default=42)
+    tree.add_argument('--json', help="Zapisz wynik do pliku JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'tree':
+        report = bench_tree(args.files, args.depth, args.fanout, args.sizes, args.extensions, args.modes,
+                            args.workers, args.sparse, args.base_dir, args.log, args.seed)
+    elif args.command == 'rules':
+        report = bench_rules(args.files, args.rules)
+    elif args.command == 'startup':
+        report = bench_startup(args.runs, args.budget_ms)
+    else:
+        report = bench_classifier(getattr(args, 'files', 100_000), getattr(args, 'extra_extensions', 300))
+
+    if getattr(args, 'json', None):
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"💾 Zapisano wynik: {args.json}")
+    return report
+
+
+if __name__ == "__main__":
+    report = main()
+    sys.exit(0 if report.get('passed', True) else 1)
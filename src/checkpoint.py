@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Punkty kontrolne dla Smart File Organizer
+Przerwane uruchomienie (awaria, Ctrl+C) wznawia się od miejsca przerwania
+zamiast ponownie sprawdzać każdy plik
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from config import Config, config_fingerprint
+
+
+CHECKPOINT_VERSION = 1
+
+_active = set()                 # Otwarte punkty kontrolne (do zapisu przy Ctrl+C)
+_active_lock = threading.Lock()
+
+
+class Checkpoint:
+    """
+    Postęp jednego uruchomienia organize_files
+
+    Zapisywane są foldery obsłużone w całosci (z mtime z chwili ukończenia
+    i listą podfolderów) oraz pliki obsłużone w folderach jeszcze
+    nieukończonych. Przy wznowieniu folder ukończony i od tego czasu
+    niezmieniony nie jest listowany, a obsłużone pliki są pomijane.
+
+    Obiekt pełni rolę indeksu stanu dla scan_files (known_subdirectories,
+    record_directory) i przekazuje wywołania do właściwego indeksu stanu
+    w trybie przyrostowym. Wszystkie metody wołane są z wątku głównego
+    (skanowanie i zliczanie wyników), blokada chroni tylko zapis.
+    """
+
+    def __init__(self, path, fingerprint, state=None, save_seconds=30):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.state = state
+        self.save_seconds = save_seconds
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+        self.completed = {}       # folder -> (mtime_ns po ukończeniu, podfoldery)
+        self.done_files = {}      # folder nieukończony -> zbiór obsłużonych nazw plików
+        self._listed = {}         # folder wylistowany w całosci -> podfoldery
+        self._outstanding = {}    # folder -> liczba plików w trakcie obsługi
+        self._failed = set()      # foldery z błędami (nie mogą zostać uznane za ukończone)
+
+        # Postęp przerwanego uruchomienia
+        self._resumed_directories = {}
+        self._resumed_files = {}
+        self.resumed = self._load()
+        self.skipped_directories = 0
+        self.skipped_files = 0
+
+        with _active_lock:
+            _active.add(self)
+
+    @classmethod
+    def from_config(cls, source_folder, destination_folder, recursive, max_depth, state=None):
+        """ Punkt kontrolny dla pary folderów (wznawia zapisany, jesli pasuje do konfiguracji) """
+        source = os.path.abspath(source_folder)
+        key = hashlib.sha1(f"{source}\0{os.path.abspath(destination_folder)}".encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(Config.CHECKPOINT_DIRECTORY, f"checkpoint_{key}.json")
+        fingerprint = source + '\0' + config_fingerprint(destination_folder, recursive, max_depth)
+        return cls(path, fingerprint, state, Config.CHECKPOINT_SECONDS)
+
+    def _load(self):
+        """ Wczytuje zapisany postęp - zwraca True, gdy uruchomienie jest wznawiane """
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != CHECKPOINT_VERSION or data.get('fingerprint') != self.fingerprint:
+            return False
+
+        self._resumed_directories = {path: (mtime_ns, subdirs) for path, (mtime_ns, subdirs)
+                                     in data['directories'].items()}
+        self._resumed_files = {directory: set(names) for directory, names in data['files'].items()}
+        return True
+
+    # Protokół indeksu stanu dla scan_files
+
+    def known_subdirectories(self, path, mtime_ns):
+        resumed = self._resumed_directories.get(path)
+        if resumed is not None and resumed[0] == mtime_ns:
+            self.skipped_directories += 1
+            self.completed[path] = resumed
+            if self.state is not None:
+                self.state.record_resumed_directory(path, mtime_ns, resumed[1])
+            return list(resumed[1])
+        if self.state is not None:
+            return self.state.known_subdirectories(path, mtime_ns)
+        return None
+
+    def record_directory(self, path, mtime_ns, subdirs):
+        if self.state is not None:
+            self.state.record_directory(path, mtime_ns, subdirs)
+        self._listed[path] = list(subdirs)
+        self._complete_if_done(path)
+
+    # Postęp plików
+
+    def track(self, entries):
+        """ Przepuszcza pliki ze skanowania, pomijając obsłużone przed przerwaniem """
+        for entry in entries:
+            directory = os.path.dirname(entry.path)
+            resumed = self._resumed_files.get(directory)
+            if resumed is not None and entry.name in resumed:
+                self.skipped_files += 1
+                self.done_files.setdefault(directory, set()).add(entry.name)
+                continue
+            self._outstanding[directory] = self._outstanding.get(directory, 0) + 1
+            yield entry
+
+    def record_result(self, result):
+        """ Zapisuje obsłużony plik (wołane dla każdego wyniku, także błędów) """
+        directory = os.path.dirname(result.source)
+        self._outstanding[directory] -= 1
+        if result.operation == "ERROR":
+            # Plik z błędem zostanie ponowiony przy wznowieniu
+            self._failed.add(directory)
+        else:
+            self.done_files.setdefault(directory, set()).add(result.filename)
+        self._complete_if_done(directory)
+
+        if time.monotonic() - self._last_save >= self.save_seconds:
+            self.save()
+
+    def _complete_if_done(self, directory):
+        if directory not in self._listed or self._outstanding.get(directory, 0):
+            return
+        subdirs = self._listed.pop(directory)
+        self._outstanding.pop(directory, None)
+        if directory in self._failed:
+            return
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        self.completed[directory] = (mtime_ns, subdirs)
+        self.done_files.pop(directory, None)
+
+    # Zapis
+
+    def save(self):
+        """ Zapisuje postęp atomowo (plik tymczasowy + zmiana nazwy) """
+        # Kopie słowników - flush_checkpoints może być wołane z innego wątku niż skanowanie
+        completed = dict(self.completed)
+        done_files = dict(self.done_files)
+        with self._lock:
+            data = {
+                'version': CHECKPOINT_VERSION,
+                'fingerprint': self.fingerprint,
+                'saved': datetime.datetime.now().isoformat(timespec='seconds'),
+                'directories': {path: [mtime_ns, subdirs] for path, (mtime_ns, subdirs) in completed.items()},
+                'files': {directory: sorted(names) for directory, names in done_files.items()},
+            }
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+            self._last_save = time.monotonic()
+
+    def close(self, complete):
+        """
+        Kończy uruchomienie
+
+        Args:
+            complete (bool): Czy przejscie zakończyło się w całosci - wtedy punkt
+                             kontrolny jest usuwany, w przeciwnym razie zapisywany
+        """
+        with _active_lock:
+            _active.discard(self)
+        if complete:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            self.save()
+
+
+def flush_checkpoints():
+    """ Zapisuje wszystkie otwarte punkty kontrolne (np. przy Ctrl+C) """
+    with _active_lock:
+        checkpoints = list(_active)
+    for checkpoint in checkpoints:
+        checkpoint.save()
+    return len(checkpoints)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Klasyfikator plików dla Smart File Organizer
+Indeks rozszerzenie -> kategoria budowany raz na uruchomienie
+"""
+
+from types import MappingProxyType
+from config import Config
+
+
+class FileClassifier:
+    """ Skompilowany klasyfikator: słownik sufiksów i zbiór wykluczeń """
+
+    def __init__(self, categories, excluded_extensions=(), default_category='Others'):
+        """
+        Buduje indeks na podstawie słownika kategorii
+
+        Args:
+            categories (dict): Słownik kategorii i rozszerzeń
+            excluded_extensions (iterable): Wykluczone rozszerzenia
+            default_category (str): Kategoria dla nieznanych rozszerzeń
+        """
+        index = {}
+        for category, extensions in categories.items():
+            for extension in extensions:
+                # Pierwsza kategoria wygrywa - tak samo jak w get_file_category
+                index.setdefault(extension.lower(), category)
+
+        self.index = MappingProxyType(index)
+        self.excluded = frozenset(extension.lower() for extension in excluded_extensions)
+        self.default_category = default_category
+
+        # Ile członów ma najdłuższy znany sufiks (np. '.tar.gz' = 2)
+        known = list(self.index) + list(self.excluded)
+        self.max_suffix_parts = max((ext.count('.') for ext in known), default=1) or 1
+
+    @classmethod
+    def from_config(cls):
+        """ Tworzy klasyfikator z aktualnej konfiguracji """
+        return cls(Config.FILE_CATEGORIES, Config.EXCLUDED_EXTENSIONS)
+
+    def suffixes(self, filename):
+        """
+        Zwraca sufiksy pliku od najdłuższego, np. ['.tar.gz', '.gz']
+
+        Semantyka jak Path.suffix: wiodąca kropka (pliki ukryte)
+        i kropka na końcu nazwy nie tworzą rozszerzenia.
+        """
+        name = filename.lower()
+
+        suffixes = []
+        position = len(name)
+        for _ in range(self.max_suffix_parts):
+            position = name.rfind('.', 1, position)
+            if position == -1:
+                break
+            suffixes.append(name[position:])
+
+        if suffixes and suffixes[0] == '.':
+            return []
+
+        suffixes.reverse()
+        return suffixes
+
+    def classify(self, filename):
+        """
+        Okresla rozszerzenie i kategorię pliku jednym przejsciem
+
+        Args:
+            filename (str): Nazwa pliku
+
+        Returns:
+            tuple: (rozszerzenie, kategoria); kategoria None gdy plik wykluczony,
+                   rozszerzenie '' gdy plik go nie ma
+        """
+        suffixes = self.suffixes(filename)
+        if not suffixes:
+            return '', self.default_category
+
+        for suffix in suffixes:
+            if suffix in self.excluded:
+                return suffix, None
+
+        for suffix in suffixes:
+            category = self.index.get(suffix)
+            if category is not None:
+                return suffix, category
+
+        return suffixes[-1], self.default_category
+
+    def category_for(self, extension):
+        """ Kategoria dla rozszerzenia (np. rozpoznanego po zawartosci pliku) """
+        return self.index.get(extension.lower(), self.default_category)
+
+    def is_excluded(self, filename):
+        """ Sprawdza, czy plik jest wykluczony """
+        return self.classify(filename)[1] is None
+
+    def get_category(self, filename):
+        """ Zwraca kategorię pliku (lub None dla plików wykluczonych) """
+        return self.classify(filename)[1]
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Wiersz poleceń Smart File Organizer
+Nieinteraktywne uruchamianie z crona, timerów systemd czy hooków - podsystemy
+importowane są dopiero przez wybraną komendę, więc start (i --help) jest szybki
+
+    python cli.py organize ~/Downloads ~/Organized --recursive
+    python cli.py organize --jobs jobs.yaml
+    python cli.py plan ~/Downloads ~/Organized -o plan.jsonl
+    python cli.py plan --execute plan.jsonl
+    python cli.py watch ~/Downloads ~/Organized
+    python cli.py schedule --interval 30
+    python cli.py undo --list
+    python cli.py bench startup
+
+Kod wyjscia: 0 = sukces, 1 = błąd, 2 = błędne argumenty, 130 = przerwano (Ctrl+C).
+"""
+
+import argparse
+import sys
+from config import Config
+
+
+def _setting(text):
+    """ KEY=VALUE -> (atrybut Config, wartosć); wartosć jako JSON lub zwykły tekst """
+    import json  # Tylko gdy podano --set - nie przy każdym starcie
+
+    key, separator, value = text.partition('=')
+    attribute = key.strip().upper()
+    if not separator or not hasattr(Config, attribute) or callable(getattr(Config, attribute)):
+        raise argparse.ArgumentTypeError(f"nieznane ustawienie Config: {key!r} (format KEY=VALUE)")
+    try:
+        return attribute, json.loads(value)
+    except ValueError:
+        return attribute, value
+
+
+def _add_common(parser, paths=True):
+    """ Argumenty wspólne dla komend organizujących """
+    if paths:
+        parser.add_argument('source', nargs='?', help=f"Folder źródłowy (domyslnie {Config.DEFAULT_SOURCE})")
+        parser.add_argument('destination', nargs='?', help=f"Folder docelowy (domyslnie {Config.DEFAULT_DESTINATION})")
+    parser.add_argument('--workers', type=int, help=f"Liczba wątków (domyslnie {Config.MAX_WORKERS})")
+    parser.add_argument('--recursive', action=argparse.BooleanOptionalAction, default=None,
+                        help="Organizuj także pliki z podfolderów")
+    parser.add_argument('--max-depth', type=int, help="Maksymalna głębokosć podfolderów (0 = bez limitu)")
+    parser.add_argument('--incremental', action=argparse.BooleanOptionalAction, default=None,
+                        help="Pomijaj niezmienione foldery i obsłużone pliki")
+    parser.add_argument('--copy', action='store_true', help="Kopiuj zamiast przenosić")
+    parser.add_argument('--quiet', action='store_true', help="Bez linii dla każdego pliku")
+    parser.add_argument('--no-log', action='store_true', help="Bez logów w plikach")
+    parser.add_argument('--set', dest='settings', metavar='KEY=VALUE', type=_setting, action='append', default=[],
+                        help="Nadpisuje ustawienie Config, np. --set dedup_policy=skip (wartosć jako JSON)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Smart File Organizer - wiersz poleceń")
+    commands = parser.add_subparsers(dest='command', metavar='KOMENDA', required=True)
+
+    organize = commands.add_parser('organize', help="Jednorazowa organizacja plików")
+    _add_common(organize)
+    organize.add_argument('--jobs', metavar='PLIK', help="Wykonaj wszystkie zadania z pliku zadań (równolegle)")
+
+    plan = commands.add_parser('plan', help="Plan operacji (tryb próbny), wykonanie lub porównanie planów")
+    _add_common(plan)
+    plan.add_argument('-o', '--output', metavar='PLIK', help="Plik planu (domyslnie nowy plik w Config.PLAN_DIRECTORY)")
+    action = plan.add_mutually_exclusive_group()
+    action.add_argument('--execute', metavar='PLAN', help="Wykonaj zapisany plan")
+    action.add_argument('--diff', nargs=2, metavar=('STARY', 'NOWY'), help="Porównaj dwa plany")
+
+    watch = commands.add_parser('watch', help="Obserwacja folderu - organizacja zaraz po pojawieniu się pliku")
+    _add_common(watch)
+    watch.add_argument('--no-initial-scan', action='store_true', help="Nie organizuj plików, które już są w folderze")
+
+    schedule = commands.add_parser('schedule', help="Organizacja według harmonogramu (wymaga pakietu schedule)")
+    _add_common(schedule)
+    when = schedule.add_mutually_exclusive_group(required=True)
+    when.add_argument('--interval', type=int, metavar='MINUTY', help="Co ile minut")
+    when.add_argument('--daily', metavar='HH:MM', help="Codziennie o godzinie")
+    when.add_argument('--jobs', metavar='PLIK', help="Zadania z pliku zadań (własne harmonogramy)")
+
+    undo = commands.add_parser('undo', help="Cofnięcie uruchomienia (dziennik cofania)")
+    undo.add_argument('run_id', nargs='?', help="Identyfikator uruchomienia (bez niego: lista uruchomień)")
+    undo.add_argument('--list', action='store_true', help="Pokaż zapisane uruchomienia")
+    undo.add_argument('--workers', type=int, help=f"Liczba wątków (domyslnie {Config.MAX_WORKERS})")
+
+    bench = commands.add_parser('bench', help="Benchmarki (argumenty jak w benchmark.py, np. bench startup)",
+                                add_help=False)
+    bench.add_argument('arguments', nargs=argparse.REMAINDER, help="Argumenty benchmark.py")
+    return parser
+
+
+def _configure(args):
+    """
+    Nadpisuje Config argumentami wspólnymi (przed importem podsystemów)
+
+    Returns:
+        dict: Nadpisane ustawienia (bez folderów) - dla zadań z pliku zadań,
+              gdzie mają pierwszeństwo przed ustawieniami zadań
+    """
+    if getattr(args, 'source', None):
+        Config.DEFAULT_SOURCE = args.source
+    if getattr(args, 'destination', None):
+        Config.DEFAULT_DESTINATION = args.destination
+
+    overrides = {}
+    if getattr(args, 'workers', None):
+        overrides['MAX_WORKERS'] = args.workers
+    if getattr(args, 'recursive', None) is not None:
+        overrides['RECURSIVE'] = args.recursive
+    if getattr(args, 'max_depth', None) is not None:
+        overrides['MAX_DEPTH'] = args.max_depth
+    if getattr(args, 'incremental', None) is not None:
+        overrides['INCREMENTAL'] = args.incremental
+    if getattr(args, 'copy', False):
+        overrides['MOVE_FILES'] = False
+    if getattr(args, 'quiet', False):
+        overrides['QUIET'] = True
+    if getattr(args, 'no_log', False):
+        overrides['LOG_ENABLED'] = False
+    overrides.update(getattr(args, 'settings', []))
+
+    for attribute, value in overrides.items():
+        setattr(Config, attribute, value)
+    return overrides
+
+
+def _organize(args):
+    if args.jobs:
+        from scheduler import FileOrganizerScheduler
+        return FileOrganizerScheduler(args.overrides).run_jobs(args.jobs)
+    from file_organizer import organize_files
+    return organize_files()
+
+
+def _plan(args):
+    if args.diff:
+        from planner import diff_plans, print_diff
+        diff = diff_plans(*args.diff)
+        print_diff(diff)
+        return True
+    if args.execute:
+        from file_organizer import execute_plan
+        counts = execute_plan(args.execute)
+        return counts is not None and not counts['errors']
+    from file_organizer import organize_files
+    return bool(organize_files(dry_run=True, plan_path=args.output))
+
+
+def _watch(args):
+    from checkpoint import flush_checkpoints
+    from logger import setup_logger
+    from watcher import FolderWatcher
+
+    watcher = FolderWatcher(logger=setup_logger(Config.LOG_DIRECTORY) if Config.LOG_ENABLED else None)
+    try:
+        # False - folder źródłowy organizuje inny proces
+        return watcher.run(initial_scan=not args.no_initial_scan)
+    except KeyboardInterrupt:
+        print("\n🛑 Obserwacja zatrzymana przez użytkownika")
+        if flush_checkpoints():
+            print("💾 Zapisano punkt kontrolny przerwanej organizacji")
+    return True
+
+
+def _schedule(args):
+    from scheduler import FileOrganizerScheduler
+
+    scheduler = FileOrganizerScheduler(args.overrides)
+    if args.jobs:
+        scheduler.start_scheduler("jobs", jobs_file=args.jobs)
+    elif args.daily:
+        scheduler.start_scheduler("daily", daily_time=args.daily)
+    else:
+        scheduler.start_scheduler("interval", interval_minutes=args.interval)
+    return True
+
+
+def _undo(args):
+    from undo import list_runs, undo_run
+
+    if args.list or not args.run_id:
+        for run_id, count, status in list_runs():
+            print(f"{run_id}  operacji: {count:<8} {status}")
+        return True
+    counts = undo_run(args.run_id, args.workers)
+    return counts is not None and not counts['errors']
+
+
+def _bench(args):
+    from benchmark import main as benchmark_main
+
+    report = benchmark_main(args.arguments)
+    return report.get('passed', True)
+
+
+COMMANDS = {
+    'organize': _organize,
+    'plan': _plan,
+    'watch': _watch,
+    'schedule': _schedule,
+    'undo': _undo,
+    'bench': _bench,
+}
+
+
+def main(argv=None):
+    """
+    Punkt wejscia CLI
+
+    Returns:
+        int: Kod wyjscia procesu
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'jobs', None) and (args.source or args.destination):
+        parser.error("--jobs: foldery podaje plik zadań (bez argumentów source/destination)")
+    args.overrides = _configure(args)
+    try:
+        success = COMMANDS[args.command](args)
+    except KeyboardInterrupt:
+        # Punkty kontrolne zapisały przerwane operacje - kolejne uruchomienie je wznowi
+        print("\n🛑 Przerwano przez użytkownika")
+        return 130
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ Błąd: {e}", file=sys.stderr)
+        return 1
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
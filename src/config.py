@@ -30,11 +30,112 @@ class Config:
     LOG_ENABLED = True
     LOG_DIRECTORY = "../logs"
     LOG_LEVEL = "INFO" # DEBUG, INFO, WARNING, ERROR
+    LOG_ASYNC = True  # True = zapis logów w osobnym wątku, partiami
+    LOG_CONSOLE = True  # True = logi także w konsoli
+    CONSOLE_RATE_LIMIT = 0  # Maks. linii per plik w konsoli na sekundę (0 = bez limitu)
+    QUIET = False  # True = zdarzenia per plik tylko do pliku log (bez konsoli)
+    LOG_FILENAME = "file_organizer.log"
+    JOURNAL_ENABLED = True  # True = dziennik operacji JSONL (jeden obiekt JSON na plik)
+    JOURNAL_FILENAME = "journal.jsonl"
+    LOG_ROTATE_MB = 50  # Rotacja logu i dziennika po przekroczeniu rozmiaru (0 = bez limitu)
+    LOG_ROTATE_HOURS = 24  # Rotacja co X godzin (0 = tylko po rozmiarze)
+    LOG_RETENTION = 30  # Ile zamkniętych segmentów zachować (0 = wszystkie)
+    LOG_COMPRESS = True  # True = kompresja gzip zamkniętych segmentów
     
     # Ustawienia operacji
     MOVE_FILES = True  # True = przenies, False = kopiuj
-    SKIP_EXISTING = True  # True = pomiń istniejące, False = nadpisz
+    SKIP_EXISTING = True  # True = pomiń istniejące, False = nadpisz starsze (gdy COLLISION_POLICY = None)
+    COLLISION_POLICY = None  # Gdy nazwa w celu jest zajęta: None = wg SKIP_EXISTING, "skip", "number" = nazwa (2).pdf,
+                             # "timestamp" = nazwa_20250624-153000.pdf, "hash" = nazwa_<skrót>.pdf,
+                             # "overwrite_newer" = nadpisz starszy plik (nadpisanego pliku nie przywróci undo.py)
     CREATE_DATE_FOLDERS = False  # True = dodatkowe foldery z datami
+    DATE_FOLDER_FORMAT = "{year}/{month}"  # Układ folderów z datami: {year}, {month}, {day}
+    DATE_SOURCE = "mtime"  # "mtime" lub "embedded" (data z EXIF zdjęć / nagłówka filmu, gdy jest)
+    MAX_WORKERS = 1  # Liczba wątków przenoszących pliki (1 = sekwencyjnie)
+    ENGINE = "threads"  # "threads" = pula MAX_WORKERS wątków, "asyncio" = wiele operacji w locie (udziały SMB/NFS)
+    ASYNC_CONCURRENCY = 64  # Silnik asyncio: maks. plików w locie (stat, klasyfikacja, przeniesienie)
+    ASYNC_TRANSFERS = 16  # Silnik asyncio: maks. równoczesnych przeniesień/kopii
+    FSYNC_COPIES = True  # True = fsync kopii przed zmianą nazwy pliku tymczasowego
+    
+    # Ustawienia przeszukiwania folderów
+    RECURSIVE = False  # True = organizuj również pliki z podfolderów
+    MAX_DEPTH = 0  # Maksymalna głębokosć podfolderów (0 = bez limitu)
+    FOLLOW_SYMLINKS = False  # True = wchodź do folderów przez linki symboliczne
+    
+    # Uruchomienia przyrostowe (indeks stanu skanowania)
+    INCREMENTAL = False  # True = pomijaj niezmienione foldery i juz obsłużone pliki
+    STATE_FILE = "../state/scan_state.sqlite"
+    STATE_FULL_SCAN_HOURS = 24  # Co ile godzin pełne listowanie wszystkich folderów (0 = nigdy)
+    
+    # Wykrywanie duplikatów po zawartosci
+    DEDUP_POLICY = None  # None = wyłączone, "skip" = pomiń, "hardlink" = twardy link do oryginału, "move" = do kategorii duplikatów
+    DUPLICATES_CATEGORY = "Duplicates"
+    DEDUP_MIN_SIZE = 1  # Pliki mniejsze (w bajtach) nie są porównywane - np. puste pliki
+    HASH_CACHE_FILE = "../state/hash_cache.sqlite"
+    HASH_PROCESSES = 0  # Procesy liczące skróty (0 = w wątkach roboczych, np. os.cpu_count() na serwerach plików)
+    HASH_BATCH_SIZE = 1024  # Pliki przygotowywane razem - skróty całej partii liczone są w puli procesów
+    HASH_CHUNK_SIZE = 32  # Skrótów częsciowych w jednej paczce wysyłanej do procesu
+    
+    # Dziennik cofania operacji
+    UNDO_ENABLED = True  # True = zapisuj każdą operację przed wykonaniem (python undo.py <run-id>)
+    UNDO_DIRECTORY = "../state/undo"
+    UNDO_FSYNC_EVERY = 256  # fsync dziennika co tyle wpisów (i na końcu uruchomienia)
+    UNDO_KEEP_RUNS = 500  # Liczba zachowanych dzienników (najstarsze są usuwane, None = bez limitu)
+    
+    # Punkty kontrolne (wznawianie przerwanych uruchomień)
+    CHECKPOINT_ENABLED = True  # True = zapisuj postęp, przerwane uruchomienie wznawia się od miejsca przerwania
+    CHECKPOINT_DIRECTORY = "../state/checkpoints"
+    CHECKPOINT_SECONDS = 30  # Co ile sekund zapisywać postęp
+    
+    # Plan operacji (tryb próbny)
+    DRY_RUN = False  # True = tylko zaplanuj operacje, bez zmian na dysku
+    PLAN_DIRECTORY = "../plans"
+    PLAN_BATCH_SIZE = 1000  # Liczba operacji wykonywanych w jednej partii przy wykonaniu planu
+    
+    # Tryb obserwacji folderu (zamiast cyklicznego skanowania)
+    WATCH_USE_INOTIFY = True  # False = zawsze porównuj migawki folderu
+    WATCH_POLL_SECONDS = 2.0  # Odstęp porównywania migawek (gdy brak inotify)
+    WATCH_SETTLE_SECONDS = 0.5  # Jak długo rozmiar i mtime pliku muszą być stałe
+    WATCH_BATCH_SECONDS = 0.05  # Okno zbierania gotowych plików w jedną partię
+    WATCH_BATCH_SIZE = 500  # Maksymalna liczba plików w partii
+    WATCH_RESCAN_SECONDS = 300  # Co ile sekund wczytywać na nowo nazwy w folderach docelowych (None = nigdy)
+    
+    # Wiele zadań (pary źródło -> cel z własnymi ustawieniami, patrz jobs.py)
+    JOBS_FILE = None  # Scieżka do pliku zadań .yaml/.toml/.json (None = tylko DEFAULT_SOURCE/DEFAULT_DESTINATION)
+    JOBS_STATE_DIRECTORY = "../state/jobs"  # Osobny indeks stanu i pamięć skrótów dla każdego zadania
+    WORKER_BUDGET = 8  # Łączna liczba wątków roboczych wszystkich równoległych zadań
+    DEVICE_MAX_WORKERS = 0  # Maks. wątków zadań na jedno urządzenie (0 = bez limitu)
+    DEVICE_WORKER_LIMITS = {}  # Limity dla konkretnych urządzeń: {"scieżka na urządzeniu": wątki}
+    
+    # Harmonogram (scheduler.py) - uruchomienia w osobnych procesach, pętla schedulera nie czeka na nie
+    SCHEDULE_OVERLAP = "skip"  # Gdy poprzednie uruchomienie jeszcze trwa: "skip" = pomiń, "queue" = wykonaj po nim,
+                               # "coalesce" = najwyżej jedno oczekujące uruchomienie
+    SCHEDULE_JITTER_SECONDS = 0  # Losowe opóźnienie startu (0 - tyle sekund), rozkłada zadania o tej samej porze
+    SOURCE_LOCK = True  # True = plik blokady per folder źródłowy - dwa procesy nie organizują tego samego drzewa naraz
+    LOCK_DIRECTORY = "../state/locks"
+    
+    # Dławienie I/O przenoszenia i kopiowania (patrz throttle.py), 0 = bez limitu
+    THROTTLE_BYTES_PER_SECOND = 0  # Maks. bajtów/s na urządzenie (odczyt ze źródła i zapis do celu)
+    THROTTLE_OPS_PER_SECOND = 0  # Maks. plików/s na urządzenie
+    THROTTLE_DEVICE_LIMITS = {}  # Limity konkretnych urządzeń: {"scieżka": {"bytes_per_second": ..., "ops_per_second": ...}}
+    THROTTLE_WINDOWS = []  # Okna czasowe z własnymi limitami, np. [{"start": "08:00", "end": "18:00",
+                           # "days": [0, 1, 2, 3, 4], "bytes_per_second": 20 * 1024 ** 2}] - poza oknami limity globalne
+    THROTTLE_CHUNK_BYTES = 4 * 1024 * 1024  # Fragment kopiowania przy dławieniu (mniejszy = równiejszy przepływ)
+    
+    # Metryki Prometheus (patrz metrics.py) - eksportowane przez scheduler
+    METRICS_PORT = 0  # Port endpointu HTTP /metrics, np. 9108 (0 = wyłączony)
+    METRICS_ADDRESS = "127.0.0.1"  # Adres nasłuchu (domyslnie tylko lokalnie)
+    METRICS_TEXTFILE = None  # Plik .prom dla kolektora textfile node_exportera (None = wyłączony)
+    METRICS_TEXTFILE_SECONDS = 15  # Co ile sekund zapisywać plik .prom
+    METRICS_JOB = "default"  # Etykieta job metryk (zadania z pliku zadań używają swojej nazwy)
+    
+    # Rozpoznawanie typu pliku po zawartosci (sygnatury z pierwszych bajtów)
+    SNIFF_CONTENT = "missing"  # None = wyłączone, "missing" = pliki bez rozszerzenia, "all" = także pliki o niezgodnym rozszerzeniu
+    
+    # Reguły (glob, regex, rozszerzenia, rozmiar, wiek, własciciel, głębokosć - patrz rules.py)
+    # Pierwsza pasująca reguła wyznacza folder docelowy, np.:
+    # {'glob': 'faktura_*.pdf', 'min_age_days': 30, 'destination': 'Finanse/{year}/{month}'}
+    RULES = []
     
     # Filtr plików
     MIN_FILE_SIZE_MB = 0 # Minimalna wielkosć pliku w MB (0 = bez limitu)
@@ -61,18 +162,35 @@ class Config:
             return True
         
         try:
-            size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            
-            if cls.MIN_FILE_SIZE_MB > 0 and size_mb < cls.MIN_FILE_SIZE_MB:
-                return False
-            
-            if cls.MAX_FILE_SIZE_MB > 0 and size_mb > cls.MAX_FILE_SIZE_MB:
-                return False
-            
-            return True
+            return cls.is_size_valid(os.path.getsize(file_path))
         except:
             return True  # W przypadku błędu, akceptuj plik
         
+    @classmethod
+    def snapshot(cls):
+        """ Wszystkie ustawienia (atrybuty wielkimi literami) - np. dla procesu zadania uruchamianego metodą spawn """
+        return {name: value for name, value in vars(cls).items() if name.isupper() and not callable(value)}
+        
+    @classmethod
+    def collision_policy(cls):
+        """ Polityka kolizji nazw - COLLISION_POLICY lub wynikająca z SKIP_EXISTING """
+        if cls.COLLISION_POLICY:
+            return cls.COLLISION_POLICY
+        return "skip" if cls.SKIP_EXISTING else "overwrite_newer"
+        
+    @classmethod
+    def is_size_valid(cls, size_bytes):
+        """ Sprawdza rozmiar w bajtach (np. z juz pobranego stat) bez dodatkowych wywołań systemowych """
+        size_mb = size_bytes / (1024 * 1024)
+        
+        if cls.MIN_FILE_SIZE_MB > 0 and size_mb < cls.MIN_FILE_SIZE_MB:
+            return False
+        
+        if cls.MAX_FILE_SIZE_MB > 0 and size_mb > cls.MAX_FILE_SIZE_MB:
+            return False
+        
+        return True
+        
     @classmethod
     def print_config(cls):
         """ Wyswietla aktualną konfigurację """
@@ -81,11 +199,26 @@ class Config:
         print("=" * 50)
         print(f"📁 Folder źródłowy: {cls.DEFAULT_SOURCE}")
         print(f"📂 Folder docelowy: {cls.DEFAULT_DESTINATION}")
-        print(f"🗂️  Liczba kategorii: {len(cls.FILE_CATEGORIES)}")
-        print(f"📝 Logowanie: {'Włączone' if cls.LOG_ENABLED else 'Wyłączone'}")
+        print(f"🗂️  Liczba kategorii: {len(cls.FILE_CATEGORIES)}"
+              + (f", reguł: {len(cls.RULES)}" if cls.RULES else ""))
+        print(f"📝 Logowanie: {'Włączone' if cls.LOG_ENABLED else 'Wyłączone'}"
+              + (" (tryb cichy)" if cls.QUIET else ""))
         print(f"🔄 Operacja: {'Przenoszenie' if cls.MOVE_FILES else 'Kopiowanie'}")
-        print(f"⏭️  Pomijanie duplikatów: {'Tak' if cls.SKIP_EXISTING else 'Nie'}")
-        print(f"📅 Foldery z datami: {'Tak' if cls.CREATE_DATE_FOLDERS else 'Nie'}")
+        print(f"⏭️  Istniejące pliki w celu: {cls.collision_policy()}")
+        print(f"♊ Duplikaty po zawartosci: {cls.DEDUP_POLICY or 'Wyłączone'}")
+        print(f"📅 Foldery z datami: {'Tak' if cls.CREATE_DATE_FOLDERS else 'Nie'}"
+              + (f" ({cls.DATE_FOLDER_FORMAT}, data: {cls.DATE_SOURCE})" if cls.CREATE_DATE_FOLDERS else ""))
+        print(f"🔍 Typ po zawartosci: {cls.SNIFF_CONTENT or 'Wyłączone'}")
+        print((f"⚡ Silnik asyncio: {cls.ASYNC_CONCURRENCY} operacji w locie, {cls.ASYNC_TRANSFERS} przeniesień"
+               if cls.ENGINE == "asyncio" else f"🧵 Wątki robocze: {cls.MAX_WORKERS}")
+              + (f", procesy skrótów: {cls.HASH_PROCESSES}" if cls.DEDUP_POLICY and cls.HASH_PROCESSES else ""))
+        print(f"♻️  Tryb przyrostowy: {'Tak' if cls.INCREMENTAL else 'Nie'}")
+        print(f"🌳 Tryb rekurencyjny: {'Tak' if cls.RECURSIVE else 'Nie'}"
+              + (f" (maks. głębokosć: {cls.MAX_DEPTH})" if cls.RECURSIVE and cls.MAX_DEPTH else ""))
+        if cls.JOBS_FILE:
+            print(f"📋 Plik zadań: {cls.JOBS_FILE} (budżet wątków: {cls.WORKER_BUDGET})")
+        if cls.DRY_RUN:
+            print(f"📝 Tryb próbny: tylko plan operacji ({cls.PLAN_DIRECTORY})")
         
         if cls.MIN_FILE_SIZE_MB > 0 or cls.MAX_FILE_SIZE_MB > 0:
             print(f"📏 Limity rozmiaru: {cls.MIN_FILE_SIZE_MB}MB - {cls.MAX_FILE_SIZE_MB}MB")
@@ -93,11 +226,32 @@ class Config:
         if cls.EXCLUDED_EXTENSIONS:
             print(f"🚫 Wykluczone rozszerzenia: {', '.join(cls.EXCLUDED_EXTENSIONS)}")
         
-        print("-" * 50)       
-            
-            
-            
-            
-    
-    
-    
+        print("-" * 50)
+
+
+def config_fingerprint(destination_folder, recursive, max_depth):
+    """
+    Zwraca odcisk ustawień wpływających na wynik skanowania
+
+    Zmiana kategorii, filtrów lub trybu przejscia unieważnia cały indeks,
+    bo pliki pominięte wczesniej mogłyby teraz zostać przeniesione.
+    """
+    import json  # Tylko przy starcie uruchomienia - nie przy każdym imporcie konfiguracji
+
+    settings = {
+        'destination': os.path.abspath(destination_folder),
+        'categories': Config.FILE_CATEGORIES,
+        'excluded': Config.EXCLUDED_EXTENSIONS,
+        'min_size': Config.MIN_FILE_SIZE_MB,
+        'max_size': Config.MAX_FILE_SIZE_MB,
+        'recursive': recursive,
+        'max_depth': max_depth,
+        'follow_symlinks': Config.FOLLOW_SYMLINKS,
+        'move_files': Config.MOVE_FILES,
+        'dedup_policy': Config.DEDUP_POLICY,
+        'rules': Config.RULES,
+        'collision_policy': Config.collision_policy(),
+        'sniff_content': Config.SNIFF_CONTENT,
+        'date_folders': Config.CREATE_DATE_FOLDERS and (Config.DATE_FOLDER_FORMAT, Config.DATE_SOURCE),
+    }
+    return json.dumps(settings, sort_keys=True)
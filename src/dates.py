@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Daty plików dla Smart File Organizer
+Data do folderów z datami: mtime albo data zapisana w pliku (EXIF zdjęć,
+nagłówek mvhd filmów MP4/MOV) - czytane są tylko nagłówki, bez dodatkowych pakietów
+"""
+
+import datetime
+import os
+import struct
+from config import Config
+
+
+# Rozszerzenia z metadanymi EXIF w strukturze TIFF (także surowe zdjęcia) i w segmencie APP1 JPEG
+JPEG_EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.jfif'}
+TIFF_EXTENSIONS = {'.tif', '.tiff', '.dng', '.cr2', '.nef', '.arw', '.orf', '.rw2', '.pef'}
+MP4_EXTENSIONS = {'.mp4', '.m4v', '.m4a', '.mov', '.3gp', '.3g2'}
+
+JPEG_HEADER_BYTES = 128 * 1024  # EXIF musi się zmiescić w segmencie APP1 (maks. 64 KB) blisko początku
+
+# Znaczniki TIFF/EXIF
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+
+# Czas w nagłówkach MP4 liczony jest od 1904-01-01 UTC
+MP4_EPOCH = datetime.datetime(1904, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _parse_exif_datetime(value):
+    try:
+        return datetime.datetime.strptime(value.rstrip(b'\0 ').decode('ascii'), '%Y:%m:%d %H:%M:%S')
+    except (ValueError, UnicodeDecodeError):
+        return None  # Np. "0000:00:00 00:00:00" z aparatów bez ustawionego zegara
+
+
+def _read_ifd(data, offset, order):
+    """ Zwraca słownik znacznik -> (typ, liczba, wartosć/przesunięcie) jednego katalogu IFD """
+    if offset + 2 > len(data):
+        return {}
+    count = struct.unpack_from(order + 'H', data, offset)[0]
+    entries = {}
+    for index in range(count):
+        position = offset + 2 + index * 12
+        if position + 12 > len(data):
+            break
+        tag, kind, number, value = struct.unpack_from(order + 'HHII', data, position)
+        entries[tag] = (kind, number, value)
+    return entries
+
+
+def _ascii_value(data, entry):
+    kind, number, offset = entry
+    if kind != 2 or number < 19 or offset + number > len(data):
+        return None
+    return data[offset:offset + number]
+
+
+def tiff_datetime(data):
+    """
+    Data wykonania zdjęcia z bloku TIFF (EXIF)
+
+    Kolejnosć: DateTimeOriginal, DateTimeDigitized, DateTime (data modyfikacji w aparacie).
+    """
+    if len(data) < 8 or data[:2] not in (b'II', b'MM'):
+        return None
+    order = '<' if data[:2] == b'II' else '>'
+    if struct.unpack_from(order + 'H', data, 2)[0] != 42:
+        return None
+
+    ifd0 = _read_ifd(data, struct.unpack_from(order + 'I', data, 4)[0], order)
+    candidates = []
+    if TAG_EXIF_IFD in ifd0:
+        exif = _read_ifd(data, ifd0[TAG_EXIF_IFD][2], order)
+        candidates += [exif.get(TAG_DATETIME_ORIGINAL), exif.get(TAG_DATETIME_DIGITIZED)]
+    candidates.append(ifd0.get(TAG_DATETIME))
+
+    for entry in candidates:
+        if entry is not None:
+            value = _ascii_value(data, entry)
+            parsed = value and _parse_exif_datetime(value)
+            if parsed:
+                return parsed
+    return None
+
+
+def jpeg_datetime(file):
+    """ Data EXIF z segmentu APP1 pliku JPEG """
+    data = file.read(JPEG_HEADER_BYTES)
+    if data[:2] != b'\xff\xd8':
+        return None
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xDA:  # Początek danych obrazu - dalej nie ma metadanych
+            return None
+        length = struct.unpack_from('>H', data, position + 2)[0]
+        segment = data[position + 4:position + 2 + length]
+        if marker == 0xE1 and segment[:6] == b'Exif\0\0':
+            return tiff_datetime(segment[6:])
+        position += 2 + length
+    return None
+
+
+def _mp4_boxes(file, end):
+    """ Przechodzi po pudełkach ISO BMFF od bieżącej pozycji do end: (typ, początek danych, koniec) """
+    while file.tell() + 8 <= end:
+        start = file.tell()
+        header = file.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        data_start = start + 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            data_start += 8
+        elif size == 0:
+            size = end - start
+        if size < data_start - start:
+            return
+        yield kind, data_start, start + size
+        file.seek(start + size)
+
+
+def mp4_datetime(file, size):
+    """ Data utworzenia z nagłówka mvhd filmu MP4/MOV (UTC, zamieniana na czas lokalny) """
+    for kind, start, end in _mp4_boxes(file, size):
+        if kind != b'moov':
+            continue
+        file.seek(start)
+        for inner, inner_start, inner_end in _mp4_boxes(file, end):
+            if inner != b'mvhd':
+                continue
+            file.seek(inner_start)
+            version = file.read(4)[0]
+            raw = file.read(8 if version == 1 else 4)
+            seconds = struct.unpack('>Q' if version == 1 else '>I', raw)[0]
+            if not seconds:
+                return None
+            created = MP4_EPOCH + datetime.timedelta(seconds=seconds)
+            return created.astimezone().replace(tzinfo=None)
+        return None
+    return None
+
+
+def embedded_datetime(path, extension, size):
+    """
+    Data zapisana w pliku (EXIF, nagłówek filmu) lub None
+
+    Czyta tylko nagłówki - dla innych rozszerzeń nie otwiera pliku.
+    """
+    extension = extension.lower()
+    if extension not in JPEG_EXTENSIONS and extension not in TIFF_EXTENSIONS and extension not in MP4_EXTENSIONS:
+        return None
+    try:
+        with open(path, 'rb') as file:
+            if extension in JPEG_EXTENSIONS:
+                return jpeg_datetime(file)
+            if extension in TIFF_EXTENSIONS:
+                return tiff_datetime(file.read(JPEG_HEADER_BYTES))
+            return mp4_datetime(file, size)
+    except (OSError, struct.error, IndexError, OverflowError):
+        return None
+
+
+def file_date(path, extension, info, source=None):
+    """
+    Data pliku dla folderów z datami
+
+    Args:
+        path (str): Scieżka pliku
+        extension (str): Rozszerzenie (z klasyfikatora)
+        info (os.stat_result): Metadane pliku
+        source (str): "mtime" lub "embedded" (data z EXIF/nagłówka filmu,
+                      mtime gdy jej brak) - domyslnie Config.DATE_SOURCE
+
+    Returns:
+        datetime.datetime: Data (czas lokalny)
+    """
+    if (source or Config.DATE_SOURCE) == "embedded":
+        embedded = embedded_datetime(path, extension, info.st_size)
+        if embedded is not None:
+            return embedded
+    return datetime.datetime.fromtimestamp(info.st_mtime)
+
+
+def date_folder(date, template=None):
+    """ Względna scieżka folderu z datą, np. "2025/06" (domyslnie Config.DATE_FOLDER_FORMAT) """
+    folder = (template or Config.DATE_FOLDER_FORMAT).format(
+        year=f"{date.year:04d}", month=f"{date.month:02d}", day=f"{date.day:02d}")
+    return os.path.normpath(folder)
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+Wykrywanie duplikatów po zawartosci dla Smart File Organizer
+Grupowanie po rozmiarze -> skrót początku i końca pliku -> pełny skrót BLAKE2
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import urllib.parse
+from config import Config
+from executor import batched, map_chunked
+
+
+PARTIAL_BYTES = 4 * 1024      # Ile bajtów z początku i końca pliku trafia do skrótu częsciowego
+READ_BUFFER = 1024 * 1024     # Bufor odczytu przy pełnym skrócie
+
+
+def partial_hash(path, size):
+    """ Skrót BLAKE2 z pierwszych i ostatnich PARTIAL_BYTES bajtów pliku """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        digest.update(file.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            file.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(file.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """ Pełny skrót BLAKE2 liczony strumieniowo z dużym buforem """
+    digest = hashlib.blake2b()
+    buffer = bytearray(READ_BUFFER)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as file:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def hash_task(task):
+    """
+    Skrót liczony w procesie puli (Config.HASH_PROCESSES)
+
+    Zadanie to tylko (scieżka, rozmiar, czy pełny) - proces sam czyta plik,
+    a z rozmiaru wynikają przesunięcia odczytu skrótu częsciowego, więc między
+    procesami nie jest przesyłana zawartosć. Zwraca sam skrót lub None, gdy
+    pliku nie da się odczytać (wtedy policzy go wątek roboczy i zgłosi błąd).
+    """
+    path, size, full = task
+    try:
+        return full_hash(path) if full else partial_hash(path, size)
+    except OSError:
+        return None
+
+
+class HashCache:
+    """
+    Trwała pamięć skrótów kluczowana (urządzenie, i-węzeł)
+
+    Wpis jest ważny tylko, gdy rozmiar i mtime pliku się nie zmieniły.
+    Przeniesienie pliku w obrębie systemu plików zachowuje i-węzeł i mtime,
+    więc skrót policzony w folderze źródłowym jest ważny także po przeniesieniu.
+
+    W trybie tylko do odczytu (planowanie) baza nie jest tworzona ani
+    zmieniana - skróty policzone w tym uruchomieniu zostają w pamięci.
+    """
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._memory = {}   # (urządzenie, i-węzeł) -> wiersz jak w bazie (tylko do odczytu)
+        self.hits = 0
+        self.misses = 0
+        self.pooled = 0     # Skróty policzone w puli procesów (prehash)
+
+        if read_only:
+            self.connection = None
+            if os.path.exists(path):
+                try:
+                    self.connection = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro",
+                                                      uri=True, check_same_thread=False)
+                    self.connection.execute("SELECT 1 FROM hashes LIMIT 1")
+                except sqlite3.Error:
+                    self.connection = None   # Baza bez tabeli lub niedostępna - tylko pamięć
+            return
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (device INTEGER, inode INTEGER, size INTEGER, "
+            "mtime_ns INTEGER, partial TEXT, full TEXT, PRIMARY KEY (device, inode))")
+        self.connection.commit()
+
+    def get(self, info):
+        """
+        Zapamiętane skróty pliku
+
+        Returns:
+            tuple: (częsciowy, pełny) - None dla brakujących lub nieaktualnych (zmieniony rozmiar/mtime)
+        """
+        with self._lock:
+            row = self._memory.get((info.st_dev, info.st_ino))
+            if row is None and self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT size, mtime_ns, partial, full FROM hashes WHERE device = ? AND inode = ?",
+                    (info.st_dev, info.st_ino)).fetchone()
+        if row is None or row[0] != info.st_size or row[1] != info.st_mtime_ns:
+            return None, None
+        return row[2], row[3]
+
+    def put(self, info, partial, full):
+        """ Zapamiętuje skróty pliku (full może być None - tylko skrót częsciowy) """
+        with self._lock:
+            if self.read_only:
+                self._memory[(info.st_dev, info.st_ino)] = (info.st_size, info.st_mtime_ns, partial, full)
+                return
+            self.connection.execute(
+                "INSERT OR REPLACE INTO hashes (device, inode, size, mtime_ns, partial, full) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns, partial, full))
+            self._pending_writes += 1
+            if self._pending_writes >= self.COMMIT_EVERY:
+                self.connection.commit()
+                self._pending_writes = 0
+
+    def partial(self, path, info):
+        """ Skrót częsciowy (z pamięci lub liczony) """
+        cached, _ = self.get(info)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        value = partial_hash(path, info.st_size)
+        self.put(info, value, None)
+        return value
+
+    def full(self, path, info):
+        """ Pełny skrót (z pamięci lub liczony) """
+        cached_partial, cached = self.get(info)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        value = full_hash(path)
+        self.put(info, cached_partial or partial_hash(path, info.st_size), value)
+        return value
+
+    def close(self):
+        with self._lock:
+            if self.connection is None:
+                return
+            if not self.read_only:
+                self.connection.commit()
+            self.connection.close()
+
+
+class DuplicateIndex:
+    """
+    Indeks plików w folderze docelowym pogrupowanych po rozmiarze
+
+    Skróty liczone są dopiero, gdy w grupie o tym samym rozmiarze jest
+    inny plik, a pełny skrót tylko wtedy, gdy zgadzają się skróty częsciowe.
+    """
+
+    def __init__(self, hash_cache):
+        self.cache = hash_cache
+        self._lock = threading.Lock()
+        self._size_locks = {}
+        self._by_size = {}    # rozmiar -> lista scieżek plików
+        self.checked = 0
+        self.found = 0
+
+    @classmethod
+    def from_config(cls, destination_folder, categories, read_only=False):
+        """ Buduje indeks z plików w folderach kategorii (read_only - bez zapisu pamięci skrótów, tryb próbny) """
+        index = cls(HashCache(Config.HASH_CACHE_FILE, read_only))
+        for category in categories:
+            index.add_tree(os.path.join(destination_folder, category))
+        return index
+
+    def add_tree(self, folder):
+        """ Dodaje do indeksu wszystkie pliki z folderu (rekurencyjnie, tylko metadane) """
+        stack = [folder]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        self.add(entry.path, entry.stat().st_size)
+
+    def add(self, path, size):
+        """ Dodaje plik do grupy rozmiaru """
+        if size < Config.DEDUP_MIN_SIZE:
+            return
+        with self._lock:
+            self._by_size.setdefault(size, []).append(path)
+
+    def _size_lock(self, size):
+        with self._lock:
+            lock = self._size_locks.get(size)
+            if lock is None:
+                lock = self._size_locks[size] = threading.Lock()
+            return lock
+
+    def find_duplicate(self, path, info):
+        """
+        Szuka pliku o identycznej zawartosci
+
+        Args:
+            path (str): Scieżka sprawdzanego pliku
+            info (os.stat_result): Jego metadane
+
+        Returns:
+            str: Scieżka oryginału lub None (wtedy plik zostaje dodany do indeksu
+                 jako oryginał - po przeniesieniu należy wywołać relocate())
+        """
+        size = info.st_size
+        if size < Config.DEDUP_MIN_SIZE:
+            return None
+
+        # Pliki o tym samym rozmiarze sprawdzamy po kolei, żeby dwa identyczne
+        # pliki przetwarzane równoczesnie nie zostały oba uznane za oryginały
+        with self._size_lock(size):
+            with self._lock:
+                self.checked += 1
+                candidates = list(self._by_size.get(size, ()))
+
+            duplicate = self._match(path, info, candidates) if candidates else None
+            if duplicate is None:
+                self.add(path, size)
+            else:
+                with self._lock:
+                    self.found += 1
+            return duplicate
+
+    def _match(self, path, info, candidates):
+        """ Porównuje plik z kandydatami o tym samym rozmiarze """
+        size = info.st_size
+        partial = self.cache.partial(path, info)
+        full = None
+        for candidate in candidates:
+            try:
+                candidate_info = os.stat(candidate)
+            except OSError:
+                self.remove(candidate, size)
+                continue
+            if candidate_info.st_size != size:
+                self.remove(candidate, size)
+                continue
+            if (candidate_info.st_dev, candidate_info.st_ino) == (info.st_dev, info.st_ino):
+                continue
+            if self.cache.partial(candidate, candidate_info) != partial:
+                continue
+            if full is None:
+                full = self.cache.full(path, info)
+            if self.cache.full(candidate, candidate_info) == full:
+                return candidate
+
+        return None
+
+    def relocate(self, old_path, new_path, size):
+        """ Aktualizuje scieżkę oryginału po przeniesieniu go do folderu docelowego """
+        if size < Config.DEDUP_MIN_SIZE:
+            return
+        with self._lock:
+            paths = self._by_size.setdefault(size, [])
+            if old_path in paths:
+                paths[paths.index(old_path)] = new_path
+            else:
+                paths.append(new_path)
+
+    def remove(self, path, size):
+        """ Usuwa plik z indeksu (np. gdy nie został jednak przeniesiony) """
+        with self._lock:
+            paths = self._by_size.get(size)
+            if paths and path in paths:
+                paths.remove(path)
+
+    def prehash(self, entries, pool, batch_size=None, chunk_size=None):
+        """
+        Etap potoku: skróty plików liczone w puli procesów
+
+        Przepuszcza wpisy ze skanowania bez zmian, ale przed przekazaniem
+        każdej partii liczy w procesach skróty, których find_duplicate będzie
+        potrzebować: częsciowe dla plików o rozmiarze, który ma już inny plik,
+        i pełne tylko przy zgodnych skrótach częsciowych. Wyniki trafiają do
+        pamięci skrótów, więc wątkom roboczym zostają operacje na metadanych.
+
+        Args:
+            entries (iterable): Wpisy os.DirEntry ze skanowania
+            pool (ProcessPoolExecutor): Pula z executor.process_pool
+            batch_size (int): Pliki w partii (domyslnie Config.HASH_BATCH_SIZE)
+            chunk_size (int): Zadań w paczce dla procesu (domyslnie Config.HASH_CHUNK_SIZE)
+        """
+        batch_size = batch_size or Config.HASH_BATCH_SIZE
+        chunk_size = chunk_size or Config.HASH_CHUNK_SIZE
+        for batch in batched(entries, batch_size):
+            self._prehash_batch(batch, pool, chunk_size)
+            yield from batch
+
+    def _prehash_batch(self, batch, pool, chunk_size):
+        # Metadane (stat) w bieżącym wątku - DirEntry zapamiętuje wynik, więc
+        # planowanie pliku nie wykona już drugiego wywołania
+        groups = {}   # rozmiar -> [(scieżka, info, czy z partii)]
+        for entry in batch:
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            if info.st_size >= Config.DEDUP_MIN_SIZE:
+                groups.setdefault(info.st_size, []).append((entry.path, info, True))
+
+        with self._lock:
+            indexed = {size: list(self._by_size.get(size, ())) for size in groups}
+        for size, members in list(groups.items()):
+            for candidate in indexed[size]:
+                try:
+                    candidate_info = os.stat(candidate)
+                except OSError:
+                    continue
+                if candidate_info.st_size == size:
+                    members.append((candidate, candidate_info, False))
+            if len({(info.st_dev, info.st_ino) for _, info, _ in members}) < 2:
+                del groups[size]   # Jedyny plik tego rozmiaru - skrót nie będzie potrzebny
+
+        # Skróty częsciowe: małe odczyty, więc paczki po chunk_size zadań
+        members = [member for group in groups.values() for member in group]
+        partials = [self.cache.get(info)[0] for _, info, _ in members]
+        missing = [index for index, partial in enumerate(partials) if partial is None]
+        results = map_chunked(pool, hash_task, [(members[index][0], members[index][1].st_size, False)
+                                                for index in missing], chunk_size)
+        for index, partial in zip(missing, results):
+            if partial is not None:
+                partials[index] = partial
+                self.cache.put(members[index][1], partial, None)
+        self.cache.pooled += sum(result is not None for result in results)
+
+        # Pełne skróty tylko dla grup o zgodnym skrócie częsciowym z plikiem z partii
+        matching = {}
+        for member, partial in zip(members, partials):
+            if partial is not None:
+                matching.setdefault((member[1].st_size, partial), []).append(member)
+        full_tasks = []
+        for key, group in matching.items():
+            if not any(from_batch for _, _, from_batch in group) or \
+                    len({(info.st_dev, info.st_ino) for _, info, _ in group}) < 2:
+                continue
+            for path, info, _ in group:
+                if self.cache.get(info)[1] is None:
+                    full_tasks.append((path, info, key[1]))
+        # Pełny skrót czyta cały plik - po jednym zadaniu, żeby duże pliki rozkładały się równo
+        results = map_chunked(pool, hash_task, [(path, info.st_size, True) for path, info, _ in full_tasks])
+        for (path, info, partial), full in zip(full_tasks, results):
+            if full is not None:
+                self.cache.put(info, partial, full)
+        self.cache.pooled += sum(result is not None for result in results)
+
+    def summary(self):
+        summary = (f"sprawdzone: {self.checked}, duplikaty: {self.found}, "
+                   f"pamięć skrótów: {self.cache.hits} trafień / {self.cache.misses} obliczeń")
+        if self.cache.pooled:
+            summary += f", w puli procesów: {self.cache.pooled}"
+        return summary
+
+    def close(self):
+        self.cache.close()
+
+
+def link_duplicate(original, source_path, destination_path, remove_source=True):
+    """
+    Zastępuje duplikat twardym linkiem do oryginału w folderze docelowym
+
+    Args:
+        remove_source (bool): Czy usunąć plik źródłowy (False w trybie kopiowania)
+
+    Returns:
+        bool: False gdy link jest niemożliwy (inny system plików) - wtedy nic nie zmieniono
+    """
+    try:
+        os.link(original, destination_path)
+    except OSError:
+        return False
+    if remove_source:
+        os.unlink(source_path)
+    return True
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Urządzenia (dyski) dla Smart File Organizer
+Wspólne dla limitów wątków zadań (jobs.py) i dławienia I/O (throttle.py)
+"""
+
+import os
+
+
+def device_of(path):
+    """ Identyfikator urządzenia (st_dev) dla scieżki - także jeszcze nieistniejącej """
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
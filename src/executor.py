@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Równoległe wykonywanie operacji dla Smart File Organizer
+Ograniczona pula wątków, blokady per folder docelowy i pamięć utworzonych folderów,
+pula procesów dla pracy obciążającej CPU (skróty plików)
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class FileResult:
+    """ Wynik przetworzenia jednego pliku (zwracany przez wątek roboczy) """
+
+    __slots__ = ('operation', 'filename', 'source', 'destination', 'status', 'message', 'file_info',
+                 'category', 'duration')
+
+    def __init__(self, operation, filename, source, destination, status, message, file_info=None,
+                 category=None, duration=None):
+        self.operation = operation      # MOVE, COPY, LINK, SKIP, ERROR, UNCHANGED
+        self.filename = filename
+        self.source = source
+        self.destination = destination
+        self.status = status            # SUCCESS lub powód pominięcia / treść błędu
+        self.message = message          # Linia wyswietlana w konsoli
+        self.file_info = file_info      # os.stat_result pliku (jesli został pobrany)
+        self.category = category        # Kategoria docelowa (jesli została ustalona)
+        self.duration = duration        # Czas obsługi pliku w sekundach
+
+
+class DestinationLocks:
+    """
+    Blokady i zajęte nazwy per folder docelowy
+
+    Nazwy plików w folderze wczytywane są raz (scandir) przy pierwszym
+    użyciu folderu, a rezerwacje z tego uruchomienia dopisywane do tego
+    samego zbioru - sprawdzenie kolizji to jedno wyszukanie w pamięci,
+    bez wywołań exists(). Sprawdzenie i rezerwacja odbywają się atomowo
+    w obrębie folderu, więc dwa wątki nie mogą przenieść pliku pod tę samą
+    nazwę. Samo przenoszenie odbywa się już poza blokadą.
+
+    Po refresh() (tryb obserwacji, między partiami) nazwy wczytane wczesniej
+    nie są wczytywane od nowa - wolna nazwa w takim folderze jest tylko
+    sprawdzana na dysku (lstat). Gdy plik pojawił się tam spoza organizera,
+    wczytywany jest ponownie tylko ten folder.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+        self._names = {}       # folder -> zajęte nazwy (na dysku i zarezerwowane, os.path.normcase)
+        self._loaded = {}      # folder -> (pokolenie, czas) wczytania nazw
+        self._reserved = {}    # folder -> nazwy zarezerwowane w tym uruchomieniu -> czy plik był już na dysku
+        self._counters = {}    # (folder, nazwa) -> kolejny numer dla "nazwa (n).roz"
+        self._generation = 0   # Zwiększane przez refresh() - nazwy ze starszych pokoleń mogą być nieaktualne
+        self.listed_directories = 0
+        self.stale_names = 0   # Nazwy zajęte spoza organizera wykryte po refresh()
+
+    def _lock_for(self, directory):
+        """ Zwraca blokadę folderu (tworzy ją przy pierwszym użyciu) """
+        with self._guard:
+            lock = self._locks.get(directory)
+            if lock is None:
+                lock = self._locks[directory] = threading.Lock()
+                self._reserved[directory] = {}
+            return lock
+
+    def _load(self, directory):
+        """ Wczytuje nazwy folderu z dysku (z rezerwacjami tego uruchomienia) """
+        names = set(self._reserved[directory])
+        try:
+            with os.scandir(directory) as entries:
+                names.update(os.path.normcase(entry.name) for entry in entries)
+        except (FileNotFoundError, NotADirectoryError):
+            pass  # Folder powstanie przy pierwszym przeniesieniu (FolderCache)
+        self._names[directory] = names
+        self._loaded[directory] = (self._generation, time.monotonic())
+        self.listed_directories += 1
+        return names
+
+    def _taken(self, directory):
+        """ Zbiór zajętych nazw folderu (wczytywany raz, wołane pod blokadą folderu) """
+        names = self._names.get(directory)
+        if names is None:
+            names = self._load(directory)
+        return names
+
+    def _free(self, directory, name):
+        """ Czy nazwa jest wolna (wołane pod blokadą folderu) """
+        if os.path.normcase(name) in self._taken(directory):
+            return False
+        if self._loaded[directory][0] == self._generation:
+            return True
+        # Nazwy wczytane przed refresh() - plik mógł się tam pojawić spoza organizera
+        if not os.path.lexists(os.path.join(directory, name)):
+            return True
+        self.stale_names += 1
+        self._load(directory)
+        return False
+
+    def _claim(self, directory, name, existing=False):
+        key = os.path.normcase(name)
+        self._taken(directory).add(key)
+        self._reserved[directory][key] = existing
+
+    def reserve(self, directory, name):
+        """
+        Rezerwuje nazwę w folderze docelowym
+
+        Args:
+            directory (str): Folder docelowy
+            name (str): Nazwa pliku
+
+        Returns:
+            bool: True jesli nazwa była wolna i została zarezerwowana
+        """
+        with self._lock_for(directory):
+            if not self._free(directory, name):
+                return False
+            self._claim(directory, name)
+            return True
+
+    def reserve_numbered(self, directory, name):
+        """
+        Rezerwuje name lub pierwszą wolną nazwę "nazwa (n).roz"
+
+        Licznik numerów pamiętany jest per nazwa, więc kolejne kolizje
+        (tysiące plików scan.pdf) nie sprawdzają od nowa (2), (3), ...
+
+        Returns:
+            str: Zarezerwowana nazwa
+        """
+        stem, extension = os.path.splitext(name)
+        with self._lock_for(directory):
+            if self._free(directory, name):
+                self._claim(directory, name)
+                return name
+            counter_key = (directory, os.path.normcase(name))
+            number = self._counters.get(counter_key, 2)
+            while True:
+                candidate = f"{stem} ({number}){extension}"
+                number += 1
+                if self._free(directory, candidate):
+                    break
+            self._counters[counter_key] = number
+            self._claim(directory, candidate)
+            return candidate
+
+    def reserve_existing(self, directory, name):
+        """
+        Rezerwuje nazwę do nadpisania pliku istniejącego na dysku
+
+        Returns:
+            bool: False gdy nazwę zarezerwował już inny plik z tego uruchomienia
+        """
+        key = os.path.normcase(name)
+        with self._lock_for(directory):
+            if key in self._reserved[directory]:
+                return False
+            self._claim(directory, name, existing=True)
+            return True
+
+    def release(self, directory, name):
+        """ Zwalnia rezerwację (np. gdy przeniesienie się nie powiodło) """
+        key = os.path.normcase(name)
+        with self._lock_for(directory):
+            existing = self._reserved[directory].pop(key, None)
+            if existing is False:
+                # Plik nadpisywany (existing=True) nadal jest na dysku - nazwa zostaje zajęta
+                self._names.get(directory, set()).discard(key)
+
+    def refresh(self, max_age=None):
+        """
+        Rozpoczyna nową partię operacji
+
+        Dla długo działającego trybu obserwacji (pliki mogą pojawić się
+        w folderach docelowych poza organizerem): wczesniej wczytane nazwy
+        są od teraz sprawdzane na dysku przed użyciem (_free), a foldery
+        wczytane ponad max_age sekund temu zapominane w całosci (nazwy
+        usuniętych plików znów są wolne). Wołać, gdy żadna operacja nie
+        jest w toku.
+        """
+        with self._guard:
+            self._generation += 1
+            if max_age is not None:
+                now = time.monotonic()
+                for directory, (_, loaded) in list(self._loaded.items()):
+                    if now - loaded >= max_age:
+                        del self._names[directory]
+                        del self._loaded[directory]
+            self._counters.clear()
+            for reserved in self._reserved.values():
+                reserved.clear()
+
+
+class FolderCache:
+    """
+    Pamięć folderów docelowych utworzonych (lub zastanych) w tym uruchomieniu
+
+    Każdy folder sprawdzany jest na dysku co najwyżej raz - kolejne pliki
+    trafiające do tego samego folderu (np. Images/2025/06) nie wykonują już
+    żadnego wywołania systemowego.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known = set()
+        self.makedirs_calls = 0
+
+    def ensure(self, directory):
+        """
+        Zapewnia istnienie folderu
+
+        Returns:
+            bool: True jesli folder został utworzony w tym wywołaniu
+        """
+        if directory in self._known:
+            return False
+        with self._lock:
+            if directory in self._known:
+                return False
+            self.makedirs_calls += 1
+            try:
+                os.makedirs(directory)
+                created = True
+            except FileExistsError:
+                created = False
+            self._known.add(directory)
+            return created
+
+
+def run_pipeline(items, func, workers=1, max_pending=None):
+    """
+    Wykonuje func dla każdego elementu, opcjonalnie w puli wątków
+
+    Elementy są pobierane leniwie - w locie jest najwyżej max_pending zadań,
+    więc pamięć nie rosnie wraz z liczbą plików. func nie powinna rzucać
+    wyjątków (błędy zwraca jako wynik).
+
+    Args:
+        items (iterable): Elementy do przetworzenia
+        func (callable): Funkcja wykonywana dla elementu
+        workers (int): Liczba wątków (1 = sekwencyjnie w bieżącym wątku)
+        max_pending (int): Limit zadań w locie (domyslnie 4 x workers)
+
+    Yields:
+        Wyniki func w kolejnosci zakończenia
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    max_pending = max_pending or workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='organizer') as pool:
+        pending = set()
+        for item in items:
+            pending.add(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def batched(items, size):
+    """ Dzieli strumień elementów na listy po size elementów """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def process_pool(workers):
+    """
+    Pula procesów dla pracy obciążającej CPU (omija GIL)
+
+    Procesy uruchamiane są metodą spawn - proces główny ma już działające
+    wątki (logi, konsola), a fork procesu wielowątkowego może zakleszczyć potomka.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # Import modułu puli procesów tylko gdy potrzebny
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def map_chunked(pool, func, tasks, chunk_size=1):
+    """
+    Wykonuje func dla każdego zadania w puli procesów
+
+    Zadania wysyłane są paczkami po chunk_size (jedna wymiana danych między
+    procesami na paczkę), więc zadania i wyniki powinny być małe - np. scieżki
+    zamiast zawartosci plików.
+
+    Returns:
+        list: Wyniki w kolejnosci zadań
+    """
+    if not tasks:
+        return []
+    return list(pool.map(func, tasks, chunksize=max(1, chunk_size)))
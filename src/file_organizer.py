@@ -6,25 +6,43 @@ Data: 2025-06-24
 """
 
 import os
-import shutil
-from pathlib import Path
+import time
 import datetime
-from logger import setup_logger, log_file_operation # <- nowe linia
+from functools import partial
+from logger import setup_logger, setup_console, flush_logger, log_file_operation, FILE_EVENT # <- nowe linia
 from config import Config # <- Nowa linia
+from classifier import FileClassifier
+from scanner import ScanStats, scan_files
+from executor import DestinationLocks, FolderCache, run_pipeline, process_pool, batched
+from undo import UndoJournal
+from checkpoint import Checkpoint
+from metrics import record_result, timed_scan
+from transfer import FileTransfer
+from source_lock import SourceLock
+from planner import (plan_file, apply_entry, PlanWriter, read_plan,
+                     TRANSFER_ACTIONS, UNCHANGED)
 
-def create_folders(base_path):
+def create_folders(base_path, folders=None):
     """
     Tworzy foldery dla różnych typów plików na podstawie konfiguracji
 
+    Args:
+        folders (FolderCache): Pamięć utworzonych folderów - foldery kategorii
+                               nie będą już sprawdzane przy przenoszeniu
+
     """
     categories = Config.get_file_categories()
+    if folders is None:
+        folders = FolderCache()
+    
+    # Osobna kategoria na duplikaty (polityka "move")
+    if Config.DEDUP_POLICY == "move":
+        categories.setdefault(Config.DUPLICATES_CATEGORY, [])
 
     print(f"Tworzę foldery w: {base_path}")
     
     for folder_name in categories.keys():
-        folder_path = os.path.join(base_path, folder_name)
-        if not os.path.exists(folder_path):
-            os.makedirs(folder_path)
+        if folders.ensure(os.path.join(base_path, folder_name)):
             print(f"✓ Utworzono folder: {folder_name}")
         else:
             print(f"→ Folder juz istnieje: {folder_name}")
@@ -51,9 +69,162 @@ def get_file_category(file_extension, categories):
         
     return 'Others'
 
-def organize_files(source_folder=None, destination_folder=None):
+def process_file(entry, classifier, destination_folder, scan_stats, destination_locks, transfer,
+                 scan_state=None, duplicates=None, journal=None, rules=None, folders=None, sniffer=None):
+    """
+    Przetwarza jeden plik: zaplanowanie operacji i jej natychmiastowe wykonanie
+    
+    Bezpieczna dla wielu wątków - nie modyfikuje wspólnych liczników,
+    a wynik (do wyswietlenia i zalogowania) zwraca wywołującemu.
+    
+    Args:
+        entry (os.DirEntry): Plik ze skanowania folderu źródłowego
+        classifier (FileClassifier): Skompilowany klasyfikator
+        destination_folder (str): Folder docelowy
+        scan_stats (ScanStats): Liczniki wywołań systemowych
+        destination_locks (DestinationLocks): Blokady folderów docelowych
+        transfer (FileTransfer): Przenoszenie/kopiowanie (Config.MOVE_FILES)
+        scan_state (ScanState): Indeks stanu (tylko w trybie przyrostowym)
+        duplicates (DuplicateIndex): Indeks duplikatów (gdy Config.DEDUP_POLICY jest ustawione)
+        journal (UndoJournal): Dziennik cofania (gdy Config.UNDO_ENABLED)
+        rules (RuleEngine): Reguły (gdy Config.RULES jest ustawione)
+        folders (FolderCache): Utworzone foldery docelowe
+        sniffer (ContentSniffer): Rozpoznawanie typu po zawartosci (gdy Config.SNIFF_CONTENT)
+        
+    Returns:
+        FileResult: Wynik operacji
+    """
+    started = time.perf_counter()
+    plan_entry = plan_file(entry, classifier, destination_folder, scan_stats, destination_locks,
+                           transfer.move, scan_state, duplicates, rules, sniffer)
+    return apply_entry(plan_entry, destination_locks, transfer, duplicates, folders, started, journal)
+
+def create_processor(destination_folder, scan_stats, transfer, scan_state=None, duplicates=None, journal=None,
+                     source_folder=None, folders=None, destination_locks=None, stages=False):
+    """
+    Buduje funkcję przetwarzającą pojedynczy plik
+    
+    Klasyfikator, reguły, blokady i pamięć folderów docelowych tworzone są raz
+    i współdzielone przez wszystkie wywołania (organize_files, tryb obserwacji folderu).
+    
+    Args:
+        source_folder (str): Folder źródłowy - głębokosć plików dla reguł liczona jest względem niego
+        folders (FolderCache): Pamięć folderów z create_folders (domyslnie nowa)
+        destination_locks (DestinationLocks): Zajęte nazwy w folderach docelowych (domyslnie nowe)
+        stages (bool): Osobne etapy planowania i wykonania (silnik asyncio) zamiast jednej funkcji
+    
+    Returns:
+        callable: process_file z ustawionym kontekstem, przyjmuje wpis pliku
+                  (gdy stages - krotka (plan_file, apply_entry) z tym samym kontekstem)
+    """
+    rules = _rule_engine(source_folder)
+    classifier = FileClassifier.from_config()
+    sniffer = _content_sniffer()
+    if destination_locks is None:
+        destination_locks = DestinationLocks()
+    if folders is None:
+        folders = FolderCache()
+    
+    if stages:
+        plan = partial(plan_file, classifier=classifier, destination_folder=destination_folder,
+                       scan_stats=scan_stats, destination_locks=destination_locks, move=transfer.move,
+                       scan_state=scan_state, duplicates=duplicates, rules=rules, sniffer=sniffer)
+        apply = partial(apply_entry, destination_locks=destination_locks, transfer=transfer,
+                        duplicates=duplicates, folders=folders, journal=journal)
+        return plan, apply
+    
+    return partial(process_file, classifier=classifier,
+                   destination_folder=destination_folder, scan_stats=scan_stats,
+                   destination_locks=destination_locks, transfer=transfer, scan_state=scan_state,
+                   duplicates=duplicates, journal=journal, rules=rules, folders=folders, sniffer=sniffer)
+
+def _rule_engine(source_folder):
+    """ Reguły z Config.RULES lub None (moduł reguł importowany tylko, gdy są zdefiniowane) """
+    if not Config.RULES or source_folder is None:
+        return None
+    from rules import RuleEngine
+    return RuleEngine.from_config(source_folder)
+
+def _content_sniffer():
+    """ Rozpoznawanie typu po zawartosci lub None, gdy Config.SNIFF_CONTENT jest wyłączone """
+    if not Config.SNIFF_CONTENT:
+        return None
+    from sniffer import ContentSniffer
+    return ContentSniffer.from_config()
+
+def tally_results(results, logger, scan_state=None, console=None, checkpoint=None):
+    """
+    Wyswietla, loguje i zlicza wyniki przetwarzania plików
+    
+    Wywoływana w jednym wątku - wyniki z wątków roboczych trafiają tu
+    pojedynczo, więc liczniki są dokładne, a linie każdego pliku nie mieszają się.
+    
+    Args:
+        results (iterable): Wyniki FileResult
+        logger: Logger lub None
+        scan_state (ScanState): Indeks stanu (tylko w trybie przyrostowym)
+        console: Logger konsoli z setup_console (None = print)
+        checkpoint (Checkpoint): Punkt kontrolny uruchomienia
+        
+    Returns:
+        dict: Liczniki moved, copied, skipped, errors, unchanged
+    """
+    counts = {'moved': 0, 'copied': 0, 'skipped': 0, 'errors': 0, 'unchanged': 0}
+    
+    for result in results:
+        if scan_state is not None:
+            scan_state.record_result(result)
+        if checkpoint is not None:
+            checkpoint.record_result(result)
+        record_result(result)
+        
+        # Pliki niezmienione od poprzedniego uruchomienia nie są wyswietlane ani logowane
+        if result.operation == "UNCHANGED":
+            counts['unchanged'] += 1
+            continue
+        
+        if console is not None:
+            console.info(result.message, extra=FILE_EVENT)
+        else:
+            print(result.message)
+        if logger:
+            log_file_operation(logger, result.operation, result.filename, result.source,
+                               result.destination, result.status,
+                               result.file_info.st_size if result.file_info is not None else None,
+                               result.duration, result.category)
+        
+        if result.operation == "SKIP":
+            counts['skipped'] += 1
+        elif result.operation == "ERROR":
+            counts['errors'] += 1
+        elif result.operation == "COPY":
+            counts['copied'] += 1
+        else:
+            counts['moved'] += 1
+            
+    return counts
+
+def organize_files(source_folder=None, destination_folder=None, workers=None, recursive=None, max_depth=None,
+                   incremental=None, dry_run=None, plan_path=None, scan_stats=None, lock_source=True):
     """
     Główna funkcja organizująca pliki z logowniem i konfiguracją
+    
+    W trybie próbnym (dry_run) tylko planuje operacje - nic na dysku nie
+    zmienia, a plan zapisuje do pliku JSONL, który można przejrzeć,
+    porównać z poprzednim (diff_plans) i wykonać później (execute_plan).
+    
+    Args:
+        source_folder (str): Folder źródłowy (domyslnie z konfiguracji)
+        destination_folder (str): Folder docelowy (domyslnie z konfiguracji)
+        workers (int): Liczba wątków przenoszących pliki (domyslnie Config.MAX_WORKERS)
+        recursive (bool): Czy organizować pliki z podfolderów (domyslnie Config.RECURSIVE)
+        max_depth (int): Limit głębokosci podfolderów, 0 = bez limitu (domyslnie Config.MAX_DEPTH)
+        incremental (bool): Czy korzystać z indeksu stanu skanowania (domyslnie Config.INCREMENTAL)
+        dry_run (bool): Tylko zaplanuj operacje (domyslnie Config.DRY_RUN)
+        plan_path (str): Plik planu w trybie próbnym (domyslnie nowy plik w Config.PLAN_DIRECTORY)
+        scan_stats (ScanStats): Liczniki wywołań systemowych do wypełnienia (np. w benchmarku)
+        lock_source (bool): Czy zablokować folder źródłowy (False - blokadę trzyma już wołający,
+                            np. tryb obserwacji na całą sesję)
     """
     
     # Użyj domyslnych scieżek z konfiguracji jesli nie podano
@@ -62,6 +233,16 @@ def organize_files(source_folder=None, destination_folder=None):
         source_folder = Config.DEFAULT_SOURCE
     if destination_folder is None:
         destination_folder = Config.DEFAULT_DESTINATION
+    if workers is None:
+        workers = Config.MAX_WORKERS
+    if recursive is None:
+        recursive = Config.RECURSIVE
+    if max_depth is None:
+        max_depth = Config.MAX_DEPTH
+    if incremental is None:
+        incremental = Config.INCREMENTAL
+    if dry_run is None:
+        dry_run = Config.DRY_RUN
         
     # Wyswietl konfigurację
     Config.print_config()
@@ -87,101 +268,360 @@ def organize_files(source_folder=None, destination_folder=None):
     if not os.path.exists(source_folder):
         error_msg = f"Folder źródłowy nie istnieje: {source_folder}"
         print(f"❌ BŁĄD: {error_msg}")
-        logger.error(error_msg)
+        if logger:
+            logger.error(error_msg)
         return False   
     
+    # Tryb próbny: tylko planowanie, więc nie tworzymy żadnych folderów
+    if dry_run:
+        return plan_files(source_folder, destination_folder, workers, recursive, max_depth,
+                          incremental, plan_path, logger, scan_stats)
+    
+    # Blokada folderu źródłowego - inny proces (zadanie, scheduler, ręczne
+    # uruchomienie) nie może organizować tego samego drzewa w tym samym czasie
+    source_lock = SourceLock.from_config(source_folder) if lock_source else None
+    if source_lock is not None and not source_lock.acquire():
+        message = (f"Folder źródłowy jest już organizowany przez inny proces "
+                   f"(PID {source_lock.holder()}): {source_folder}")
+        print(f"⏭️  {message} - pomijam")
+        if logger:
+            logger.warning(message)
+        return False
+    try:
+        return _organize_files(source_folder, destination_folder, workers, recursive, max_depth,
+                               incremental, logger, scan_stats)
+    finally:
+        if source_lock is not None:
+            source_lock.release()
+
+def _organize_files(source_folder, destination_folder, workers, recursive, max_depth, incremental,
+                    logger, scan_stats):
+    """ Organizacja plików (folder źródłowy zablokowany przez organize_files) """
+    
     # Utwórz folder docelowy jesli nie istnieje
     if not os.path.exists(destination_folder):
         os.makedirs(destination_folder)
-        logger.info(f"Utworzono folder docelowy: {destination_folder}")
+        if logger:
+            logger.info(f"Utworzono folder docelowy: {destination_folder}")
         print(f"✓ Utworzono folder docelowy: {destination_folder}")
         
     # Utwórz foldery kategorii
-    categories = create_folders(destination_folder)
-    logger.info(f"Utworzono {len(categories)} kategorii folderów")
+    folders = FolderCache()
+    categories = create_folders(destination_folder, folders)
+    if logger:
+        logger.info(f"Utworzono {len(categories)} kategorii folderów")
     
-    # Liczniki
+    # Liczniki wywołań systemowych
+    if scan_stats is None:
+        scan_stats = ScanStats()
     
-    moved_files = 0
-    errors = 0
-    skipped_files = 0
+    # Indeks stanu z poprzednich uruchomień (tryb przyrostowy)
+    scan_state = None
+    if incremental:
+        from state import ScanState  # sqlite3 tylko w trybie przyrostowym
+        scan_state = ScanState.from_config(destination_folder, recursive, max_depth)
+        if logger:
+            logger.info(f"Tryb przyrostowy - indeks stanu: {scan_state.path} (uruchomienie #{scan_state.run_id})")
     
     print("\n🔄 Rozpoczynam organizację plików...")
     print("-" * 50)
     
-    # Przejdź przez wszystkie pliki w folderze źródłowym
-    for filename in os.listdir(source_folder):
-        source_path = os.path.join(source_folder, filename)
-    
-        # Pomiń foldery, organizuj tylko pliki
-        if os.path.isfile(source_path):
-            try:
-                
-                # Sprawdź czy plik jest wykluczony
-                if Config.is_file_excluded(filename):
-                    print(f"🚫  Wykluczono plik: {filename}")
-                    if logger:
-                        log_file_operation(logger, "SKIP", filename, source_path, "N/A", "EXCLUDED")
-                    skipped_files += 1
-                    continue
-                
-                # Sprawdź rozmiar pliku
-                if not Config.is_file_size_valid(source_path):
-                    print(f"📏 Plik poza limitami rozmiaru: {filename}")
-                    if logger:
-                        log_file_operation(logger, "SKIP", filename, source_path, "N/A", "SIZE_LIMIT")
-                    skipped_files += 1
-                    continue
-                
-                
-                # Pobierz rozszerzenie pliku
-                file_extension = Path(filename).suffix
-                
-                if not file_extension:
-                    print(f"⚠️  Pominięto plik bez rozszerzenia: {filename}")
-                    log_file_operation(logger, "SKIP", filename, source_path, "N/A", "NO_EXTENSION")
-                    skipped_files += 1
-                    continue
-                
-                # Okresl kategorię
-                category = get_file_category(file_extension, categories)
-    
-    
-                # Ścieżka docelowa
-                destination_path = os.path.join(destination_folder, category, filename)
-                
-                # Sprawdź, czy plik już istnieje w miejscu docelowym
-                if os.path.exists(destination_path):
-                    print(f"⚠️  Plik już istnieje: {filename} → {category}/")
-                    log_file_operation(logger, "SKIP", filename, source_path, destination_path, "FILE_EXISTS")
-                    skipped_files +=  1
-                    continue
-                
-                # Przenies plik
-                shutil.move(source_path, destination_path)
-                print(f"✅ Przeniesiono: {filename} → {category}/")
-                log_file_operation(logger, "MOVE", filename, source_path, destination_path, "SUCCESS")
-                moved_files += 1
-                
-            except Exception as e:
-                error_msg = f"Błąd przy przenoszeniu {filename}: {str(e)}"
-                print(f"❌ {error_msg}")
-                log_file_operation(logger, "ERROR", filename, source_path, "N/A", str(e))
-                errors += 1
-                
+    # Indeks duplikatów - pliki w folderach kategorii pogrupowane po rozmiarze
+    duplicates = None
+    if Config.DEDUP_POLICY:
+        from dedup import DuplicateIndex
+        duplicates = DuplicateIndex.from_config(destination_folder, categories)
+    
+    # Przetwarzanie pliku: klasyfikacja -> sprawdzenie celu -> przeniesienie
+    # (indeks rozszerzeń budowany raz na całe uruchomienie)
+    # Przenoszenie lub kopiowanie (Config.MOVE_FILES) z wyborem najszybszej metody
+    transfer = FileTransfer.from_config()
+    
+    # Dziennik cofania - każda operacja zapisana przed wykonaniem
+    journal = UndoJournal.from_config()
+    
+    # Silnik asyncio (udziały sieciowe): planowanie i przeniesienia jako osobne etapy z własnymi limitami
+    use_async = Config.ENGINE == "asyncio"
+    process = create_processor(destination_folder, scan_stats, transfer, scan_state, duplicates, journal,
+                               source_folder, folders, stages=use_async)
+    
+    # Folder docelowy i foldery kategorii nie mogą być skanowane, gdy leżą w źródle
+    prune = [destination_folder] + [os.path.join(destination_folder, name) for name in categories]
+    
+    # Leniwy potok: przejscie po drzewie -> filtr -> klasyfikacja -> przeniesienie
+    # (scandir odfiltrowuje foldery bez stat, pliki pobierane są dopiero gdy jest na nie miejsce)
+    # Punkt kontrolny - przerwane wczesniej uruchomienie wznawia się od miejsca przerwania
+    checkpoint = None
+    if Config.CHECKPOINT_ENABLED:
+        checkpoint = Checkpoint.from_config(source_folder, destination_folder, recursive, max_depth, scan_state)
+        if checkpoint.resumed:
+            print(f"⏯️  Wznawiam przerwane uruchomienie (punkt kontrolny: {checkpoint.path})")
+            if logger:
+                logger.info(f"Wznowienie przerwanego uruchomienia: {checkpoint.path}")
+    
+    files = scan_files(source_folder, scan_stats, recursive=recursive, max_depth=max_depth,
+                       prune=prune, follow_symlinks=Config.FOLLOW_SYMLINKS,
+                       state=checkpoint if checkpoint is not None else scan_state)
+    files = timed_scan(files)
+    if checkpoint is not None:
+        files = checkpoint.track(files)
+    
+    # Skróty duplikatów liczone w puli procesów (CPU), wątki robocze robią resztę
+    hash_pool = None
+    if duplicates is not None and Config.HASH_PROCESSES:
+        hash_pool = process_pool(Config.HASH_PROCESSES)
+        files = duplicates.prehash(files, hash_pool)
+    
+    # Wyniki z wątków roboczych wyswietlamy i liczymy tylko tutaj - w jednym wątku
+    # Linie per plik wypisuje wątek konsoli (z limitem lub wcale w trybie cichym)
+    console = setup_console()
+    completed = False
+    try:
+        if use_async:
+            from async_engine import AsyncEngine  # asyncio importowany tylko dla silnika asyncio
+            results = AsyncEngine(*process).run(files)
+        else:
+            results = run_pipeline(files, process, workers)
+        counts = tally_results(results, logger, scan_state, console, checkpoint)
+        completed = True
+    finally:
+        flush_logger(console)
+        flush_logger(logger)
+        if hash_pool is not None:
+            hash_pool.shutdown(cancel_futures=True)
+        if checkpoint is not None:
+            checkpoint.close(complete=completed)
+            if not completed:
+                print(f"\n💾 Zapisano punkt kontrolny - kolejne uruchomienie wznowi pracę: {checkpoint.path}")
+        if scan_state is not None:
+            scan_state.close(complete=completed)
+        if duplicates is not None:
+            duplicates.close()
+        if journal is not None:
+            journal.close()
+    
+    moved_files = counts['moved']
+    copied_files = counts['copied']
+    skipped_files = counts['skipped']
+    errors = counts['errors']
+            
     # Podsumowanie
     print("\n" + "=" * 50)
     print("📊 PODSUMOWANIE")
     print("=" * 50)
     print(f"✅ Przeniesiono plików: {moved_files}")
+    if copied_files:
+        print(f"📋 Skopiowano plików: {copied_files}")
     print(f"⚠️  Pominięto plików: {skipped_files}")
     print(f"❌ Błędów: {errors}")
-    print(f"📁 Łączna liczba plików: {moved_files + skipped_files + errors}")
+    print(f"📁 Łączna liczba plików: {moved_files + copied_files + skipped_files + errors}")
+    print(f"🚚 Transfer: {transfer.stats.summary()}")
+    if transfer.throttle is not None:
+        print(f"⏳ Dławienie I/O: {transfer.throttle.summary()}")
+    if scan_state is not None:
+        print(f"♻️  Niezmienione od poprzedniego uruchomienia: {counts['unchanged']} plików, "
+              f"{scan_stats.unchanged_directories} folderów")
+    if duplicates is not None:
+        print(f"♊ Duplikaty ({Config.DEDUP_POLICY}): {duplicates.summary()}")
+    print(f"🔍 Wywołania systemowe: {scan_stats.summary()}")
+    if scan_stats.directories:
+        print(f"🌳 Foldery: {scan_stats.tree_summary()}")
+    if checkpoint is not None and checkpoint.resumed:
+        print(f"⏯️  Wznowiono: pominięto {checkpoint.skipped_directories} ukończonych folderów "
+              f"i {checkpoint.skipped_files} obsłużonych plików")
+    if journal is not None and journal.run_id:
+        print(f"↩️  Cofnięcie tego uruchomienia: python undo.py {journal.run_id}")
+    if scan_stats.skipped_directories and not recursive:
+        print(f"📂 Pominięto podfolderów: {scan_stats.skipped_directories} (włącz Config.RECURSIVE aby je organizować)")
     
     # Loguj podsumowanie
-    logger.info(f"Operacja zakończona, Przeniesiono: {moved_files}, Pominięto: {skipped_files}, Błędów: {errors}") 
+    if logger:
+        logger.info(f"Operacja zakończona, Przeniesiono: {moved_files}, Skopiowano: {copied_files}, "
+                    f"Pominięto: {skipped_files}, Błędów: {errors}") 
+        logger.info(f"Transfer - {transfer.stats.summary()}")
+        logger.info(f"Wywołania systemowe - {scan_stats.summary()}")
+        if duplicates is not None:
+            logger.info(f"Duplikaty - {duplicates.summary()}")
+        if scan_stats.directories:
+            logger.info(f"Foldery - {scan_stats.tree_summary()}")
     return True
 
+def plan_files(source_folder, destination_folder, workers, recursive, max_depth, incremental,
+               plan_path=None, logger=None, scan_stats=None):
+    """
+    Faza planowania: buduje plan operacji bez zmian na dysku
+    
+    Plan zawiera każdą decyzję (przeniesienie, kopia, link, pominięcie
+    z powodem) i jest zapisywany strumieniowo, więc pamięć nie rosnie
+    z liczbą plików. Indeks stanu i pamięć skrótów otwierane są tylko do odczytu.
+    
+    Returns:
+        str: Scieżka zapisanego planu
+    """
+    if plan_path is None:
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        plan_path = os.path.join(Config.PLAN_DIRECTORY, f"plan_{timestamp}.jsonl")
+    
+    # Scieżki bezwzględne - plan musi dać się wykonać z dowolnego folderu roboczego
+    destination_folder = os.path.abspath(destination_folder)
+    categories = Config.get_file_categories()
+    if Config.DEDUP_POLICY == "move":
+        categories.setdefault(Config.DUPLICATES_CATEGORY, [])
+    
+    if scan_stats is None:
+        scan_stats = ScanStats()
+    scan_state = None
+    if incremental:
+        from state import ScanState
+        scan_state = ScanState.from_config(destination_folder, recursive, max_depth, read_only=True)
+    duplicates = None
+    if Config.DEDUP_POLICY:
+        from dedup import DuplicateIndex
+        duplicates = DuplicateIndex.from_config(destination_folder, categories, read_only=True)
+    
+    planner = partial(plan_file, classifier=FileClassifier.from_config(),
+                      destination_folder=destination_folder, scan_stats=scan_stats,
+                      destination_locks=DestinationLocks(), move=Config.MOVE_FILES,
+                      scan_state=scan_state, duplicates=duplicates,
+                      rules=_rule_engine(source_folder), sniffer=_content_sniffer())
+    
+    prune = [destination_folder] + [os.path.join(destination_folder, name) for name in categories]
+    files = scan_files(source_folder, scan_stats, recursive=recursive, max_depth=max_depth,
+                       prune=prune, follow_symlinks=Config.FOLLOW_SYMLINKS, state=scan_state)
+    hash_pool = None
+    if duplicates is not None and Config.HASH_PROCESSES:
+        hash_pool = process_pool(Config.HASH_PROCESSES)
+        files = duplicates.prehash(files, hash_pool)
+    
+    print("\n📝 Tryb próbny - planuję operacje (bez zmian na dysku)...")
+    print("-" * 50)
+    
+    console = setup_console()
+    actions = {}
+    writer = PlanWriter(plan_path, source_folder, destination_folder, Config.MOVE_FILES)
+    try:
+        if Config.ENGINE == "asyncio":
+            from async_engine import AsyncEngine
+            entries = AsyncEngine(planner).run(files)
+        else:
+            entries = run_pipeline(files, planner, workers)
+        for plan_entry in entries:
+            actions[plan_entry.action] = actions.get(plan_entry.action, 0) + 1
+            if plan_entry.action != UNCHANGED:
+                console.info(plan_entry.describe(), extra=FILE_EVENT)
+            writer.write(plan_entry)
+    finally:
+        flush_logger(console)
+        writer.close()
+        if hash_pool is not None:
+            hash_pool.shutdown(cancel_futures=True)
+        if scan_state is not None:
+            scan_state.close()
+        if duplicates is not None:
+            duplicates.close()
+    
+    summary = ", ".join(f"{action}: {count}" for action, count in sorted(actions.items())) or "brak plików"
+    print("\n" + "=" * 50)
+    print("📝 PLAN OPERACJI")
+    print("=" * 50)
+    print(f"📋 Operacje: {summary}")
+    print(f"💾 Zapisano plan: {plan_path} ({writer.written} operacji)")
+    print(f"🔍 Wywołania systemowe: {scan_stats.summary()}")
+    
+    if logger:
+        logger.info(f"Zaplanowano operacje ({summary}), plan: {plan_path}")
+    return plan_path
+
+def execute_plan(plan_path, workers=None, batch_size=None):
+    """
+    Faza wykonania: wykonuje zapisany plan operacji
+    
+    Przed każdą operacją sprawdzane jest, czy plik źródłowy nie zmienił się
+    od zaplanowania i czy nazwa docelowa jest wolna - nieaktualne pozycje
+    planu są pomijane. Operacje wykonywane są partiami po batch_size,
+    a w obrębie partii w puli workers wątków.
+    
+    Args:
+        plan_path (str): Plik planu (z organize_files w trybie próbnym)
+        workers (int): Liczba wątków (domyslnie Config.MAX_WORKERS)
+        batch_size (int): Rozmiar partii (domyslnie Config.PLAN_BATCH_SIZE)
+        
+    Returns:
+        dict: Liczniki moved, copied, skipped, errors, unchanged
+              (None, gdy folder źródłowy organizuje inny proces)
+    """
+    if workers is None:
+        workers = Config.MAX_WORKERS
+    if batch_size is None:
+        batch_size = Config.PLAN_BATCH_SIZE
+    
+    header, entries = read_plan(plan_path)
+    
+    logger = None
+    if Config.LOG_ENABLED:
+        logger = setup_logger(Config.LOG_DIRECTORY)
+    
+    print("=" * 50)
+    print("📝 WYKONANIE PLANU")
+    print("=" * 50)
+    print(f"💾 Plan: {plan_path} (utworzony {header['created']})")
+    print(f"📁 Folder źródłowy: {header['source']}")
+    print(f"📂 Folder docelowy: {header['destination']}")
+    print("-" * 50)
+    if logger:
+        logger.info(f"Rozpoczęto wykonanie planu: {plan_path}")
+    
+    source_lock = SourceLock.from_config(header['source'])
+    if source_lock is not None and not source_lock.acquire():
+        message = (f"Folder źródłowy jest już organizowany przez inny proces "
+                   f"(PID {source_lock.holder()}): {header['source']}")
+        print(f"⏭️  {message} - plan nie został wykonany")
+        if logger:
+            logger.warning(message)
+        return None
+    
+    # Pominięcia z planu nie wymagają żadnej operacji
+    operations = (entry for entry in entries if entry.action in TRANSFER_ACTIONS)
+    transfer = FileTransfer(header['move'], Config.FSYNC_COPIES)
+    journal = UndoJournal.from_config()
+    apply = partial(apply_entry, destination_locks=DestinationLocks(), transfer=transfer,
+                    folders=FolderCache(), journal=journal, verify=True)
+    
+    console = setup_console()
+    counts = {'moved': 0, 'copied': 0, 'skipped': 0, 'errors': 0, 'unchanged': 0}
+    try:
+        for number, batch in enumerate(batched(operations, batch_size), 1):
+            batch_counts = tally_results(run_pipeline(batch, apply, workers), logger, console=console)
+            for key, value in batch_counts.items():
+                counts[key] += value
+            console.info(f"📦 Partia {number}: {len(batch)} operacji")
+    finally:
+        flush_logger(console)
+        flush_logger(logger)
+        if journal is not None:
+            journal.close()
+        if source_lock is not None:
+            source_lock.release()
+    
+    print("\n" + "=" * 50)
+    print("📊 PODSUMOWANIE")
+    print("=" * 50)
+    print(f"✅ Przeniesiono plików: {counts['moved']}")
+    if counts['copied']:
+        print(f"📋 Skopiowano plików: {counts['copied']}")
+    print(f"⚠️  Pominięto plików: {counts['skipped']}")
+    print(f"❌ Błędów: {counts['errors']}")
+    print(f"🚚 Transfer: {transfer.stats.summary()}")
+    if transfer.throttle is not None:
+        print(f"⏳ Dławienie I/O: {transfer.throttle.summary()}")
+    if journal is not None and journal.run_id:
+        print(f"↩️  Cofnięcie wykonania planu: python undo.py {journal.run_id}")
+    
+    if logger:
+        logger.info(f"Plan wykonany, Przeniesiono: {counts['moved']}, Skopiowano: {counts['copied']}, "
+                    f"Pominięto: {counts['skipped']}, Błędów: {counts['errors']}")
+    return counts
+
 # Funkcja testowa
 def test_organizer():
     """Funkcja do testowania organizatora z konfiguracją"""
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Zadania organizacji dla Smart File Organizer
+Wiele par folder źródłowy -> docelowy, każda z własnymi ustawieniami
+i harmonogramem, wczytywanych z pliku YAML, TOML lub JSON
+
+Przykład (jobs.yaml):
+
+    worker_budget: 16
+    device_max_workers: 8
+    defaults:
+      recursive: true
+    jobs:
+      - name: skany
+        source: /srv/inbox/skany
+        destination: /srv/archiwum/skany
+        schedule: 15            # co 15 minut (lub "HH:MM" - codziennie)
+        workers: 4
+        move_files: false
+        file_categories: {Documents: [.pdf], Others: []}
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import random
+import re
+import time
+from config import Config
+from devices import device_of
+from source_lock import SourceLock
+from metrics import REGISTRY, JOBS_PENDING, JOBS_RUNNING, record_run
+from throttle import create_shared_buckets, use_shared_buckets
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+try:
+    import yaml
+except ImportError:  # PyYAML jest opcjonalny
+    yaml = None
+
+
+# Klucze zadania, które nie są ustawieniami Config
+JOB_KEYS = {'name', 'source', 'destination', 'schedule', 'workers', 'enabled'}
+
+DAILY_TIME = re.compile(r'^\d{1,2}:\d{2}$')
+
+
+class Job:
+    """
+    Jedno zadanie organizacji
+
+    settings to nadpisania atrybutów Config (nazwy wielkimi literami),
+    stosowane tylko w procesie wykonującym to zadanie.
+    """
+
+    __slots__ = ('name', 'source', 'destination', 'settings', 'schedule', 'workers', 'enabled')
+
+    def __init__(self, name, source, destination, settings=None, schedule=None, workers=None, enabled=True):
+        self.name = name
+        self.source = source
+        self.destination = destination
+        self.settings = settings or {}
+        self.schedule = schedule
+        self.workers = workers or self.settings.get('MAX_WORKERS', Config.MAX_WORKERS)
+        self.enabled = enabled
+
+    @classmethod
+    def from_dict(cls, data, defaults=None):
+        """ Tworzy zadanie z wpisu pliku zadań (z ustawieniami domyslnymi sekcji defaults) """
+        name = data.get('name')
+        if not name:
+            raise ValueError("Zadanie bez nazwy (pole 'name')")
+        for key in ('source', 'destination'):
+            if not data.get(key):
+                raise ValueError(f"Zadanie '{name}': brak pola '{key}'")
+
+        settings = dict(defaults or {})
+        settings.update(_config_settings(name, {key: value for key, value in data.items() if key not in JOB_KEYS}))
+
+        schedule = data.get('schedule')
+        if schedule is not None and not (isinstance(schedule, int) and schedule > 0
+                                         or isinstance(schedule, str) and DAILY_TIME.match(schedule)):
+            raise ValueError(f"Zadanie '{name}': harmonogram to liczba minut lub godzina \"HH:MM\", "
+                             f"otrzymano {schedule!r}")
+
+        return cls(name, data['source'], data['destination'], settings, schedule,
+                   data.get('workers'), data.get('enabled', True))
+
+    def resolved_settings(self):
+        """
+        Ustawienia Config dla procesu zadania
+
+        Proces zadania (spawn) importuje Config od nowa, więc dostaje pełną
+        migawkę ustawień procesu schedulera (z nadpisaniami z wiersza poleceń),
+        a na nią nakładane są ustawienia zadania. Indeks stanu, pamięć skrótów
+        i logi są domyslnie osobne dla każdego zadania - równoległe zadania
+        (i sam scheduler) nie mogą dzielić tych plików.
+        """
+        job_directory = os.path.join(Config.JOBS_STATE_DIRECTORY, self.name)
+        settings = Config.snapshot()
+        settings.update({
+            'STATE_FILE': os.path.join(job_directory, os.path.basename(Config.STATE_FILE)),
+            'HASH_CACHE_FILE': os.path.join(job_directory, os.path.basename(Config.HASH_CACHE_FILE)),
+            'LOG_DIRECTORY': os.path.join(Config.LOG_DIRECTORY, self.name),
+            'METRICS_JOB': self.name,
+        })
+        settings.update(self.settings)
+        settings['MAX_WORKERS'] = self.workers
+        return settings
+
+    def setting(self, attribute):
+        """ Ustawienie Config obowiązujące dla zadania (nadpisanie z pliku zadań lub globalne) """
+        return self.settings.get(attribute, getattr(Config, attribute))
+
+    def describe(self):
+        when = ("na żądanie" if self.schedule is None else
+                f"codziennie o {self.schedule}" if isinstance(self.schedule, str) else
+                f"co {self.schedule} min")
+        return f"{self.name}: {self.source} → {self.destination} ({self.workers} wątków, {when})"
+
+
+def _config_settings(job_name, values):
+    """ Zamienia klucze pliku zadań (dowolna wielkosć liter) na nazwy atrybutów Config """
+    settings = {}
+    for key, value in values.items():
+        attribute = key.upper()
+        if not attribute.isidentifier() or not hasattr(Config, attribute) or callable(getattr(Config, attribute)):
+            raise ValueError(f"Zadanie '{job_name}': nieznane ustawienie '{key}'")
+        settings[attribute] = value
+    return settings
+
+
+def _parse_file(path):
+    """ Wczytuje plik zadań - format wybierany po rozszerzeniu """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    if extension == '.toml':
+        if tomllib is None:
+            raise RuntimeError("Pliki TOML wymagają Pythona 3.11+")
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    if extension in ('.yaml', '.yml'):
+        if yaml is None:
+            raise RuntimeError("Pliki YAML wymagają pakietu PyYAML (pip install pyyaml)")
+        with open(path, encoding='utf-8') as file:
+            return yaml.safe_load(file) or {}
+    raise ValueError(f"Nieobsługiwany format pliku zadań: {path} (.yaml, .toml lub .json)")
+
+
+def load_jobs(path=None, overrides=None):
+    """
+    Wczytuje plik zadań
+
+    Args:
+        path (str): Scieżka do pliku zadań (domyslnie Config.JOBS_FILE)
+        overrides (dict): Ustawienia Config nadrzędne wobec pliku zadań (np. z wiersza poleceń)
+
+    Returns:
+        tuple: (lista włączonych zadań Job, ustawienia wykonawcy: worker_budget,
+                device_max_workers, device_limits)
+    """
+    data = _parse_file(path or Config.JOBS_FILE)
+
+    defaults = _config_settings('defaults', data.get('defaults', {}))
+    jobs = [Job.from_dict(entry, defaults) for entry in data.get('jobs', [])]
+    if overrides:
+        for job in jobs:
+            job.settings.update(overrides)
+            job.workers = overrides.get('MAX_WORKERS', job.workers)
+
+    names = [job.name for job in jobs]
+    duplicated = {name for name in names if names.count(name) > 1}
+    if duplicated:
+        raise ValueError(f"Powtórzone nazwy zadań: {', '.join(sorted(duplicated))}")
+
+    limits = {
+        'worker_budget': data.get('worker_budget', Config.WORKER_BUDGET),
+        'device_max_workers': data.get('device_max_workers', Config.DEVICE_MAX_WORKERS),
+        'device_limits': data.get('device_limits', Config.DEVICE_WORKER_LIMITS),
+    }
+    return [job for job in jobs if job.enabled], limits
+
+
+def _run_job(name, source, destination, settings, metrics_queue=None, throttle_buckets=None):
+    """
+    Wykonuje zadanie w osobnym procesie (własne ustawienia Config)
+
+    Metryki plików zadania wracają do schedulera przez metrics_queue
+    jako migawka rejestru (liczniki, bez danych plików). Limity dławienia
+    I/O liczone są we współdzielonych kubełkach urządzeń (throttle_buckets).
+    """
+    from file_organizer import organize_files
+
+    for attribute, value in settings.items():
+        setattr(Config, attribute, value)
+    use_shared_buckets(throttle_buckets)
+    try:
+        success = organize_files(source, destination)
+    except KeyboardInterrupt:
+        # Punkt kontrolny zapisało organize_files - zadanie wznowi się przy następnym uruchomieniu
+        raise SystemExit(130)
+    if metrics_queue is not None:
+        metrics_queue.put(REGISTRY.snapshot())
+    raise SystemExit(0 if success else 1)
+
+
+class JobRunner:
+    """
+    Wykonawca zadań z globalnym budżetem wątków i limitami na urządzenie
+
+    Każde zadanie działa w osobnym procesie (ustawienia Config są globalne,
+    więc zadania z różnymi kategoriami i filtrami nie mogą dzielić procesu).
+    Zadanie rusza, gdy jego wątki mieszczą się w budżecie globalnym oraz
+    w limicie każdego urządzenia, którego dotyczy (źródło i cel). Zadania,
+    które nie mieszczą się w limitach, czekają w kolejce - mniejsze zadania
+    mogą je wyprzedzić.
+
+    Uruchomienie zadania, które jeszcze trwa, obsługuje polityka
+    SCHEDULE_OVERLAP (zadania lub Config). Zadanie nie rusza też, gdy
+    jego folder źródłowy zablokował inny proces (source_lock.py), a start
+    może być losowo opóźniony o SCHEDULE_JITTER_SECONDS.
+
+    Metody submit i poll wołane są z jednego wątku (pętla schedulera).
+    """
+
+    def __init__(self, worker_budget=None, device_max_workers=None, device_limits=None, logger=None):
+        self.worker_budget = worker_budget or Config.WORKER_BUDGET
+        self.device_max_workers = Config.DEVICE_MAX_WORKERS if device_max_workers is None else device_max_workers
+        limits = Config.DEVICE_WORKER_LIMITS if device_limits is None else device_limits
+        self.device_limits = {device_of(path): limit for path, limit in limits.items()}
+        self.logger = logger
+        self._context = multiprocessing.get_context('spawn')
+        self._metrics = self._context.Queue()
+        self._throttle_buckets = {}   # (urządzenie, rodzaj) -> kubełek dławienia współdzielony przez zadania
+        self.pending = []    # (zadanie, najwczesniejszy start wg time.monotonic)
+        self.running = {}    # nazwa zadania -> (proces, zadanie, wątki, urządzenia, start)
+        self.results = {}    # nazwa zadania -> kod wyjscia ostatniego uruchomienia
+
+    def _device_limit(self, device):
+        return self.device_limits.get(device, self.device_max_workers)
+
+    def _used(self, device=None):
+        return sum(workers for _, _, workers, devices, _ in self.running.values()
+                   if device is None or device in devices)
+
+    def submit(self, job):
+        """
+        Dodaje zadanie do kolejki
+
+        Gdy to zadanie już działa lub czeka, decyduje polityka SCHEDULE_OVERLAP:
+        "skip" - pomija uruchomienie, "queue" - dokłada kolejne uruchomienie
+        po bieżącym, "coalesce" - najwyżej jedno oczekujące uruchomienie
+        (kolejne zlewają się z nim).
+
+        Returns:
+            bool: Czy uruchomienie trafiło do kolejki
+        """
+        policy = job.setting('SCHEDULE_OVERLAP')
+        running = job.name in self.running
+        waiting = any(queued.name == job.name for queued, _ in self.pending)
+        if policy == "skip" and (running or waiting) or policy == "coalesce" and waiting:
+            reason = "czeka już na start" if waiting else "jeszcze trwa"
+            print(f"⏭️  Zadanie {job.name} {reason} - pomijam to uruchomienie ({policy})")
+            if self.logger:
+                self.logger.warning(f"Zadanie {job.name} {reason} - pominięto uruchomienie ({policy})")
+            return False
+        if running or waiting:
+            print(f"⏳ Zadanie {job.name} jeszcze trwa - uruchomienie poczeka na jego koniec ({policy})")
+        jitter = job.setting('SCHEDULE_JITTER_SECONDS')
+        self.pending.append((job, time.monotonic() + (random.uniform(0, jitter) if jitter else 0)))
+        return True
+
+    def _source_busy(self, job):
+        """ Czy folder źródłowy zadania organizuje inny proces (np. ręczne uruchomienie) """
+        if not job.setting('SOURCE_LOCK'):
+            return False
+        holder = SourceLock(job.source, job.setting('LOCK_DIRECTORY')).holder()
+        if holder is None:
+            return False
+        if job.setting('SCHEDULE_OVERLAP') == "skip":
+            self.pending = [(queued, start) for queued, start in self.pending if queued is not job]
+            print(f"⏭️  Folder zadania {job.name} organizuje inny proces (PID {holder}) - pomijam to uruchomienie")
+            if self.logger:
+                self.logger.warning(f"Folder zadania {job.name} zablokowany przez PID {holder} - pominięto uruchomienie")
+        return True
+
+    def _fits(self, workers, devices):
+        if self._used() + workers > self.worker_budget:
+            return False
+        for device in devices:
+            limit = self._device_limit(device)
+            if limit and self._used(device) + workers > limit:
+                return False
+        return True
+
+    def _start(self, job, workers, devices):
+        settings = job.resolved_settings()
+        settings['MAX_WORKERS'] = workers
+        process = self._context.Process(target=_run_job, name=f"job-{job.name}",
+                                        args=(job.name, job.source, job.destination, settings, self._metrics,
+                                              create_shared_buckets(self._context, devices, self._throttle_buckets)))
+        process.start()
+        self.running[job.name] = (process, job, workers, devices, time.monotonic())
+        print(f"▶️  Start zadania {job.name} ({workers} wątków)")
+        if self.logger:
+            self.logger.info(f"Start zadania {job.name}: {job.source} -> {job.destination}, wątki: {workers}")
+
+    def poll(self):
+        """
+        Kończy zakończone zadania i uruchamia oczekujące, które mieszczą się w limitach
+
+        Returns:
+            int: Liczba zadań działających lub oczekujących
+        """
+        # Migawki metryk odbierane przed join - proces kończy się dopiero po wysłaniu danych
+        self._collect_metrics()
+        for name, (process, job, workers, devices, started) in list(self.running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            self._collect_metrics()
+            del self.running[name]
+            self.results[name] = process.exitcode
+            elapsed = time.monotonic() - started
+            record_run(elapsed, process.exitcode == 0, job=name)
+            if process.exitcode == 0:
+                print(f"✅ Zadanie {name} zakończone ({elapsed:.1f} s)")
+                if self.logger:
+                    self.logger.info(f"Zadanie {name} zakończone w {elapsed:.1f} s")
+            else:
+                print(f"❌ Zadanie {name} zakończone błędem (kod {process.exitcode})")
+                if self.logger:
+                    self.logger.error(f"Zadanie {name} zakończone błędem, kod: {process.exitcode}")
+
+        now = time.monotonic()
+        for job, start in list(self.pending):
+            # Kolejne uruchomienie tego samego zadania (queue, coalesce) czeka na koniec poprzedniego
+            if start > now or job.name in self.running or self._source_busy(job):
+                continue
+            # Zadanie większe niż limity dostaje tyle wątków, ile limity pozwalają
+            devices = {device for device in (device_of(job.source), device_of(job.destination))
+                       if device is not None}
+            workers = min([job.workers, self.worker_budget] +
+                          [self._device_limit(device) for device in devices if self._device_limit(device)])
+            if self._fits(workers, devices):
+                self.pending.remove((job, start))
+                self._start(job, workers, devices)
+
+        JOBS_PENDING.set(len(self.pending))
+        JOBS_RUNNING.set(len(self.running))
+        return len(self.running) + len(self.pending)
+
+    def _collect_metrics(self):
+        """ Dolicza metryki zakończonych procesów zadań do rejestru schedulera """
+        while True:
+            try:
+                snapshot = self._metrics.get_nowait()
+            except queue.Empty:
+                return
+            REGISTRY.merge(snapshot)
+
+    def run(self, jobs, interval=0.2):
+        """
+        Wykonuje zadania jednorazowo i czeka na ich zakończenie
+
+        Returns:
+            dict: Nazwa zadania -> czy zakończyło się powodzeniem
+        """
+        for job in jobs:
+            self.submit(job)
+        while self.poll():
+            time.sleep(interval)
+        return {job.name: self.results.get(job.name) == 0 for job in jobs}
+
+    def stop(self, timeout=30):
+        """ Czeka na działające zadania (Ctrl+C dociera też do procesów zadań) i czysci kolejkę """
+        self.pending.clear()
+        for name, (process, job, workers, devices, started) in list(self.running.items()):
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            del self.running[name]
@@ -2,89 +2,494 @@
 """
 System logowania dla Smart File Organizer
 Zapisuje wszystkie operacje do pliku log
+
+Zapis odbywa się w osobnym wątku (kolejka + QueueListener), partiami -
+wątek przetwarzający pliki tylko wrzuca wpis do kolejki i nigdy nie czeka
+na dysk ani na terminal. Formatowanie wpisów też odbywa się w wątku zapisu.
 """
 
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import sys
+import threading
+import time
 from datetime import datetime
+from config import Config
+
+
+BATCH_SIZE = 500       # Maksymalna liczba wpisów zapisywanych przed jednym flush
+
+# Oznaczenie zdarzeń per plik (extra=FILE_EVENT) - tylko je dotyczy tryb cichy i limit konsoli
+FILE_EVENT = {'file_event': True}
+
+_listeners = {}        # nazwa loggera -> BatchQueueListener
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler bez formatowania w wątku wywołującym
+
+    Standardowy QueueHandler formatuje wpis przed włożeniem do kolejki;
+    tutaj wpis trafia do kolejki z argumentami, a tekst składa dopiero
+    wątek zapisu.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener obsługujący wpisy partiami - jeden flush na partię
+
+    Kolejka to queue.SimpleQueue (bez blokad po stronie Pythona), a na
+    zakończenie obsługi zaległych wpisów czeka się przez znacznik (flush()).
+    """
+
+    def _monitor(self):
+        q = self.queue
+        stopping = False
+        while not stopping:
+            batch = [q.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            flushed = []
+            for record in batch:
+                if record is self._sentinel:
+                    stopping = True
+                elif isinstance(record, threading.Event):
+                    flushed.append(record)
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            for event in flushed:
+                event.set()
+
+    def flush(self):
+        """ Czeka, aż wszystkie wpisy włożone wczesniej zostaną zapisane """
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+
+class SegmentRotatingHandler(logging.handlers.BaseRotatingHandler):
+    """
+    Plik logu rotowany po rozmiarze i/lub czasie
+
+    Zamknięty segment dostaje w nazwie znacznik czasu (log.20250624-101500.jsonl),
+    jest kompresowany gzip, a najstarsze segmenty ponad limit są usuwane.
+    Przy zapisie asynchronicznym rotacja i kompresja odbywają się w wątku logów.
+
+    Przy rotacji po czasie pierwsza linia segmentu zapisuje chwilę jego
+    utworzenia - termin rotacji liczony jest od niej, a nie od mtime, który
+    każde dopisanie (krótkie procesy zadań, restart schedulera) przesuwa.
+    """
+
+    HEADER_KEY = 'segment_started'
+
+    def __init__(self, filename, max_bytes=0, interval_seconds=0, retention=0, compress=True, batched=False,
+                 encoding='utf-8'):
+        """
+        Args:
+            filename (str): Scieżka aktywnego segmentu
+            max_bytes (int): Rotacja po przekroczeniu rozmiaru (0 = bez limitu)
+            interval_seconds (float): Rotacja co tyle sekund (0 = bez limitu)
+            retention (int): Ile zamkniętych segmentów zachować (0 = wszystkie)
+            compress (bool): Kompresja gzip zamkniętych segmentów
+            batched (bool): Bez flush po każdym wpisie (flush wykonuje listener po partii)
+        """
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        super().__init__(filename, 'a', encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.retention = retention
+        self.compress = compress
+        self.batched = batched
+
+        self.rollover_at = None
+        if interval_seconds:
+            started = self._segment_started()
+            # Segment bez nagłówka (sprzed rotacji po czasie) - rotacja przy pierwszym wpisie
+            self.rollover_at = started + interval_seconds if started is not None else 0
+
+    def _header(self, started):
+        """ Pierwsza linia segmentu z chwilą utworzenia (w dzienniku JSONL jako obiekt JSON) """
+        stamp = datetime.fromtimestamp(started).isoformat(timespec='seconds')
+        if self.baseFilename.endswith('.jsonl'):
+            return json.dumps({self.HEADER_KEY: stamp})
+        return f"# {self.HEADER_KEY} {stamp}"
+
+    def _segment_started(self):
+        """
+        Chwila utworzenia aktywnego segmentu z jego nagłówka
+
+        Returns:
+            float: Znacznik czasu lub None, gdy segmentu nie ma lub nie ma nagłówka
+                   (brak pliku lub pusty plik - czas ustali nagłówek przy otwarciu)
+        """
+        try:
+            with open(self.baseFilename, encoding=self.encoding, errors='replace') as file:
+                first_line = file.readline(256).strip()
+        except FileNotFoundError:
+            return time.time()
+        if not first_line:
+            return time.time()
+        try:
+            if first_line.startswith('{'):
+                stamp = json.loads(first_line)[self.HEADER_KEY]
+            else:
+                prefix, key, stamp = first_line.split()
+                if prefix != '#' or key != self.HEADER_KEY:
+                    return None
+            return datetime.fromisoformat(stamp).timestamp()
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _open(self):
+        stream = super()._open()
+        if self.interval_seconds and stream.tell() == 0:
+            # Nowy segment - nagłówek z chwilą utworzenia, od niej liczony jest termin rotacji
+            started = time.time()
+            stream.write(self._header(started) + self.terminator)
+            self.rollover_at = started + self.interval_seconds
+        return stream
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if not self.batched:
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def _segment_name(self):
+        """ Nazwa zamkniętego segmentu ze znacznikiem czasu (unikalna) """
+        stem, extension = os.path.splitext(self.baseFilename)
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        suffix = '.gz' if self.compress else ''
+        name = f"{stem}.{timestamp}{extension}{suffix}"
+        counter = 1
+        while os.path.exists(name):
+            name = f"{stem}.{timestamp}-{counter}{extension}{suffix}"
+            counter += 1
+        return name
+
+    def rotate(self, source, dest):
+        if not self.compress:
+            os.replace(source, dest)
+            return
+        with open(source, 'rb') as plain, gzip.open(dest, 'wb') as packed:
+            shutil.copyfileobj(plain, packed, 1024 * 1024)
+        os.remove(source)
+
+    def segments(self):
+        """ Zamknięte segmenty od najstarszego """
+        directory, name = os.path.split(self.baseFilename)
+        stem, extension = os.path.splitext(name)
+        found = [(entry.stat().st_mtime_ns, entry.name) for entry in os.scandir(directory or '.')
+                 if entry.name.startswith(stem + '.') and entry.name != name
+                 and (entry.name.endswith(extension) or entry.name.endswith(extension + '.gz'))]
+        return [os.path.join(directory, segment) for _, segment in sorted(found)]
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        try:
+            if os.path.getsize(self.baseFilename) > 0:
+                self.rotate(self.baseFilename, self._segment_name())
+        except FileNotFoundError:
+            pass
+
+        if self.retention:
+            for segment in self.segments()[:-self.retention]:
+                try:
+                    os.remove(segment)
+                except OSError:
+                    pass
+
+        if self.interval_seconds:
+            # Nagłówek nowego segmentu (przy otwarciu) ustali termin od nowa
+            self.rollover_at = time.time() + self.interval_seconds
+
+
+class JournalFormatter(logging.Formatter):
+    """ Jedna operacja na plik jako obiekt JSON w jednej linii """
+
+    FIELDS = ('operation', 'filename', 'source', 'destination', 'status', 'size', 'duration', 'category')
+
+    def format(self, record):
+        entry = {'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')}
+        entry.update(zip(self.FIELDS, record.journal))
+        if entry['duration'] is not None:
+            entry['duration'] = round(entry['duration'], 6)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class JournalFilter(logging.Filter):
+    """ Do dziennika trafiają tylko operacje na plikach """
+
+    def filter(self, record):
+        return hasattr(record, 'journal')
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ogranicza liczbę zdarzeń per plik w konsoli do per_second na sekundę
+
+    Nadmiarowe linie są pomijane, a ich liczba doklejana do pierwszej
+    linii wyswietlonej w kolejnej sekundzie.
+    """
+
+    def __init__(self, per_second):
+        super().__init__()
+        self.per_second = per_second
+        self.window_start = time.monotonic()
+        self.count = 0
+        self.suppressed = 0
+
+    def filter(self, record):
+        if not getattr(record, 'file_event', False):
+            return True
+
+        now = time.monotonic()
+        if now - self.window_start >= 1:
+            if self.suppressed:
+                record.msg = f"{record.getMessage()}  (+{self.suppressed} linii pominiętych w konsoli)"
+                record.args = None
+            self.window_start = now
+            self.count = 0
+            self.suppressed = 0
+
+        if self.count < self.per_second:
+            self.count += 1
+            return True
+        self.suppressed += 1
+        return False
+
+
+class QuietFilter(logging.Filter):
+    """ Tryb cichy - zdarzenia per plik nie trafiają do konsoli """
+
+    def filter(self, record):
+        return not getattr(record, 'file_event', False)
+
+
+def _console_handler(formatter, rate_limit, quiet):
+    """ Handler konsoli z filtrem trybu cichego lub limitem linii """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(formatter)
+    if quiet:
+        handler.addFilter(QuietFilter())
+    elif rate_limit:
+        handler.addFilter(RateLimitFilter(rate_limit))
+    return handler
+
+
+def _attach(logger, handlers, asynchronous):
+    """ Podpina handlery bezposrednio lub przez kolejkę i wątek zapisu """
+    shutdown_logger(logger)
+    if logger.handlers:
+        logger.handlers.clear()
+
+    if not asynchronous:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return
+
+    log_queue = queue.SimpleQueue()
+    listener = BatchQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[logger.name] = listener
+    logger.addHandler(DeferredQueueHandler(log_queue))
+
 
-def setup_logger(log_dir="../logs"):
+def _rotating_handler(path, batched):
+    """ Segment rotowany zgodnie z Config.LOG_ROTATE_* """
+    return SegmentRotatingHandler(path, int(Config.LOG_ROTATE_MB * 1024 * 1024), Config.LOG_ROTATE_HOURS * 3600,
+                                  Config.LOG_RETENTION, Config.LOG_COMPRESS, batched)
+
+
+def setup_logger(log_dir="../logs", asynchronous=None, console=None, quiet=None, rate_limit=None):
     """
     Konfiguruje system logowania
 
+    Tekstowy log i dziennik JSONL (Config.JOURNAL_ENABLED) to stałe pliki
+    w log_dir rotowane po rozmiarze i czasie - kolejne uruchomienia
+    (np. z harmonogramu) dopisują do nich zamiast tworzyć nowe pliki.
+
     Args:
         log_dir (str): Katalog na pliki log
-        
+        asynchronous (bool): Zapis w osobnym wątku (domyslnie Config.LOG_ASYNC)
+        console (bool): Czy logować także do konsoli (domyslnie Config.LOG_CONSOLE)
+        quiet (bool): Zdarzenia per plik tylko do pliku (domyslnie Config.QUIET)
+        rate_limit (int): Limit zdarzeń per plik w konsoli na sekundę (domyslnie Config.CONSOLE_RATE_LIMIT)
+
     Returns:
         logging.logger: Skonfigurowany logger
     """
+    if asynchronous is None:
+        asynchronous = Config.LOG_ASYNC
+    if console is None:
+        console = Config.LOG_CONSOLE
+    if quiet is None:
+        quiet = Config.QUIET
+    if rate_limit is None:
+        rate_limit = Config.CONSOLE_RATE_LIMIT
+
     # Utwórz katalog logs jeli nie istnieje
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-        
-    # Nazwa pliku log z datą
-    log_filename = f"file_orgnizer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    log_path = os.path.join(log_dir, log_filename)
-    
+
+    log_path = os.path.join(log_dir, Config.LOG_FILENAME)
+
     # Konfiguracja loggera
     logger = logging.getLogger('FileOrganizer')
     logger.setLevel(logging.INFO)
-    
-    # Usuń poprzednie handlery jesli istnieją
-    if logger.handlers:
-        logger.handlers.clear()
-        
-    # Handler do pliku
-    file_handler = logging.FileHandler(log_path, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    
-    #Handler dla konsoli
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
+    logger.propagate = False
+
     # Format logów
     formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', datefmt = '%Y-%m-%d %H:%M:%S')
-    
+
+    # Handler do pliku (przy zapisie asynchronicznym flush raz na partię)
+    file_handler = _rotating_handler(log_path, asynchronous)
+    file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # Dodaj handlery do loggera
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-                                  
-    logger.info(f"Logger skonfigurowany. Plik log: {log_path}")
+    handlers = [file_handler]
+
+    # Dziennik operacji JSONL - dla analiz bez parsowania tekstu
+    if Config.JOURNAL_ENABLED:
+        journal_handler = _rotating_handler(os.path.join(log_dir, Config.JOURNAL_FILENAME), asynchronous)
+        journal_handler.setFormatter(JournalFormatter())
+        journal_handler.addFilter(JournalFilter())
+        handlers.append(journal_handler)
+
+    #Handler dla konsoli
+    if console:
+        console_handler = _console_handler(formatter, rate_limit, quiet)
+        console_handler.setLevel(logging.INFO)
+        handlers.append(console_handler)
+
+    _attach(logger, handlers, asynchronous)
+
+    logger.info("Logger skonfigurowany. Plik log: %s", log_path)
     return logger
 
-def log_file_operation(logger, operation, filename, source, destination, status="SUCCESS"):
+def setup_console(asynchronous=None, quiet=None, rate_limit=None):
+    """
+    Konfiguruje wyjscie konsoli dla linii per plik (zamiast print w pętli)
+
+    Linie wypisuje wątek zapisu, z limitem na sekundę; w trybie cichym
+    są pomijane bez żadnego kosztu po stronie wywołującego.
+
+    Returns:
+        logging.logger: Logger konsoli (console.info(linia, extra=FILE_EVENT))
+    """
+    if asynchronous is None:
+        asynchronous = Config.LOG_ASYNC
+    if quiet is None:
+        quiet = Config.QUIET
+    if rate_limit is None:
+        rate_limit = Config.CONSOLE_RATE_LIMIT
+
+    console = logging.getLogger('FileOrganizer.console')
+    console.setLevel(logging.INFO)
+    console.propagate = False
+    console.disabled = quiet
+
+    _attach(console, [] if quiet else [_console_handler(logging.Formatter('%(message)s'), rate_limit, False)],
+            asynchronous and not quiet)
+    return console
+
+def _report_suppressed(handlers):
+    """ Wyswietla liczbę linii pominiętych przez limit konsoli od ostatniej wyswietlonej """
+    for handler in handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, RateLimitFilter) and log_filter.suppressed:
+                print(f"(+{log_filter.suppressed} linii pominiętych w konsoli)")
+                log_filter.suppressed = 0
+
+def flush_logger(logger):
+    """ Czeka, aż wątek zapisu obsłuży wszystkie wpisy z kolejki loggera """
+    if logger is None:
+        return
+    listener = _listeners.get(logger.name)
+    if listener is not None:
+        listener.flush()
+        _report_suppressed(listener.handlers)
+    else:
+        for handler in logger.handlers:
+            handler.flush()
+        _report_suppressed(logger.handlers)
+
+def shutdown_logger(logger):
+    """ Zapisuje zaległe wpisy i zatrzymuje wątek zapisu loggera """
+    listener = _listeners.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()
+        _report_suppressed(listener.handlers)
+        for handler in listener.handlers:
+            handler.close()
+
+@atexit.register
+def _shutdown_all():
+    for name in list(_listeners):
+        shutdown_logger(logging.getLogger(name))
+
+def log_file_operation(logger, operation, filename, source, destination, status="SUCCESS", size=None,
+                       duration=None, category=None):
     """
     Loguje operacje na pliku
-    
+
+    Tekst wpisu (i obiekt JSON dziennika) składany jest dopiero przy zapisie.
+
     Args:
         logger: logger object
-        operation (str): Typ operacji (MOVE, COPY, SKIP, ERROR)
+        operation (str): Typ operacji (MOVE, COPY, LINK, SKIP, ERROR)
         filename (str): Nazwa pliku
         source (str): Ścieżka źródłowa
         destination (str): Ścieżka docelowa
         status (str): Status operacji
+        size (int): Rozmiar pliku w bajtach (jesli znany)
+        duration (float): Czas obsługi pliku w sekundach
+        category (str): Kategoria docelowa
     """
-    message = f"{operation} | {filename} | {source} → {destination} | {status}"
-    
     if status == "SUCCESS":
-        logger.info(message)
-    elif status == "SKIP":
-        logger.warning(message)
+        level = logging.INFO
+    elif operation == "SKIP":
+        level = logging.WARNING
     else:
-        logger.error(message)
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
+        level = logging.ERROR
+
+    logger.log(level, "%s | %s | %s → %s | %s", operation, filename, source, destination, status,
+               extra={'file_event': True,
+                      'journal': (operation, filename, source, destination, status, size, duration, category)})
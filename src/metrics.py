@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+Metryki Prometheus dla Smart File Organizer
+Liczniki, wskaźniki i histogramy w formacie tekstowym Prometheus - lokalny
+endpoint HTTP /metrics lub plik .prom dla kolektora textfile node_exportera
+(bez dodatkowych pakietów)
+
+Przykładowe alerty:
+
+    # Brak udanego uruchomienia od 2 godzin
+    time() - organizer_last_success_timestamp_seconds > 7200
+    # Zadania czekają w kolejce dłużej niż kwadrans
+    min_over_time(organizer_jobs_pending[15m]) > 0
+"""
+
+import bisect
+import os
+import threading
+import time
+from config import Config
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Przedziały histogramów (sekundy)
+FILE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RUN_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Metryka z etykietami
+
+    Wartosci trzymane są w słowniku krotka etykiet -> wartosć; wszystkie
+    zmiany i odczyty idą przez blokadę rejestru (zapis z wątku wyników,
+    odczyt z wątku serwera HTTP).
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames, lock):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values = {}
+
+    def _key(self, labels):
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as missing:
+            raise ValueError(f"Metryka {self.name}: brak etykiety {missing}") from None
+
+    def samples(self):
+        """ Linie próbek w formacie tekstowym (bez nagłówków HELP/TYPE) """
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        return dict(self._values)
+
+    def merge(self, values, labels):
+        """ Dolicza wartosci z migawki innego procesu (z nadpisanymi etykietami) """
+        for key, value in values.items():
+            key = tuple(labels.get(name, part) for name, part in zip(self.labelnames, key))
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, value=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def merge(self, values, labels):
+        for key, value in values.items():
+            self._values[tuple(labels.get(name, part) for name, part in zip(self.labelnames, key))] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames, lock, buckets):
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Liczności przedziałów (ostatni = +Inf), suma
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def samples(self):
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} "
+                             f"{cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def snapshot(self):
+        return {key: [list(counts), total] for key, (counts, total) in self._values.items()}
+
+    def merge(self, values, labels):
+        for key, (counts, total) in values.items():
+            key = tuple(labels.get(name, part) for name, part in zip(self.labelnames, key))
+            current = self._values.get(key)
+            if current is None:
+                current = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+
+
+class Registry:
+    """ Zbiór metryk procesu - tekst dla Prometheusa i migawki do przekazania między procesami """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames, self._lock))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames, self._lock))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=FILE_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, self._lock, buckets))
+
+    def render(self):
+        """ Wszystkie metryki w formacie tekstowym Prometheus """
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                if not metric._values:
+                    continue
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """ Wartosci wszystkich metryk (do przesłania z procesu zadania do schedulera) """
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in self._metrics.items() if metric._values}
+
+    def merge(self, snapshot, **labels):
+        """ Dolicza migawkę innego procesu, np. z etykietą job nazwy zadania """
+        with self._lock:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(values, labels)
+
+
+REGISTRY = Registry()
+
+FILES = REGISTRY.counter(
+    "organizer_files_total", "Pliki obsłużone wg wyniku (MOVE, COPY, LINK, SKIP, ERROR, UNCHANGED)",
+    ("job", "outcome"))
+BYTES = REGISTRY.counter(
+    "organizer_bytes_total", "Bajty przeniesione lub skopiowane", ("job", "operation"))
+FILE_SECONDS = REGISTRY.histogram(
+    "organizer_file_duration_seconds", "Czas obsługi jednego pliku", ("job",))
+SCAN_SECONDS = REGISTRY.histogram(
+    "organizer_scan_duration_seconds", "Czas listowania folderu źródłowego w jednym uruchomieniu",
+    ("job",), RUN_BUCKETS)
+RUN_SECONDS = REGISTRY.histogram(
+    "organizer_run_duration_seconds", "Czas całego uruchomienia", ("job",), RUN_BUCKETS)
+RUNS = REGISTRY.counter(
+    "organizer_runs_total", "Zakończone uruchomienia wg wyniku (success, failure)", ("job", "status"))
+LAST_RUN = REGISTRY.gauge(
+    "organizer_last_run_timestamp_seconds", "Czas zakończenia ostatniego uruchomienia (unix)", ("job",))
+LAST_SUCCESS = REGISTRY.gauge(
+    "organizer_last_success_timestamp_seconds", "Czas zakończenia ostatniego udanego uruchomienia (unix)",
+    ("job",))
+JOBS_PENDING = REGISTRY.gauge(
+    "organizer_jobs_pending", "Zadania czekające w kolejce na wolne wątki")
+JOBS_RUNNING = REGISTRY.gauge(
+    "organizer_jobs_running", "Zadania w trakcie wykonania")
+WATCH_PENDING = REGISTRY.gauge(
+    "organizer_watch_pending_files", "Pliki w kolejce trybu obserwacji (czekające na ustabilizowanie lub partię)")
+
+
+def job_label():
+    """ Etykieta job bieżącego procesu (nazwa zadania lub Config.METRICS_JOB) """
+    return Config.METRICS_JOB
+
+
+def record_result(result, job=None):
+    """ Zlicza wynik obsługi jednego pliku (FileResult) """
+    job = job or job_label()
+    FILES.inc(job=job, outcome=result.operation)
+    if result.operation in ("MOVE", "COPY", "LINK") and result.file_info is not None:
+        BYTES.inc(result.file_info.st_size, job=job, operation=result.operation)
+    if result.duration is not None and result.operation != "UNCHANGED":
+        FILE_SECONDS.observe(result.duration, job=job)
+
+
+def record_run(seconds, success, job=None):
+    """ Zlicza zakończone uruchomienie (organizacja, zadanie) """
+    job = job or job_label()
+    RUN_SECONDS.observe(seconds, job=job)
+    RUNS.inc(job=job, status="success" if success else "failure")
+    now = time.time()
+    LAST_RUN.set(now, job=job)
+    if success:
+        LAST_SUCCESS.set(now, job=job)
+
+
+def timed_scan(entries, job=None):
+    """ Przepuszcza wpisy ze skanowania, mierząc czas spędzony w listowaniu (bez obsługi plików) """
+    elapsed = 0.0
+    iterator = iter(entries)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                entry = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield entry
+    finally:
+        SCAN_SECONDS.observe(elapsed, job=job or job_label())
+
+
+def _handler_class(registry):
+    """ Obsługa żądań /metrics (http.server importowany dopiero przy starcie endpointu) """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Bez wpisu na konsoli przy każdym odpytaniu
+
+    return MetricsHandler
+
+
+def start_http_server(port=None, address=None):
+    """
+    Uruchamia endpoint /metrics w wątku w tle
+
+    Returns:
+        ThreadingHTTPServer: Serwer (zatrzymanie: shutdown())
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((address or Config.METRICS_ADDRESS, port or Config.METRICS_PORT),
+                                 _handler_class(REGISTRY))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def write_textfile(path=None, registry=REGISTRY):
+    """ Zapisuje metryki do pliku .prom atomowo (kolektor nie odczyta połowy pliku) """
+    path = path or Config.METRICS_TEXTFILE
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(registry.render())
+    os.replace(temp_path, path)
+
+
+class TextfileExporter:
+    """ Zapis pliku .prom co Config.METRICS_TEXTFILE_SECONDS w wątku w tle (i przy zatrzymaniu) """
+
+    def __init__(self, path=None, interval=None):
+        self.path = path or Config.METRICS_TEXTFILE
+        self.interval = interval or Config.METRICS_TEXTFILE_SECONDS
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-textfile', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            write_textfile(self.path)
+        except OSError:
+            pass  # Np. chwilowo niedostępny dysk - kolejna próba za interval sekund
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._write()
+
+
+def start_exporters():
+    """
+    Uruchamia eksport metryk włączony w konfiguracji (METRICS_PORT, METRICS_TEXTFILE)
+
+    Returns:
+        list: Uruchomione eksportery (do przekazania stop_exporters)
+    """
+    exporters = []
+    if Config.METRICS_PORT:
+        exporters.append(start_http_server())
+        print(f"📈 Metryki: http://{Config.METRICS_ADDRESS}:{Config.METRICS_PORT}/metrics")
+    if Config.METRICS_TEXTFILE:
+        exporters.append(TextfileExporter())
+        print(f"📈 Metryki zapisywane do: {Config.METRICS_TEXTFILE}")
+    return exporters
+
+
+def stop_exporters(exporters):
+    for exporter in exporters:
+        if isinstance(exporter, TextfileExporter):
+            exporter.stop()
+        else:
+            exporter.shutdown()
+            exporter.server_close()
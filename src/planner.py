@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+Plan operacji dla Smart File Organizer
+Faza planowania (tylko metadane, bez zmian na dysku) i faza wykonania planu.
+Plan zapisywany jest jako JSONL - jedna operacja w linii, więc można go
+porównywać (diff), zapisać i wykonać później
+"""
+
+import datetime
+import json
+import os
+import time
+from config import Config
+from executor import FileResult, FolderCache
+from scanner import file_stat
+from dates import date_folder, file_date
+
+
+PLAN_VERSION = 1
+
+# Akcje planu
+MOVE = "MOVE"              # Przeniesienie lub kopia (zależnie od Config.MOVE_FILES)
+COPY = "COPY"
+LINK = "LINK"              # Duplikat jako twardy link do oryginału
+SKIP = "SKIP"
+UNCHANGED = "UNCHANGED"    # Plik obsłużony w poprzednim uruchomieniu (tryb przyrostowy)
+ERROR = "ERROR"
+
+TRANSFER_ACTIONS = (MOVE, COPY, LINK)
+
+
+class PlanEntry:
+    """ Jedna zaplanowana operacja: źródło, cel, akcja i powód """
+
+    __slots__ = ('action', 'source', 'destination', 'category', 'reason', 'size', 'mtime_ns',
+                 'original', 'file_info')
+
+    def __init__(self, action, source, destination=None, category=None, reason=None, size=None,
+                 mtime_ns=None, original=None, file_info=None):
+        self.action = action
+        self.source = source
+        self.destination = destination    # Pełna scieżka docelowa (None gdy plik zostaje)
+        self.category = category
+        self.reason = reason              # Powód pominięcia, NEW, DUPLICATE, RENAMED lub OVERWRITE
+        self.size = size                  # Rozmiar i mtime z chwili planowania -
+        self.mtime_ns = mtime_ns          # przy wykonaniu wykrywają zmiany pliku
+        self.original = original          # Oryginał duplikatu (LINK, SKIP DUPLICATE)
+        self.file_info = file_info        # os.stat_result (tylko w pamięci, nie zapisywany)
+
+    @property
+    def filename(self):
+        return os.path.basename(self.source)
+
+    def to_dict(self):
+        """ Zwarta postać do zapisu - bez pustych pól """
+        data = {'action': self.action, 'source': self.source}
+        for key in ('destination', 'category', 'reason', 'size', 'mtime_ns', 'original'):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['action'], data['source'], data.get('destination'), data.get('category'),
+                   data.get('reason'), data.get('size'), data.get('mtime_ns'), data.get('original'))
+
+    def describe(self):
+        """ Linia do wyswietlenia w konsoli (podgląd planu) """
+        filename = self.filename
+        if self.action in TRANSFER_ACTIONS:
+            name = os.path.basename(self.destination)
+            shown = f"{self.category}/" if name == filename else f"{self.category}/{name} ({self.reason})"
+            return f"📝 {self.action}: {filename} → {shown}"
+        if self.action == SKIP:
+            return f"📝 SKIP ({self.reason}): {filename}"
+        return f"📝 {self.action}: {filename} ({self.reason})"
+
+
+def plan_file(entry, classifier, destination_folder, scan_stats, destination_locks, move=True,
+              scan_state=None, duplicates=None, rules=None, sniffer=None):
+    """
+    Planuje operację dla jednego pliku - bez żadnych zmian na dysku
+
+    Wykorzystuje tylko metadane (stat pliku, istnienie scieżki docelowej).
+    Zawartosć plików czytana jest jedynie przy wykrywaniu duplikatów
+    (Config.DEDUP_POLICY), a skróty trafiają do trwałej pamięci skrótów.
+    Nazwa docelowa jest rezerwowana w destination_locks, więc kolizje
+    między plikami tego samego planu wykrywane są juz na etapie planowania.
+
+    Args:
+        entry (os.DirEntry): Plik ze skanowania folderu źródłowego
+        classifier (FileClassifier): Skompilowany klasyfikator
+        destination_folder (str): Folder docelowy
+        scan_stats (ScanStats): Liczniki wywołań systemowych
+        destination_locks (DestinationLocks): Rezerwacje nazw w folderach docelowych
+        move (bool): Przenoszenie (True) lub kopiowanie (False)
+        scan_state (ScanState): Indeks stanu (tylko w trybie przyrostowym)
+        duplicates (DuplicateIndex): Indeks duplikatów (gdy Config.DEDUP_POLICY jest ustawione)
+        rules (RuleEngine): Reguły (gdy Config.RULES jest ustawione) - pierwsza pasująca
+                            reguła wyznacza folder docelowy zamiast kategorii
+        sniffer (ContentSniffer): Rozpoznawanie typu po zawartosci (gdy Config.SNIFF_CONTENT)
+
+    Returns:
+        PlanEntry: Zaplanowana operacja
+    """
+    source_path = entry.path
+
+    try:
+        file_info = None
+
+        # W trybie przyrostowym pomiń pliki juz obsłużone i niezmienione
+        if scan_state is not None:
+            file_info = file_stat(entry, scan_stats)
+            if scan_state.is_unchanged(source_path, file_info):
+                return PlanEntry(UNCHANGED, source_path, reason="UNCHANGED", file_info=file_info)
+
+        # Okresl rozszerzenie i kategorię (None = plik wykluczony)
+        file_extension, category = classifier.classify(entry.name)
+
+        if category is None:
+            return PlanEntry(SKIP, source_path, reason="EXCLUDED", file_info=file_info)
+
+        # Jeden stat na plik - wynik używany przez wszystkie dalsze kroki
+        if file_info is None:
+            file_info = file_stat(entry, scan_stats)
+        size, mtime_ns = file_info.st_size, file_info.st_mtime_ns
+
+        if not Config.is_size_valid(size):
+            return PlanEntry(SKIP, source_path, reason="SIZE_LIMIT", size=size, mtime_ns=mtime_ns,
+                             file_info=file_info)
+
+        # Typ po zawartosci: pliki bez rozszerzenia, a w trybie "all" także pliki,
+        # których zawartosć wskazuje inną kategorię niż rozszerzenie
+        if sniffer is not None and (not file_extension or Config.SNIFF_CONTENT == "all"):
+            sniffed, generic = sniffer.sniff(source_path, file_info, scan_stats)
+            if sniffed and (not file_extension or not generic):
+                sniffed_category = classifier.category_for(sniffed)
+                if not file_extension or sniffed_category != category:
+                    file_extension, category = sniffed, sniffed_category
+
+        # Reguły mają pierwszenstwo przed kategorią z rozszerzenia (także dla plików bez rozszerzenia)
+        rule = rules.match(entry.name, source_path, file_info) if rules is not None else None
+        if rule is not None:
+            if rule.skip:
+                return PlanEntry(SKIP, source_path, reason="RULE", size=size, mtime_ns=mtime_ns,
+                                 file_info=file_info)
+            date = file_date(source_path, file_extension, file_info) if rule.uses_date else None
+            category = rule.render(entry.name, file_extension, category, date)
+        elif not file_extension:
+            return PlanEntry(SKIP, source_path, reason="NO_EXTENSION", size=size, mtime_ns=mtime_ns,
+                             file_info=file_info)
+
+        action = MOVE if move else COPY
+        reason = "NEW"
+
+        # Sprawdzanie duplikatów po zawartosci (nie tylko po nazwie)
+        original = None
+        if duplicates is not None:
+            original = duplicates.find_duplicate(source_path, file_info)
+            if original is not None:
+                reason = "DUPLICATE"
+                if Config.DEDUP_POLICY == "skip":
+                    return PlanEntry(SKIP, source_path, reason=reason, size=size, mtime_ns=mtime_ns,
+                                     original=original, file_info=file_info)
+                if Config.DEDUP_POLICY == "move":
+                    category = Config.DUPLICATES_CATEGORY
+                elif Config.DEDUP_POLICY == "hardlink":
+                    action = LINK
+
+        category_folder = os.path.join(destination_folder, category)
+        if Config.CREATE_DATE_FOLDERS and rule is None:
+            # Np. Images/2025/06 - folder tworzony przy pierwszym pliku (FolderCache)
+            date = file_date(source_path, file_extension, file_info)
+            category_folder = os.path.join(category_folder, date_folder(date))
+        destination_path = os.path.join(category_folder, entry.name)
+
+        # Zarezerwuj nazwę docelową - przy kolizji zgodnie z Config.collision_policy()
+        name, collision = reserve_destination(category_folder, entry.name, source_path, file_info,
+                                              destination_locks)
+        if name is None:
+            if duplicates is not None and original is None:
+                duplicates.remove(source_path, size)
+            return PlanEntry(SKIP, source_path, destination_path, category, "FILE_EXISTS", size, mtime_ns,
+                             file_info=file_info)
+        if collision is not None:
+            destination_path = os.path.join(category_folder, name)
+            if reason == "NEW":
+                reason = collision
+
+        return PlanEntry(action, source_path, destination_path, category, reason, size, mtime_ns,
+                         original, file_info)
+
+    except Exception as e:
+        return PlanEntry(ERROR, source_path, reason=str(e))
+
+
+def reserve_destination(category_folder, name, source_path, file_info, destination_locks, policy=None):
+    """
+    Rezerwuje nazwę docelową, przy kolizji stosując politykę nazw
+
+    Polityki (Config.collision_policy()):
+        skip            - plik zostaje w źródle (FILE_EXISTS)
+        number          - "nazwa (2).roz", "nazwa (3).roz", ...
+        timestamp       - "nazwa_20250624-153000.roz" (mtime pliku, przy kolejnej kolizji z numerem)
+        hash            - "nazwa_<skrót zawartosci>.roz"; ta sama nazwa oznacza tę samą
+                          zawartosć, więc taki plik jest pomijany
+        overwrite_newer - nadpisanie, gdy plik źródłowy jest nowszy od docelowego
+
+    Returns:
+        tuple: (zarezerwowana nazwa lub None gdy plik należy pominąć,
+                None gdy nie było kolizji, inaczej RENAMED lub OVERWRITE)
+    """
+    if destination_locks.reserve(category_folder, name):
+        return name, None
+
+    policy = policy or Config.collision_policy()
+    stem, extension = os.path.splitext(name)
+    if policy == "number":
+        return destination_locks.reserve_numbered(category_folder, name), "RENAMED"
+    if policy == "timestamp":
+        stamp = datetime.datetime.fromtimestamp(file_info.st_mtime).strftime('%Y%m%d-%H%M%S')
+        return destination_locks.reserve_numbered(category_folder, f"{stem}_{stamp}{extension}"), "RENAMED"
+    if policy == "hash":
+        from dedup import full_hash  # Moduł duplikatów (sqlite3) tylko dla tej polityki
+
+        hashed = f"{stem}_{full_hash(source_path)[:12]}{extension}"
+        if destination_locks.reserve(category_folder, hashed):
+            return hashed, "RENAMED"
+        return None, None
+    if policy == "overwrite_newer":
+        try:
+            existing = os.stat(os.path.join(category_folder, name))
+        except FileNotFoundError:
+            existing = None   # Nazwa zarezerwowana w tym uruchomieniu, jeszcze bez pliku
+        if existing is not None and file_info.st_mtime_ns > existing.st_mtime_ns \
+                and destination_locks.reserve_existing(category_folder, name):
+            return name, "OVERWRITE"
+    return None, None
+
+
+def verify_entry(plan_entry, destination_locks, folders):
+    """
+    Sprawdza, czy zapisany plan nadal pasuje do stanu dysku
+
+    Używana przy wykonywaniu planu z pliku: plik źródłowy musi mieć ten sam
+    rozmiar i mtime co przy planowaniu, a nazwa docelowa musi być wolna.
+
+    Returns:
+        str: Powód pominięcia lub None, gdy operację można wykonać
+    """
+    try:
+        file_info = os.stat(plan_entry.source)
+    except FileNotFoundError:
+        return "SOURCE_MISSING"
+    if file_info.st_size != plan_entry.size or file_info.st_mtime_ns != plan_entry.mtime_ns:
+        return "CHANGED_SINCE_PLAN"
+    plan_entry.file_info = file_info
+
+    category_folder, name = os.path.split(plan_entry.destination)
+    folders.ensure(category_folder)
+    if plan_entry.reason == "OVERWRITE":
+        # Nadpisanie tylko wciąż starszego pliku docelowego
+        try:
+            existing = os.stat(plan_entry.destination)
+        except FileNotFoundError:
+            existing = None
+        if existing is not None and existing.st_mtime_ns >= file_info.st_mtime_ns:
+            return "FILE_EXISTS"
+        reserved = destination_locks.reserve_existing(category_folder, name)
+    else:
+        reserved = destination_locks.reserve(category_folder, name)
+    if not reserved:
+        return "FILE_EXISTS"
+    return None
+
+
+def apply_entry(plan_entry, destination_locks, transfer, duplicates=None, folders=None, started=None,
+                journal=None, verify=False):
+    """
+    Wykonuje jedną zaplanowaną operację
+
+    Args:
+        plan_entry (PlanEntry): Operacja z plan_file lub wczytana z pliku planu
+        destination_locks (DestinationLocks): Rezerwacje nazw (te same co przy planowaniu)
+        transfer (FileTransfer): Przenoszenie/kopiowanie z wyborem najszybszej metody
+        duplicates (DuplicateIndex): Indeks duplikatów użyty przy planowaniu
+        folders (FolderCache): Utworzone foldery docelowe (wspólne dla uruchomienia)
+        started (float): Chwila rozpoczęcia obsługi pliku (time.perf_counter) -
+                         domyslnie początek wykonania operacji
+        journal (UndoJournal): Dziennik cofania - zamiar zapisywany przed operacją
+        verify (bool): Przy wykonywaniu zapisanego planu - plan jest najpierw
+                       sprawdzany (verify_entry)
+
+    Returns:
+        FileResult: Wynik operacji (z kategorią i czasem trwania do dziennika)
+    """
+    if started is None:
+        started = time.perf_counter()
+    if folders is None:
+        folders = FolderCache()
+    result = _apply_entry(plan_entry, destination_locks, transfer, duplicates, folders, journal, verify)
+    result.category = plan_entry.category
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def _apply_entry(plan_entry, destination_locks, transfer, duplicates, folders, journal, verify):
+    filename = plan_entry.filename
+    source_path = plan_entry.source
+    destination_path = plan_entry.destination
+    category = plan_entry.category
+    file_info = plan_entry.file_info
+
+    if plan_entry.action == UNCHANGED:
+        return FileResult("UNCHANGED", filename, source_path, "N/A", "UNCHANGED", None, file_info)
+    if plan_entry.action == ERROR:
+        return FileResult("ERROR", filename, source_path, "N/A", plan_entry.reason,
+                          f"❌ Błąd przy przenoszeniu {filename}: {plan_entry.reason}")
+    if plan_entry.action == SKIP:
+        return skip_result(plan_entry, plan_entry.reason)
+
+    try:
+        category_folder, destination_name = os.path.split(destination_path)
+        # Nazwa zmieniona przy kolizji jest widoczna w komunikacie
+        shown = f"{category}/" if destination_name == filename else f"{category}/{destination_name}"
+        if verify:
+            reason = verify_entry(plan_entry, destination_locks, folders)
+            if reason is not None:
+                return skip_result(plan_entry, reason)
+            file_info = plan_entry.file_info
+        else:
+            # Foldery z datami i z reguł powstają przy pierwszym użyciu (raz na uruchomienie)
+            folders.ensure(category_folder)
+        original = plan_entry.original
+        registered = duplicates is not None and original is None
+
+        try:
+            # Zamiar trafia do dziennika cofania przed jakąkolwiek zmianą na dysku
+            operation = LINK if plan_entry.action == LINK else transfer.operation
+            sequence = journal.begin(operation, source_path, destination_path, file_info) if journal else None
+
+            # Duplikat jako twardy link do oryginału (gdy to możliwe)
+            if plan_entry.action == LINK:
+                from dedup import link_duplicate  # Akcja LINK występuje tylko przy polityce duplikatów
+
+                if link_duplicate(original, source_path, destination_path, remove_source=transfer.move):
+                    if journal:
+                        journal.commit(sequence)
+                    return FileResult("LINK", filename, source_path, destination_path, "SUCCESS",
+                                      f"🔗 Duplikat podlinkowany: {filename} → {shown} (= {original})",
+                                      file_info)
+
+            # Przenies plik (zmiana nazwy na tym samym dysku, kopia między dyskami)
+            transfer.transfer(source_path, destination_path, file_info)
+            if journal:
+                journal.commit(sequence, transfer.operation if operation == LINK else None)
+        except Exception:
+            destination_locks.release(category_folder, destination_name)
+            if registered:
+                duplicates.remove(source_path, file_info.st_size)
+            raise
+
+        if registered:
+            duplicates.relocate(source_path, destination_path, file_info.st_size)
+
+        if not transfer.move:
+            return FileResult("COPY", filename, source_path, destination_path, "SUCCESS",
+                              f"📋 Skopiowano: {filename} → {shown}", file_info)
+        return FileResult("MOVE", filename, source_path, destination_path, "SUCCESS",
+                          f"✅ Przeniesiono: {filename} → {shown}", file_info)
+
+    except Exception as e:
+        return FileResult("ERROR", filename, source_path, "N/A", str(e),
+                          f"❌ Błąd przy przenoszeniu {filename}: {str(e)}")
+
+
+SKIP_MESSAGES = {
+    "EXCLUDED": "🚫  Wykluczono plik: {filename}",
+    "SIZE_LIMIT": "📏 Plik poza limitami rozmiaru: {filename}",
+    "NO_EXTENSION": "⚠️  Pominięto plik bez rozszerzenia: {filename}",
+    "RULE": "🧩 Pominięto zgodnie z regułą: {filename}",
+    "DUPLICATE": "♊ Duplikat pominięty: {filename} = {original}",
+    "FILE_EXISTS": "⚠️  Plik już istnieje: {filename} → {category}/",
+    "SOURCE_MISSING": "⚠️  Plik źródłowy juz nie istnieje: {filename}",
+    "CHANGED_SINCE_PLAN": "⚠️  Plik zmienił się od zaplanowania: {filename}",
+}
+
+
+def skip_result(plan_entry, reason):
+    """ FileResult dla pominiętego pliku """
+    message = SKIP_MESSAGES.get(reason, "⚠️  Pominięto plik: {filename}").format(
+        filename=plan_entry.filename, category=plan_entry.category, original=plan_entry.original)
+    destination = plan_entry.destination or plan_entry.original or "N/A"
+    return FileResult("SKIP", plan_entry.filename, plan_entry.source, destination, reason, message,
+                      plan_entry.file_info)
+
+
+class PlanWriter:
+    """
+    Zapisuje plan strumieniowo do pliku JSONL
+
+    Pierwsza linia to nagłówek (foldery, tryb, czas utworzenia),
+    kolejne - po jednej operacji. Pliki UNCHANGED nie są zapisywane.
+    """
+
+    def __init__(self, path, source_folder, destination_folder, move=True):
+        plan_dir = os.path.dirname(path)
+        if plan_dir and not os.path.exists(plan_dir):
+            os.makedirs(plan_dir)
+
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.written = 0
+        header = {
+            'plan': PLAN_VERSION,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'source': os.path.abspath(source_folder),
+            'destination': os.path.abspath(destination_folder),
+            'move': move,
+        }
+        self.file.write(json.dumps(header, ensure_ascii=False) + '\n')
+
+    def write(self, plan_entry):
+        if plan_entry.action == UNCHANGED:
+            return
+        self.file.write(json.dumps(plan_entry.to_dict(), ensure_ascii=False) + '\n')
+        self.written += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_plan(path):
+    """
+    Otwiera zapisany plan
+
+    Returns:
+        tuple: (nagłówek jako dict, generator PlanEntry czytający plik leniwie)
+    """
+    with open(path, encoding='utf-8') as file:
+        header = json.loads(file.readline())
+    if header.get('plan') != PLAN_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja planu: {header.get('plan')}")
+
+    def entries():
+        with open(path, encoding='utf-8') as file:
+            file.readline()
+            for line in file:
+                if line.strip():
+                    yield PlanEntry.from_dict(json.loads(line))
+
+    return header, entries()
+
+
+def diff_plans(old_path, new_path):
+    """
+    Porównuje dwa plany po scieżce źródłowej
+
+    Returns:
+        dict: Listy 'added', 'removed' (scieżki źródłowe) i 'changed'
+              (pary słowników operacji: stara, nowa)
+    """
+    _, old_entries = read_plan(old_path)
+    _, new_entries = read_plan(new_path)
+
+    old = {entry.source: entry.to_dict() for entry in old_entries}
+    added, changed = [], []
+    for entry in new_entries:
+        current = entry.to_dict()
+        previous = old.pop(entry.source, None)
+        if previous is None:
+            added.append(entry.source)
+        elif (previous['action'], previous.get('destination'), previous.get('reason')) != \
+                (current['action'], current.get('destination'), current.get('reason')):
+            changed.append((previous, current))
+
+    return {'added': sorted(added), 'removed': sorted(old), 'changed': changed}
+
+
+def print_diff(diff):
+    """ Wyswietla wynik diff_plans """
+    for source in diff['added']:
+        print(f"+ {source}")
+    for source in diff['removed']:
+        print(f"- {source}")
+    for previous, current in diff['changed']:
+        print(f"~ {current['source']}: {previous['action']} ({previous.get('reason')}) → "
+              f"{current['action']} ({current.get('reason')})")
+    print(f"📝 Dodane: {len(diff['added'])}, usunięte: {len(diff['removed'])}, "
+          f"zmienione: {len(diff['changed'])}")
+
+
@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+Reguły organizacji dla Smart File Organizer
+Predykaty na nazwie (glob, regex, rozszerzenia), rozmiarze, wieku, włascicielu
+i głębokosci w drzewie, kompilowane raz na uruchomienie
+
+Przykład (Config.RULES):
+
+    RULES = [
+        {'name': 'faktury', 'glob': 'faktura_*.pdf', 'destination': 'Finanse/{year}/{month}'},
+        {'regex': r'^IMG_\\d{4}', 'min_size_mb': 1, 'destination': 'Zdjęcia/{year}'},
+        {'extensions': ['.iso', '.img'], 'min_age_days': 90, 'destination': 'Stare/{category}'},
+        {'glob': '~$*', 'skip': True},
+    ]
+
+Wygrywa pierwsza pasująca reguła (kolejnosć jak w konfiguracji). Plik bez
+pasującej reguły trafia do kategorii według rozszerzenia, jak dotychczas.
+"""
+
+import fnmatch
+import functools
+import heapq
+import os
+import re
+import time
+from operator import attrgetter
+from config import Config
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+try:
+    from re import _parser as regex_parser  # Python 3.11+
+except ImportError:
+    import sre_parse as regex_parser
+
+
+# Dopuszczalne klucze reguły
+RULE_KEYS = {'name', 'glob', 'regex', 'extensions', 'min_size_mb', 'max_size_mb', 'min_age_days',
+             'max_age_days', 'age_from', 'owner', 'min_depth', 'max_depth', 'destination', 'skip'}
+
+DAY = 86400
+MB = 1024 * 1024
+
+# Kolejnosć sprawdzania predykatów reguły: najpierw najtańsze i najczęsciej odrzucające
+# (głębokosć i rozmiar to porównania liczb, własciciel wymaga odczytu bazy użytkowników)
+PREDICATE_ORDER = ('depth', 'size', 'age', 'glob', 'regex', 'owner')
+
+INDEX = attrgetter('index')
+
+
+@functools.lru_cache(maxsize=1024)
+def owner_name(uid):
+    """ Nazwa użytkownika dla uid (z pamięcią podręczną) """
+    if pwd is None:
+        return None
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return None
+
+
+def _name_predicate(compiled, anchored):
+    """ Predykat nazwy: match dla wzorców zakotwiczonych (globy, regex od ^), search dla pozostałych """
+    test = compiled.match if anchored else compiled.search
+    return lambda name, info, depth: test(name) is not None
+
+
+def _anchored_regex(compiled):
+    """
+    Czy każde dopasowanie regexu zaczyna się na początku nazwy
+
+    Tylko gdy cały wzorzec zaczyna się od ^ lub \\A - w '^a|b' gałąź 'b'
+    alternatywy najwyższego poziomu może pasować w dowolnym miejscu nazwy.
+    """
+    if compiled.flags & re.MULTILINE:
+        return False
+    parsed = regex_parser.parse(compiled.pattern, compiled.flags)
+    if not len(parsed):
+        return False
+    operation, value = parsed[0]
+    return operation == regex_parser.AT and value in (regex_parser.AT_BEGINNING, regex_parser.AT_BEGINNING_STRING)
+
+
+class Rule:
+    """ Skompilowana reguła: predykaty (w kolejnosci sprawdzania) i szablon celu """
+
+    __slots__ = ('index', 'name', 'extensions', 'pattern', 'anchored', 'predicates', 'destination', 'skip',
+                 'uses_date')
+
+    def __init__(self, index, spec, now):
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"Reguła {index + 1}: nieznane klucze: {', '.join(sorted(unknown))}")
+        if not spec.get('skip') and not spec.get('destination'):
+            raise ValueError(f"Reguła {index + 1}: wymagane 'destination' lub 'skip'")
+
+        self.index = index
+        self.name = spec.get('name') or f"reguła {index + 1}"
+        self.destination = spec.get('destination')
+        self.skip = bool(spec.get('skip'))
+        # Data pliku (mtime lub z EXIF - wtedy czytany jest nagłówek pliku) tylko gdy szablon jej używa
+        self.uses_date = bool(self.destination) and any(field in self.destination
+                                                        for field in ('{year', '{month', '{day'))
+        self.extensions = [extension.lower() for extension in spec.get('extensions', [])]
+
+        # Glob musi pasować do całej nazwy (bez rozróżniania wielkosci liter, jak rozszerzenia),
+        # regex działa jak re.search. Drugi element pary: czy wzorzec sprawdzać przez match()
+        patterns = {}
+        if spec.get('glob'):
+            # '*.x' = nazwa kończy się na '.x' - wzorzec bez wiodącej gwiazdki dla search()
+            # (.*  na początku gałęzi wyłączałoby szybkie odrzucanie po pierwszym znaku)
+            glob = spec['glob']
+            floating = glob.startswith('*') and glob.strip('*')
+            pattern = fnmatch.translate(glob.lstrip('*') if floating else glob)
+            patterns['glob'] = (re.compile(pattern, re.IGNORECASE), not floating)
+        if spec.get('regex'):
+            # Regex zakotwiczony w całosci (^ lub \A) działa jak match() - może trafić do alternatywy zakotwiczonej
+            compiled = re.compile(spec['regex'])
+            patterns['regex'] = (compiled, _anchored_regex(compiled))
+
+        # Wzorzec indeksowany (łączony we wspólną alternatywę) - tylko dla reguł bez rozszerzeń,
+        # drugi wzorzec reguły sprawdzany jest jako zwykły predykat
+        self.pattern, self.anchored = None, False
+        if patterns and not self.extensions:
+            self.pattern, self.anchored = patterns.pop('glob' if 'glob' in patterns else 'regex')
+
+        checks = {}
+        for kind, (compiled, anchored) in patterns.items():
+            checks[kind] = _name_predicate(compiled, anchored)
+
+        min_depth, max_depth = spec.get('min_depth'), spec.get('max_depth')
+        if min_depth is not None or max_depth is not None:
+            low, high = min_depth or 0, max_depth if max_depth is not None else float('inf')
+            checks['depth'] = lambda name, info, depth: low <= depth <= high
+
+        min_size, max_size = spec.get('min_size_mb'), spec.get('max_size_mb')
+        if min_size is not None or max_size is not None:
+            low = (min_size or 0) * MB
+            high = max_size * MB if max_size is not None else float('inf')
+            checks['size'] = lambda name, info, depth: low <= info.st_size <= high
+
+        min_age, max_age = spec.get('min_age_days'), spec.get('max_age_days')
+        if min_age is not None or max_age is not None:
+            field = {'mtime': 'st_mtime', 'ctime': 'st_ctime'}.get(spec.get('age_from', 'mtime'))
+            if field is None:
+                raise ValueError(f"Reguła {index + 1}: age_from to 'mtime' lub 'ctime'")
+            # Wiek liczony względem początku uruchomienia - wynik nie zależy od kolejnosci plików
+            newest = now - (min_age or 0) * DAY
+            oldest = now - max_age * DAY if max_age is not None else float('-inf')
+            checks['age'] = lambda name, info, depth: oldest <= getattr(info, field) <= newest
+
+        owner = spec.get('owner')
+        if owner is not None:
+            if isinstance(owner, int):
+                checks['owner'] = lambda name, info, depth: info.st_uid == owner
+            else:
+                checks['owner'] = lambda name, info, depth: owner_name(info.st_uid) == owner
+
+        self.predicates = tuple(checks[kind] for kind in PREDICATE_ORDER if kind in checks)
+
+    def matches(self, name, info, depth):
+        """ Sprawdza predykaty poza indeksowanymi (rozszerzenie, wzorzec nazwy) """
+        for predicate in self.predicates:
+            if not predicate(name, info, depth):
+                return False
+        return True
+
+    def render(self, name, extension, category, date=None):
+        """
+        Folder docelowy (względny) z szablonu
+
+        Pola: {category}, {ext}, {rule} oraz {year}, {month}, {day} z daty pliku
+        (dates.file_date - podawanej, gdy uses_date)
+        """
+        dates = {}
+        if date is not None:
+            dates = {'year': f"{date.year:04d}", 'month': f"{date.month:02d}", 'day': f"{date.day:02d}"}
+        folder = self.destination.format(category=category, ext=extension.lstrip('.'), rule=self.name, **dates)
+        folder = os.path.normpath(folder)
+        if os.path.isabs(folder) or folder == os.pardir or folder.startswith(os.pardir + os.sep):
+            raise ValueError(f"Reguła '{self.name}': folder docelowy poza folderem docelowym: {folder}")
+        return folder
+
+
+def _alternative(position, pattern):
+    # Pusta grupa na końcu gałęzi wskazuje regułę, a gałąź zaczyna się od wzorca -
+    # grupa na początku wyłączałaby szybkie odrzucanie gałęzi po pierwszym znaku
+    flags = '(?i:' if pattern.flags & re.IGNORECASE else '(?:'
+    return f"{flags}{pattern.pattern})(?P<r{position}>)"
+
+
+def _mergeable(pattern):
+    """ Czy wzorzec można umiescić we wspólnej alternatywie (bez własnych grup i flag globalnych) """
+    if pattern.groups:
+        return False
+    try:
+        re.compile(_alternative(0, pattern))
+    except re.error:
+        return False
+    return True
+
+
+class _PatternIndex:
+    """
+    Wzorce nazw wielu reguł połączone w jedną alternatywę
+
+    Wzorce zakotwiczone na początku nazwy (globy, regex od ^) łączone są
+    dla match() - wynik to pierwsza w kolejnosci reguła, której wzorzec
+    pasuje. Pozostałe dla search(), które zwraca regułę pasującą najbliżej
+    początku nazwy: reguły o niższym numerze mogą pasować tylko dalej,
+    więc wyszukiwanie powtarzane jest od kolejnej pozycji (zwykle 1-2 razy).
+    Brak dopasowania (najczęstszy przypadek) wyklucza wszystkie reguły naraz.
+    """
+
+    def __init__(self, rules, anchored):
+        self.rules = rules
+        self.anchored = anchored
+        combined = re.compile('|'.join(_alternative(position, rule.pattern)
+                                       for position, rule in enumerate(rules)), re.DOTALL)
+        self.find = combined.match if anchored else combined.search
+
+    def candidates(self, name):
+        """ Reguły w kolejnosci z informacją, czy wzorzec pasuje (dalsze sprawdzane leniwie) """
+        match = self.find(name)
+        if match is None:
+            return
+        first = int(match.lastgroup[1:])
+        if not self.anchored:
+            while first and match.start() < len(name):
+                match = self.find(name, match.start() + 1)
+                if match is None:
+                    break
+                first = min(first, int(match.lastgroup[1:]))
+
+        yield self.rules[first], True
+        for rule in self.rules[first + 1:]:
+            test = rule.pattern.match if rule.anchored else rule.pattern.search
+            yield rule, test(name) is not None
+
+
+class RuleEngine:
+    """
+    Dopasowanie reguł bez liniowego przeglądania wszystkich wzorców
+
+    - reguły z rozszerzeniami trafiają do drzewa sufiksów (człony od końca
+      nazwy: '.gz' -> '.tar'), więc plik sprawdza tylko reguły swoich sufiksów,
+    - wzorce glob/regex pozostałych reguł łączone są w alternatywy
+      z nazwanymi grupami - jedno dopasowanie wskazuje regułę, której
+      wzorzec pasuje, bez sprawdzania wzorców po kolei (_PatternIndex),
+    - pozostałe predykaty reguły sprawdzane są od najtańszych (PREDICATE_ORDER)
+      i przerywane przy pierwszym niespełnionym.
+
+    Obiekt jest niezmienny po zbudowaniu i bezpieczny dla wielu wątków.
+    """
+
+    def __init__(self, rules, source_folder, now=None):
+        """
+        Args:
+            rules (list): Lista słowników reguł (Config.RULES)
+            source_folder (str): Folder źródłowy (głębokosć liczona względem niego)
+            now (float): Chwila odniesienia dla wieku plików (domyslnie teraz)
+        """
+        now = time.time() if now is None else now
+        self.rules = [Rule(index, spec, now) for index, spec in enumerate(rules)]
+        self.root_depth = os.path.abspath(source_folder).rstrip(os.sep).count(os.sep)
+
+        # Drzewo sufiksów: węzeł = (dzieci, reguły kończące się tym sufiksem)
+        self.suffix_tree = ({}, [])
+        self.max_suffix_parts = 0
+        for rule in self.rules:
+            for extension in rule.extensions:
+                parts = ['.' + part for part in extension.split('.') if part]
+                self.max_suffix_parts = max(self.max_suffix_parts, len(parts))
+                node = self.suffix_tree
+                for part in reversed(parts):
+                    node = node[0].setdefault(part, ({}, []))
+                node[1].append(rule)
+
+        # Reguły bez indeksu nazwy (brak wzorca lub wzorzec, którego nie da się połączyć -
+        # np. z grupami, do których odwołuje się \1) sprawdzane są dla każdego pliku
+        self.unindexed = []
+        anchored, floating = [], []
+        for rule in self.rules:
+            if rule.extensions:
+                continue
+            if rule.pattern is None:
+                self.unindexed.append(rule)
+            elif not _mergeable(rule.pattern):
+                rule.predicates = (_name_predicate(rule.pattern, rule.anchored),) + rule.predicates
+                self.unindexed.append(rule)
+            else:
+                (anchored if rule.anchored else floating).append(rule)
+        self.pattern_indexes = [_PatternIndex(group, group is anchored)
+                                for group in (anchored, floating) if group]
+
+    @classmethod
+    def from_config(cls, source_folder):
+        """ Silnik reguł z Config.RULES lub None, gdy reguł nie zdefiniowano """
+        if not Config.RULES:
+            return None
+        return cls(Config.RULES, source_folder)
+
+    def _suffix_candidates(self, name):
+        """ Reguły pasujące do sufiksów nazwy (spacer po drzewie od ostatniego członu) """
+        candidates = []
+        if not self.max_suffix_parts:
+            return candidates
+        lowered = name.lower()
+        node = self.suffix_tree
+        position = len(lowered)
+        for _ in range(self.max_suffix_parts):
+            start = lowered.rfind('.', 1, position)
+            if start == -1:
+                break
+            node = node[0].get(lowered[start:position])
+            if node is None:
+                break
+            candidates.extend(node[1])
+            position = start
+        return candidates
+
+    def match(self, name, path, info):
+        """
+        Zwraca pierwszą regułę spełnioną przez plik
+
+        Args:
+            name (str): Nazwa pliku
+            path (str): Pełna scieżka pliku
+            info (os.stat_result): Metadane pliku
+
+        Returns:
+            Rule: Reguła lub None
+        """
+        depth = path.count(os.sep) - self.root_depth - 1
+        candidates = self._suffix_candidates(name)
+        if self.unindexed:
+            candidates = sorted(candidates + self.unindexed, key=INDEX)
+        elif len(candidates) > 1:
+            candidates.sort(key=INDEX)
+
+        # Scalanie list uporządkowanych wg kolejnosci reguł (leniwe po stronie wzorców)
+        merged = heapq.merge(((rule, True) for rule in candidates),
+                             *(index.candidates(name) for index in self.pattern_indexes),
+                             key=lambda candidate: candidate[0].index)
+        for rule, name_matches in merged:
+            if name_matches and rule.matches(name, info, depth):
+                return rule
+        return None
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Skanowanie folderów dla Smart File Organizer
+Przejscie po katalogu oparte na os.scandir - jeden stat na plik
+Tryb rekurencyjny jako leniwy generator o pamięci zależnej tylko od głębokosci
+"""
+
+import os
+import stat
+import threading
+
+
+class ScanStats:
+    """ Liczniki wywołań systemowych wykonanych podczas organizacji """
+
+    def __init__(self):
+        self.entries = 0        # Wpisy zwrócone przez scandir
+        self.files = 0          # Zwykłe pliki przekazane dalej
+        self.stat_calls = 0     # Wywołania stat (DirEntry.stat / is_file dla linków)
+        self.exists_checks = 0  # Sprawdzenia istnienia pliku docelowego
+        self.directories = 0            # Napotkane podfoldery
+        self.skipped_directories = 0    # Podfoldery pominięte (brak rekurencji / limit głębokosci)
+        self.pruned_directories = 0     # Foldery docelowe/kategorii wewnątrz źródła
+        self.symlink_loops = 0          # Wykryte pętle linków symbolicznych
+        self.unreadable_directories = 0 # Foldery, których nie udało się otworzyć
+        self.unchanged_directories = 0  # Foldery pominięte dzięki indeksowi stanu (bez listowania)
+        self.content_reads = 0          # Odczyty nagłówka pliku (rozpoznawanie typu po zawartosci)
+        self._lock = threading.Lock()
+
+    def increment(self, counter, value=1):
+        """ Zwiększa licznik (bezpieczne dla wielu wątków) """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def path_exists(self, path):
+        """ os.path.exists z doliczeniem wywołania do statystyk """
+        self.increment('exists_checks')
+        return os.path.exists(path)
+
+    def syscalls_per_file(self):
+        """ Srednia liczba wywołań stat/exists na plik """
+        if self.files == 0:
+            return 0.0
+        return (self.stat_calls + self.exists_checks) / self.files
+
+    def summary(self):
+        """ Zwraca krótkie podsumowanie liczników """
+        summary = (f"wpisy: {self.entries}, pliki: {self.files}, stat: {self.stat_calls}, "
+                   f"exists: {self.exists_checks} ({self.syscalls_per_file():.2f} na plik)")
+        if self.content_reads:
+            summary += f", odczyty nagłówków: {self.content_reads}"
+        return summary
+
+    def tree_summary(self):
+        """ Zwraca podsumowanie przejscia po drzewie folderów """
+        return (f"podfoldery: {self.directories}, pominięte: {self.skipped_directories}, "
+                f"wyłączone (cel): {self.pruned_directories}, pętle linków: {self.symlink_loops}, "
+                f"nieczytelne: {self.unreadable_directories}, niezmienione: {self.unchanged_directories}")
+
+
+class PathEntry:
+    """
+    Odpowiednik os.DirEntry dla pojedynczej scieżki
+
+    Pozwala przekazać do process_file plik znaleziony inaczej niż przez
+    scandir (np. zdarzenie obserwacji folderu) razem z juz pobranym stat.
+    """
+
+    __slots__ = ('name', 'path', '_info', '_is_symlink')
+
+    def __init__(self, path, info=None, is_symlink=False):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._info = info
+        self._is_symlink = is_symlink
+
+    def stat(self, follow_symlinks=True):
+        if self._info is None:
+            self._info = os.stat(self.path)
+        return self._info
+
+    def is_symlink(self):
+        return self._is_symlink
+
+    def is_file(self):
+        return stat.S_ISREG(self.stat().st_mode)
+
+
+class _Frame:
+    """ Folder na stosie przejscia """
+
+    __slots__ = ('path', 'depth', 'directory_id', 'mtime_ns', 'items', 'listed', 'subdirs')
+
+    def __init__(self, path, depth, directory_id, mtime_ns, items, listed, subdirs):
+        self.path = path
+        self.depth = depth
+        self.directory_id = directory_id  # (st_dev, st_ino) gdy sledzimy linki
+        self.mtime_ns = mtime_ns          # mtime sprzed listowania (dla indeksu stanu)
+        self.items = items                # Iterator scandir lub nazw znanych podfolderów
+        self.listed = listed              # False = folder niezmieniony, nie listujemy go
+        self.subdirs = subdirs            # Nazwy podfolderów do zapisania w indeksie stanu
+
+
+def scan_files(folder, stats, recursive=False, max_depth=0, prune=(), follow_symlinks=False,
+               state=None):
+    """
+    Generator zwracający pliki z folderu (opcjonalnie z podfolderów)
+
+    Typ wpisu pochodzi z d_type zwróconego przez scandir, więc dla zwykłych
+    plików nie wymaga dodatkowego wywołania systemowego. Metadane pliku
+    należy pobierać przez file_stat(), który korzysta z cache DirEntry.
+
+    Drzewo przechodzone jest w głąb na stosie otwartych iteratorów scandir:
+    pamięć zależy od głębokosci drzewa, a nie od liczby plików, a kolejne
+    wpisy są odczytywane dopiero wtedy, gdy konsument o nie poprosi.
+
+    Z indeksem stanu (state) folder, którego mtime nie zmienił się od
+    poprzedniego uruchomienia, nie jest listowany - odwiedzamy tylko jego
+    zapamiętane podfoldery (zmiana w podfolderze nie zmienia mtime rodzica).
+
+    Args:
+        folder (str): Scieżka do folderu
+        stats (ScanStats): Liczniki wywołań systemowych
+        recursive (bool): Czy wchodzić do podfolderów
+        max_depth (int): Maksymalna głębokosć podfolderów (0 = bez limitu)
+        prune (iterable): Foldery pomijane w całosci (np. folder docelowy)
+        follow_symlinks (bool): Czy wchodzić do folderów przez linki symboliczne
+        state (ScanState): Opcjonalny indeks stanu dla uruchomień przyrostowych
+
+    Yields:
+        os.DirEntry: Wpis dla każdego pliku
+    """
+    pruned = {os.path.normcase(os.path.abspath(path)) for path in prune}
+    need_directory_stat = follow_symlinks or state is not None
+
+    # Identyfikatory (st_dev, st_ino) folderów na bieżącej scieżce - ochrona przed pętlami
+    ancestors = set()
+    stack = []
+
+    def enter(path, depth, info):
+        """ Dodaje folder na stos (listując go lub korzystając z indeksu stanu) """
+        directory_id = None
+        if follow_symlinks:
+            directory_id = (info.st_dev, info.st_ino)
+            if directory_id in ancestors:
+                stats.symlink_loops += 1
+                return
+
+        mtime_ns = info.st_mtime_ns if info is not None else None
+
+        if state is not None:
+            known_subdirs = state.known_subdirectories(path, mtime_ns)
+            if known_subdirs is not None:
+                stats.unchanged_directories += 1
+                stack.append(_Frame(path, depth, directory_id, mtime_ns, iter(known_subdirs), False, None))
+                if directory_id is not None:
+                    ancestors.add(directory_id)
+                return
+
+        try:
+            items = os.scandir(path)
+        except OSError:
+            stats.unreadable_directories += 1
+            return
+
+        subdirs = [] if state is not None else None
+        stack.append(_Frame(path, depth, directory_id, mtime_ns, items, True, subdirs))
+        if directory_id is not None:
+            ancestors.add(directory_id)
+
+    root = os.path.abspath(folder)
+    root_info = None
+    if need_directory_stat:
+        root_info = os.stat(root)
+        stats.increment('stat_calls')
+    enter(root, 0, root_info)
+
+    try:
+        while stack:
+            frame = stack[-1]
+            entry = next(frame.items, None)
+
+            # Koniec folderu - wróć do rodzica
+            if entry is None:
+                if frame.listed:
+                    frame.items.close()
+                stack.pop()
+                ancestors.discard(frame.directory_id)
+                if frame.subdirs is not None:
+                    state.record_directory(frame.path, frame.mtime_ns, frame.subdirs)
+                continue
+
+            # Folder niezmieniony - wpis to nazwa zapamiętanego podfolderu
+            if not frame.listed:
+                child_path = os.path.join(frame.path, entry)
+                try:
+                    child_info = os.stat(child_path, follow_symlinks=follow_symlinks)
+                except OSError:
+                    continue
+                finally:
+                    stats.increment('stat_calls')
+                if stat.S_ISDIR(child_info.st_mode):
+                    stats.directories += 1
+                    enter(child_path, frame.depth + 1, child_info)
+                continue
+
+            stats.entries += 1
+
+            # Dla linków symbolicznych is_file()/is_dir() muszą wykonać stat celu
+            is_symlink = entry.is_symlink()
+            if is_symlink:
+                stats.increment('stat_calls')
+
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                stats.directories += 1
+
+                if not recursive or (max_depth and frame.depth + 1 > max_depth):
+                    stats.skipped_directories += 1
+                    continue
+
+                if os.path.normcase(entry.path) in pruned:
+                    stats.pruned_directories += 1
+                    continue
+
+                if frame.subdirs is not None:
+                    frame.subdirs.append(entry.name)
+
+                child_info = None
+                if need_directory_stat:
+                    child_info = entry.stat(follow_symlinks=follow_symlinks)
+                    if not is_symlink:
+                        stats.increment('stat_calls')
+
+                enter(entry.path, frame.depth + 1, child_info)
+                continue
+
+            if entry.is_file():
+                stats.files += 1
+                yield entry
+    finally:
+        for frame in stack:
+            if frame.listed:
+                frame.items.close()
+
+
+def file_stat(entry, stats):
+    """
+    Zwraca wynik stat dla wpisu (jedno wywołanie na plik, dalej z cache)
+
+    Args:
+        entry (os.DirEntry): Wpis z scan_files
+        stats (ScanStats): Liczniki wywołań systemowych
+
+    Returns:
+        os.stat_result: Metadane pliku
+    """
+    # Dla linków stat został już wykonany (i zapamiętany) przez is_file()
+    if not entry.is_symlink():
+        stats.increment('stat_calls')
+    return entry.stat()
@@ -6,24 +6,44 @@ Automatyczne uruhcamianie w okreslonych interwałach
 
 
 import time
-import schedule
 from datetime import datetime
 from file_organizer import organize_files
 from config import Config
 from logger import setup_logger
+from watcher import FolderWatcher
+from checkpoint import flush_checkpoints
+from jobs import Job, JobRunner, load_jobs
+from metrics import start_exporters, stop_exporters, record_run
+
+try:
+    import schedule
+except ImportError:  # Pakiet schedule potrzebny tylko w trybach harmonogramu (interval, daily, jobs)
+    schedule = None
+
+
+def _require_schedule():
+    if schedule is None:
+        raise RuntimeError("Tryby harmonogramu wymagają pakietu schedule (pip install schedule)")
 
 
 class FileOrganizerScheduler:
     """ Klasa do zarządzania harmonogramem organizacji plików """
     
-    def __init__(self):
-        self.logger = setup_logger() if Config.LOG_ENABLED else None
+    def __init__(self, overrides=None):
+        self.overrides = overrides or {}  # Nadpisania z wiersza poleceń - także dla zadań z pliku zadań
+        self.logger = setup_logger(Config.LOG_DIRECTORY) if Config.LOG_ENABLED else None
         self.is_running = False
+        self.watcher = None
+        self.runner = None
+        self.job = None
+        self.exporters = []
         
     def run_organization(self):
-        """ Uruchamia organizację plików """
+        """ Uruchamia organizację plików (w tym procesie - czeka na jej koniec) """
+        started = time.monotonic()
+        success = False
         try:
-            print(f"\n⏰ {datetime.now().strf3time('%Y-%m-%d %H:%M:%S')} - Rozpoczynam automatyczną organizację...")
+            print(f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Rozpoczynam automatyczną organizację...")
             if self.logger:
                 self.logger.info("Automatyczna organizacja plików - START")
                 
@@ -44,6 +64,32 @@ class FileOrganizerScheduler:
             print(f"❌  {error_msg}")
             if self.logger:
                 self.logger.error(error_msg)
+        finally:
+            record_run(time.monotonic() - started, bool(success))
+
+    def _setup_runner(self):
+        """
+        Wykonawca uruchomień harmonogramu
+
+        Organizacja działa w procesie zadania (jak zadania z pliku zadań),
+        więc długie uruchomienie nie blokuje pętli schedulera ani nie przesuwa
+        kolejnych terminów. Nakładanie się uruchomień: Config.SCHEDULE_OVERLAP.
+        """
+        self.runner = JobRunner(worker_budget=Config.MAX_WORKERS, logger=self.logger)
+        # Indeks stanu i pamięć skrótów te same co przy ręcznym uruchomieniu; logi we własnym
+        # podfolderze (Config.LOG_DIRECTORY/default) - rotacją plików logu schedulera zajmuje się on sam
+        self.job = Job("default", Config.DEFAULT_SOURCE, Config.DEFAULT_DESTINATION, {
+            'STATE_FILE': Config.STATE_FILE,
+            'HASH_CACHE_FILE': Config.HASH_CACHE_FILE,
+            'METRICS_JOB': Config.METRICS_JOB,
+        })
+
+    def submit_organization(self):
+        """ Zleca automatyczną organizację (nie czeka na jej koniec) """
+        print(f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Automatyczna organizacja...")
+        if self.logger:
+            self.logger.info("Automatyczna organizacja plików - START")
+        self.runner.submit(self.job)
 
     def setup_schedule(self, interval_minutes=30):
         """
@@ -53,10 +99,12 @@ class FileOrganizerScheduler:
             interval_minutes (int): Interwał w minutach
 
         """
+        _require_schedule()
         schedule.clear() # Wyczysć poprzednie harmonogramy
+        self._setup_runner()
         
         if interval_minutes > 0:
-            schedule.every(interval_minutes).minutes.do(self.run_organization)
+            schedule.every(interval_minutes).minutes.do(self.submit_organization)
             print(f"📅 Harmonogram ustawiony: co {interval_minutes} minut")
             if self.logger:
                 self.logger.info(f"Harmonogram ustawiony: co {interval_minutes} minut")
@@ -70,20 +118,68 @@ class FileOrganizerScheduler:
         Args:
             time_str (str): Godzina w formacie "HH:MM"
         """
+        _require_schedule()
         schedule.clear()
-        schedule.every().day.at(time_str).do(self.run_organization)
+        self._setup_runner()
+        schedule.every().day.at(time_str).do(self.submit_organization)
         print(f"📅 Harmonogram dzienny ustawiony: codziennie o {time_str}")
         if self.logger:
             self.logger.info(f"Harmonogram dzienny ustawiony: codziennie o {time_str} ")
             
-    def start_scheduler(self, mode="interval", interval_minutes=30, daily_time="09:00"):
+    def setup_jobs_schedule(self, jobs_file=None):
+        """
+        Konfiguruje harmonogram zadań z pliku zadań (każde zadanie z własnym harmonogramem)
+        
+        Args:
+            jobs_file (str): Scieżka do pliku zadań (domyslnie Config.JOBS_FILE)
+        """
+        _require_schedule()
+        schedule.clear()
+        jobs, limits = load_jobs(jobs_file, self.overrides)
+        self.runner = JobRunner(logger=self.logger, **limits)
+        
+        for job in jobs:
+            if job.schedule is None:
+                self.runner.submit(job)  # Zadanie bez harmonogramu - jednorazowo przy starcie
+            elif isinstance(job.schedule, str):
+                schedule.every().day.at(job.schedule).do(self.runner.submit, job)
+            else:
+                schedule.every(job.schedule).minutes.do(self.runner.submit, job)
+            print(f"📅 {job.describe()}")
+        
+        print(f"🧵 Budżet wątków: {self.runner.worker_budget}")
+        if self.logger:
+            self.logger.info(f"Harmonogram zadań ustawiony: {len(jobs)} zadań, "
+                             f"budżet wątków: {self.runner.worker_budget}")
+    
+    def run_jobs(self, jobs_file=None):
+        """ Jednorazowo wykonuje wszystkie zadania z pliku zadań (równolegle, w limitach) """
+        jobs, limits = load_jobs(jobs_file, self.overrides)
+        self.runner = JobRunner(logger=self.logger, **limits)
+        self.exporters = start_exporters()
+        try:
+            results = self.runner.run(jobs)
+        except KeyboardInterrupt:
+            self.runner.stop()
+            print("\n🛑 Zadania przerwane przez użytkownika - wznowią się przy następnym uruchomieniu")
+            return False
+        finally:
+            stop_exporters(self.exporters)
+            self.exporters = []
+        failed = [name for name, success in results.items() if not success]
+        print(f"\n📋 Zadania: {len(results) - len(failed)}/{len(results)} zakończone pomyslnie")
+        return not failed
+    
+    def start_scheduler(self, mode="interval", interval_minutes=30, daily_time="09:00", jobs_file=None):
         """
         Uruchamia scheduler
 
         Args:
-            mode (str): "interval" lub "daily"
+            mode (str): "interval", "daily", "watch" (obserwacja folderu zamiast odpytywania)
+                        lub "jobs" (zadania z pliku zadań)
             interval_minutes (int): Interwa ł w minutach (dla trybu interval)
             daily_time (str): Godzina (dla trybu daily)
+            jobs_file (str): Plik zadań (dla trybu jobs, domyslnie Config.JOBS_FILE)
 
         """
         print("🚀 SMART FILE ORGANIZER - TRYB AUTOMATYCZNY")
@@ -93,31 +189,61 @@ class FileOrganizerScheduler:
             self.setup_schedule(interval_minutes)
         elif mode == "daily":
             self.setup_daily_schedule(daily_time)
+        elif mode == "watch":
+            self.watcher = FolderWatcher(logger=self.logger)
+        elif mode == "jobs":
+            self.setup_jobs_schedule(jobs_file)
         else:
             print("❌ Nieznany tryb harmonogramu")
             return
         
+        if self.runner:
+            print(f"🔁 Nakładanie uruchomień: {Config.SCHEDULE_OVERLAP}"
+                  + (f", losowe opóźnienie startu do {Config.SCHEDULE_JITTER_SECONDS} s"
+                     if Config.SCHEDULE_JITTER_SECONDS else ""))
+        
         self.is_running = True
+        self.exporters = start_exporters()
         print("🔄 Scheduler uruchomiony. Nacinij Ctrl+C aby zatrzymać")
         print("-" * 50)
         
         try:
-            while self.is_running:
-                schedule.run_pending()
-                time.sleep(1)
+            if self.watcher:
+                # Zdarzenia systemu plików zamiast odpytywania co sekundę
+                self.watcher.run()
+            else:
+                while self.is_running:
+                    schedule.run_pending()
+                    if self.runner:
+                        self.runner.poll()
+                    time.sleep(1)
         except KeyboardInterrupt:
             print("\n🛑 Scheduler zatrzymany przez użytkownika")
+            if self.runner:
+                # Procesy zadań też dostają Ctrl+C i zapisują swoje punkty kontrolne
+                self.runner.stop()
+            # Przerwana organizacja wznowi się od zapisanego miejsca
+            if flush_checkpoints():
+                print("💾 Zapisano punkt kontrolny przerwanej organizacji")
             if self.logger:
                 self.logger.info("Scheduler zatrzymany przez uźytkownika")
         except Exception as e:
             print(f"\n❌ Błąd schedulera: {str(e)}")
             if self.logger:
                 self.logger.error(f"Błąd schedulera: {str(e)}")
+        finally:
+            stop_exporters(self.exporters)
+            self.exporters = []
                 
     def stop_scheduler(self):
         """Zatrzymuje scheduler"""
         self.is_running = False
-        schedule.clear()
+        if self.watcher:
+            self.watcher.stop()
+        if self.runner:
+            self.runner.stop()
+        if schedule is not None:
+            schedule.clear()
         print("🛑 Scheduler zatrzymany")
 
 def main():
@@ -129,9 +255,12 @@ def main():
     print("1. Tryb interwałowy (co X minut)")
     print("2. Tryb dzienny (codziennie o określonej godzinie)")
     print("3. Jednorazowe uruchomienie")
+    print("4. Tryb obserwacji (organizacja zaraz po pojawieniu się pliku)")
+    print("5. Zadania z pliku zadań (wiele folderów, własne harmonogramy)")
+    print("6. Jednorazowe wykonanie zadań z pliku zadań")
         
     try:
-        choice = input("\nWybierz opcję (1-3): ").strip()
+        choice = input("\nWybierz opcję (1-6): ").strip()
         
         if choice == "1":
             interval = int(input("Podaj interwał w minutach (np. 30): "))
@@ -141,6 +270,14 @@ def main():
             scheduler.start_scheduler("daily", daily_time=time_str)
         elif choice == "3":
             scheduler.run_organization()
+        elif choice == "4":
+            scheduler.start_scheduler("watch")
+        elif choice in ("5", "6"):
+            jobs_file = input(f"Podaj plik zadań [{Config.JOBS_FILE}]: ").strip() or Config.JOBS_FILE
+            if choice == "5":
+                scheduler.start_scheduler("jobs", jobs_file=jobs_file)
+            else:
+                scheduler.run_jobs(jobs_file)
         else:
             print("❌ Nieprawidłowy wybór")
             
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Rozpoznawanie typu pliku po zawartosci dla Smart File Organizer
+Sygnatury (magic numbers) z pierwszych bajtów pliku - jeden odczyt pread
+na plik, wyniki zapamiętywane po (urządzenie, i-węzeł, mtime)
+"""
+
+import os
+import threading
+from config import Config
+
+
+HEADER_BYTES = 512      # Wystarcza na wszystkie sygnatury z tabeli (tar: 257 + 5)
+CACHE_SIZE = 100_000    # Maks. liczba zapamiętanych wyników
+
+# Tabela sygnatur: (przesunięcie, bajty, rozszerzenie, ogólny kontener)
+# Kontenery ogólne (ZIP, OLE2) opisują wiele formatów - rozpoznają tylko pliki
+# bez rozszerzenia, a nie podważają zadeklarowanego rozszerzenia (.jar, .epub, .msi...)
+SIGNATURES = [
+    (0, b'%PDF-', '.pdf', False),
+    (0, b'\x89PNG\r\n\x1a\n', '.png', False),
+    (0, b'\xff\xd8\xff', '.jpg', False),
+    (0, b'GIF87a', '.gif', False),
+    (0, b'GIF89a', '.gif', False),
+    (0, b'II*\x00', '.tiff', False),
+    (0, b'MM\x00*', '.tiff', False),
+    (0, b'PK\x03\x04', '.zip', True),
+    (0, b'PK\x05\x06', '.zip', True),
+    (0, b'\x1f\x8b', '.gz', False),
+    (0, b'BZh', '.bz2', False),
+    (0, b'7z\xbc\xaf\x27\x1c', '.7z', False),
+    (0, b'Rar!\x1a\x07', '.rar', False),
+    (0, b'\xfd7zXZ\x00', '.xz', False),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', '.doc', True),
+    (0, b'ID3', '.mp3', False),
+    (0, b'\xff\xfb', '.mp3', False),
+    (0, b'\xff\xf3', '.mp3', False),
+    (0, b'fLaC', '.flac', False),
+    (0, b'OggS', '.ogg', False),
+    (0, b'\x1aE\xdf\xa3', '.mkv', False),
+    (0, b'FLV\x01', '.flv', False),
+    (0, b'{\\rtf', '.rtf', False),
+    (4, b'ftypqt', '.mov', False),
+    (4, b'ftypM4A', '.m4a', False),
+    (4, b'ftyp', '.mp4', False),
+    (257, b'ustar', '.tar', False),
+]
+
+# RIFF: typ w bajtach 8-12
+RIFF_TYPES = {b'WAVE': '.wav', b'AVI ': '.avi', b'WEBP': '.webp'}
+
+# ZIP: formaty rozpoznawane po nazwach pierwszych wpisów (OOXML, OpenDocument)
+ZIP_MARKERS = [
+    (b'word/', '.docx'),
+    (b'xl/', '.xlsx'),
+    (b'ppt/', '.pptx'),
+    (b'mimetypeapplication/vnd.oasis.opendocument.text', '.odt'),
+    (b'mimetypeapplication/vnd.oasis.opendocument.spreadsheet', '.ods'),
+    (b'mimetypeapplication/vnd.oasis.opendocument.presentation', '.odp'),
+    (b'mimetypeapplication/epub+zip', '.epub'),
+]
+
+
+class ContentSniffer:
+    """
+    Dopasowanie sygnatur sterowane tabelą
+
+    Sygnatury z przesunięciem 0 są indeksowane po pierwszym bajcie,
+    więc plik porównywany jest tylko z kilkoma kandydatami, a nie
+    z całą tabelą. Bezpieczny dla wielu wątków.
+    """
+
+    def __init__(self, signatures=SIGNATURES, cache_size=CACHE_SIZE):
+        self.by_first_byte = {}
+        self.other_offsets = []
+        for offset, magic, extension, generic in signatures:
+            if offset == 0:
+                self.by_first_byte.setdefault(magic[0], []).append((magic, extension, generic))
+            else:
+                self.other_offsets.append((offset, magic, extension, generic))
+        # Dłuższe sygnatury najpierw - bardziej szczegółowe wygrywają (ftypqt przed ftyp)
+        for candidates in self.by_first_byte.values():
+            candidates.sort(key=lambda candidate: -len(candidate[0]))
+        self.other_offsets.sort(key=lambda candidate: (candidate[0], -len(candidate[1])))
+
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def match(self, header):
+        """
+        Rozpoznaje typ z pierwszych bajtów
+
+        Returns:
+            tuple: (rozszerzenie, czy ogólny kontener) lub (None, False)
+        """
+        if not header:
+            return None, False
+        if header[:4] == b'RIFF':
+            return RIFF_TYPES.get(header[8:12]), False
+
+        for magic, extension, generic in self.by_first_byte.get(header[0], ()):
+            if header.startswith(magic):
+                if extension == '.zip':
+                    for marker, specific in ZIP_MARKERS:
+                        if marker in header:
+                            return specific, False
+                return extension, generic
+
+        for offset, magic, extension, generic in self.other_offsets:
+            if header.startswith(magic, offset):
+                return extension, generic
+        return None, False
+
+    @classmethod
+    def from_config(cls):
+        """
+        Wspólny detektor (pamięć wyników przetrwa kolejne uruchomienia w tym samym procesie)
+        lub None, gdy Config.SNIFF_CONTENT jest wyłączone
+        """
+        global _shared
+        if not Config.SNIFF_CONTENT:
+            return None
+        with _shared_lock:
+            if _shared is None:
+                _shared = cls()
+            return _shared
+
+    def sniff(self, path, info, stats=None):
+        """
+        Typ pliku po zawartosci (z pamięcią po urządzeniu, i-węźle i mtime)
+
+        Args:
+            path (str): Scieżka pliku
+            info (os.stat_result): Metadane pliku (klucz pamięci podręcznej)
+            stats (ScanStats): Liczniki - odczyty zawartosci
+
+        Returns:
+            tuple: (rozszerzenie, czy ogólny kontener) lub (None, False)
+        """
+        key = (info.st_dev, info.st_ino, info.st_mtime_ns, info.st_size)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self.match(read_header(path))
+        if stats is not None:
+            stats.increment('content_reads')
+
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def read_header(path, size=HEADER_BYTES):
+    """ Pierwsze bajty pliku jednym odczytem (pread), pusty ciąg gdy plik jest nieczytelny """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return b''
+    try:
+        if hasattr(os, 'pread'):
+            return os.pread(fd, size, 0)
+        return os.read(fd, size)  # Windows - brak pread
+    except OSError:
+        return b''
+    finally:
+        os.close(fd)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Blokada folderu źródłowego dla Smart File Organizer
+Plik blokady per folder źródłowy - dwa procesy (scheduler, zadania,
+ręczne uruchomienie) nie organizują tego samego drzewa jednoczesnie
+"""
+
+import hashlib
+import os
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SourceLock:
+    """
+    Blokada wyłączna na pliku w Config.LOCK_DIRECTORY
+
+    Blokada systemowa (flock / msvcrt.locking) znika razem z procesem,
+    więc po awarii nie zostaje nieaktualny plik blokady do ręcznego
+    usuwania. Plik zawiera PID posiadacza - tylko do komunikatów.
+    """
+
+    def __init__(self, source_folder, directory=None):
+        self.source_folder = source_folder
+        key = os.path.normcase(os.path.abspath(source_folder)).encode('utf-8', 'surrogateescape')
+        name = hashlib.sha1(key).hexdigest()[:16] + '.lock'
+        self.path = os.path.join(directory or Config.LOCK_DIRECTORY, name)
+        self._fd = None
+
+    @classmethod
+    def from_config(cls, source_folder):
+        """ Blokada folderu lub None, gdy Config.SOURCE_LOCK jest wyłączone """
+        return cls(source_folder) if Config.SOURCE_LOCK else None
+
+    def acquire(self):
+        """
+        Próbuje założyć blokadę bez czekania
+
+        Returns:
+            bool: True gdy blokada założona, False gdy trzyma ją inny proces
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()} {self.source_folder}\n".encode('utf-8', 'surrogateescape'))
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            # Zamknięcie deskryptora zwalnia flock
+            os.close(self._fd)
+            self._fd = None
+
+    def holder(self):
+        """
+        PID procesu trzymającego blokadę lub None, gdy folder jest wolny
+
+        Sprawdzenie zakłada i od razu zwalnia blokadę - wynik to stan
+        z tej chwili (ostatecznie rozstrzyga acquire w organize_files).
+        """
+        if self._fd is not None:
+            return os.getpid()
+        if not os.path.exists(self.path):
+            return None
+        if self.acquire():
+            self.release()
+            return None
+        try:
+            with open(self.path, encoding='utf-8', errors='replace') as file:
+                return int(file.read().split()[0])
+        except (OSError, ValueError, IndexError):
+            return -1  # Blokada założona, PID jeszcze nie zapisany
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Trwały indeks stanu skanowania dla Smart File Organizer
+Zapamiętuje mtime folderów i pliki juz obsłużone, aby kolejne
+uruchomienia przetwarzały tylko nowe lub zmienione pliki
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from config import Config, config_fingerprint
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    subdirs TEXT,
+    visited_run INTEGER,
+    listed_run INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    directory TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    status TEXT,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_directory ON files (directory);
+"""
+
+
+class ScanState:
+    """
+    Indeks stanu skanowania zapisany w SQLite
+
+    Folder jest "niezmieniony", jesli jego mtime jest równy zapamiętanemu
+    mtime sprzed poprzedniego listowania - każde dodanie, usunięcie lub
+    przeniesienie pliku (także przez nas) zmienia mtime folderu. Pliki
+    pominięte wczesniej są pamiętane razem z rozmiarem i mtime, więc
+    w zmienionych folderach ponownie przetwarzane są tylko nowe lub
+    zmodyfikowane pliki.
+    """
+
+    COMMIT_EVERY = 1000  # Liczba zapisów w jednej transakcji
+
+    def __init__(self, path, fingerprint, full_scan_hours=0, read_only=False):
+        """
+        Otwiera (lub tworzy) indeks stanu
+
+        Args:
+            path (str): Scieżka do pliku SQLite
+            fingerprint (str): Odcisk konfiguracji (config_fingerprint)
+            full_scan_hours (int): Co ile godzin listować wszystkie foldery
+                                   mimo niezmienionego mtime (0 = nigdy)
+            read_only (bool): Tylko odczyt (tryb próbny) - zaplanowane, ale
+                              niewykonane operacje nie mogą trafić do indeksu
+        """
+        state_dir = os.path.dirname(path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._invalid_directories = set()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+        # Indeks z inną konfiguracją jest bezużyteczny (w trybie tylko do odczytu
+        # pozostaje nietknięty, ale nic z niego nie jest pomijane)
+        self.stale = self._get_meta('fingerprint') != fingerprint
+        if self.stale and not read_only:
+            self.clear()
+            self._set_meta('fingerprint', fingerprint)
+            self.stale = False
+
+        self.run_id = int(self._get_meta('run_id') or 0) + 1
+        if not read_only:
+            self._set_meta('run_id', str(self.run_id))
+
+        # Okresowe pełne listowanie wyłapuje zmiany treści plików w niezmienionych folderach
+        last_full_scan = float(self._get_meta('last_full_scan') or 0)
+        self.full_scan = (self.stale or last_full_scan == 0 or
+                          (full_scan_hours > 0 and time.time() - last_full_scan > full_scan_hours * 3600))
+        self.connection.commit()
+
+    @classmethod
+    def from_config(cls, destination_folder, recursive, max_depth, read_only=False):
+        """ Otwiera indeks stanu wskazany w konfiguracji """
+        fingerprint = config_fingerprint(destination_folder, recursive, max_depth)
+        return cls(Config.STATE_FILE, fingerprint, Config.STATE_FULL_SCAN_HOURS, read_only)
+
+    def _get_meta(self, key):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _write(self, sql, params):
+        """ Zapis grupowany w transakcje po COMMIT_EVERY operacji """
+        if self.read_only:
+            return
+        with self._lock:
+            self.connection.execute(sql, params)
+            self._pending_writes += 1
+            if self._pending_writes >= self.COMMIT_EVERY:
+                self.connection.commit()
+                self._pending_writes = 0
+
+    def clear(self):
+        """ Usuwa cały zapamiętany stan """
+        with self._lock:
+            self.connection.execute("DELETE FROM directories")
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM meta WHERE key = 'last_full_scan'")
+            self.connection.commit()
+
+    def known_subdirectories(self, path, mtime_ns):
+        """
+        Zwraca podfoldery niezmienionego folderu
+
+        Args:
+            path (str): Scieżka folderu
+            mtime_ns (int): Aktualny mtime folderu
+
+        Returns:
+            list: Nazwy podfolderów lub None, jesli folder trzeba wylistować
+        """
+        if self.full_scan or mtime_ns is None:
+            return None
+
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT mtime_ns, subdirs FROM directories WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != mtime_ns:
+            return None
+
+        self._write("UPDATE directories SET visited_run = ? WHERE path = ?", (self.run_id, path))
+        return row[1].split('\n') if row[1] else []
+
+    def record_directory(self, path, mtime_ns, subdirs):
+        """ Zapisuje folder wylistowany w tym uruchomieniu """
+        self._write("INSERT OR REPLACE INTO directories (path, mtime_ns, subdirs, visited_run, listed_run) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, mtime_ns, '\n'.join(subdirs), self.run_id, self.run_id))
+
+    def record_resumed_directory(self, path, mtime_ns, subdirs):
+        """
+        Zapisuje folder ukończony w przerwanym uruchomieniu (pominięty przy wznowieniu)
+
+        Folder nie jest oznaczany jako wylistowany w tym uruchomieniu, więc
+        zapamiętane w nim pliki nie są usuwane z indeksu przy zamknięciu.
+        """
+        self._write("INSERT OR REPLACE INTO directories (path, mtime_ns, subdirs, visited_run, listed_run) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, mtime_ns, '\n'.join(subdirs), self.run_id, self.run_id - 1))
+
+    def invalidate_directory(self, path):
+        """ Wymusza ponowne wylistowanie folderu przy następnym uruchomieniu """
+        with self._lock:
+            self._invalid_directories.add(path)
+
+    def is_unchanged(self, path, file_info):
+        """
+        Sprawdza, czy plik był juz obsłużony i nie zmienił się od tego czasu
+
+        Args:
+            path (str): Scieżka pliku
+            file_info (os.stat_result): Aktualne metadane pliku
+
+        Returns:
+            bool: True jesli plik można pominąć
+        """
+        if self.stale:
+            return False
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == file_info.st_size and row[1] == file_info.st_mtime_ns
+
+    def record_result(self, result):
+        """
+        Aktualizuje indeks na podstawie wyniku przetworzenia pliku
+
+        Args:
+            result (FileResult): Wynik z process_file
+        """
+        if result.operation == "UNCHANGED":
+            self._write("UPDATE files SET run_id = ? WHERE path = ?", (self.run_id, result.source))
+        elif result.operation in ("SKIP", "COPY") and result.file_info is not None:
+            # Plik pozostał w folderze źródłowym (pominięty lub skopiowany)
+            self._write("INSERT OR REPLACE INTO files (path, directory, size, mtime_ns, status, run_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (result.source, os.path.dirname(result.source), result.file_info.st_size,
+                         result.file_info.st_mtime_ns, result.status, self.run_id))
+        else:
+            # Plik przeniesiony lub błąd - przy błędzie spróbujemy ponownie następnym razem
+            self._write("DELETE FROM files WHERE path = ?", (result.source,))
+            if result.operation == "ERROR":
+                self.invalidate_directory(os.path.dirname(result.source))
+
+    def close(self, complete=True):
+        """
+        Zapisuje stan i zamyka indeks
+
+        Args:
+            complete (bool): Czy przejscie po drzewie zakończyło się w całosci
+                             (tylko wtedy usuwamy wpisy folderów i plików, których juz nie ma)
+        """
+        if self.read_only:
+            self.connection.close()
+            return
+
+        with self._lock:
+            for path in self._invalid_directories:
+                self.connection.execute("DELETE FROM directories WHERE path = ?", (path,))
+
+            if complete:
+                self.connection.execute("DELETE FROM directories WHERE visited_run < ? AND listed_run < ?",
+                                        (self.run_id, self.run_id))
+                self.connection.execute(
+                    "DELETE FROM files WHERE run_id < ? AND (directory NOT IN (SELECT path FROM directories) "
+                    "OR directory IN (SELECT path FROM directories WHERE listed_run = ?))",
+                    (self.run_id, self.run_id))
+                if self.full_scan:
+                    self._set_meta('last_full_scan', str(time.time()))
+
+            self.connection.commit()
+            self.connection.close()
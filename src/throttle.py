@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Dławienie I/O dla Smart File Organizer
+Limity bajtów/s i operacji/s per urządzenie (kubełki tokenów), opcjonalnie
+inne w wybranych godzinach - duża reorganizacja nie zajmuje całego dysku
+
+Przykład (tylko w godzinach pracy 20 MB/s i 50 plików/s na dysk):
+
+    THROTTLE_WINDOWS = [{"start": "08:00", "end": "18:00", "days": [0, 1, 2, 3, 4],
+                         "bytes_per_second": 20 * 1024 ** 2, "ops_per_second": 50}]
+"""
+
+import datetime
+import threading
+import time
+from config import Config
+from devices import device_of
+
+
+BYTES = 0
+OPS = 1
+
+
+class TokenBucket:
+    """
+    Kubełek tokenów z długiem
+
+    Pobranie zawsze się udaje, a stan może zejsć poniżej zera - wołający
+    czeka wtedy, aż dług się spłaci. Kolejne pobrania ustawiają się więc
+    w kolejce w porządku przybycia (sprawiedliwie między wątkami
+    i procesami), a pojedynczy fragment większy niż pojemnosć też przejdzie.
+
+    Stan (tokeny, czas ostatniego uzupełnienia) może być współdzielony
+    między procesami zadań (multiprocessing.Array + Lock z JobRunner).
+    """
+
+    __slots__ = ('state', 'lock')
+
+    def __init__(self, state=None, lock=None):
+        self.state = state if state is not None else [0.0, 0.0]
+        self.lock = lock if lock is not None else threading.Lock()
+
+    def take(self, amount, rate):
+        """
+        Pobiera amount tokenów przy limicie rate/s (pojemnosć = 1 s limitu)
+
+        Returns:
+            float: Ile sekund wołający musi odczekać
+        """
+        with self.lock:
+            now = time.monotonic()
+            tokens, last = self.state[0], self.state[1]
+            # Pierwsze użycie: pełny kubełek
+            tokens = rate if last == 0 else min(rate, tokens + (now - last) * rate)
+            tokens -= amount
+            self.state[0] = tokens
+            self.state[1] = now
+        return -tokens / rate if tokens < 0 else 0.0
+
+
+def _minutes(text):
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def active_window(windows, now=None):
+    """
+    Okno dławienia obowiązujące w danej chwili (pierwsze pasujące) lub None
+
+    Okno z "start" późniejszym niż "end" przechodzi przez północ,
+    "days" to dni tygodnia (0 = poniedziałek) - brak oznacza każdy dzień.
+    """
+    now = now or datetime.datetime.now()
+    minute = now.hour * 60 + now.minute
+    for window in windows:
+        start, end = _minutes(window['start']), _minutes(window['end'])
+        if start <= end:
+            inside, day = start <= minute < end, now.weekday()
+        else:
+            inside = minute >= start or minute < end
+            # Po północy okno należy do dnia, w którym się zaczęło
+            day = now.weekday() if minute >= start else (now.weekday() - 1) % 7
+        if inside and day in window.get('days', range(7)):
+            return window
+    return None
+
+
+class IOThrottle:
+    """
+    Limity I/O per urządzenie dla przenoszenia i kopiowania
+
+    Kopia zużywa bajty urządzenia źródłowego (odczyt) i docelowego (zapis),
+    a każdy plik - jedną operację na tych urządzeniach. Kopiowanie jest
+    dławione fragmentami (Config.THROTTLE_CHUNK_BYTES), więc duży plik
+    płynie równo zamiast czekać i potem zająć dysk w całosci.
+
+    Limity: globalne (bytes_per_second, ops_per_second), nadpisywane
+    w oknach czasowych, a dla konkretnych urządzeń - ostrzejsze z obu.
+    0 oznacza brak limitu.
+    """
+
+    def __init__(self, bytes_per_second=0, ops_per_second=0, device_limits=None, windows=None, shared=None):
+        self.limits = (bytes_per_second or 0, ops_per_second or 0)
+        self.device_limits = {}
+        for path, limits in (device_limits or {}).items():
+            device = device_of(path)
+            if device is not None:
+                self.device_limits[device] = (limits.get('bytes_per_second', 0), limits.get('ops_per_second', 0))
+        self.windows = windows or []
+        self.shared = shared or {}     # (urządzenie, rodzaj) -> (stan, blokada) współdzielone między procesami
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.waited = 0.0              # Łączny czas oczekiwania (sekundy)
+
+    @classmethod
+    def from_config(cls):
+        """ Dławienie z konfiguracji lub None, gdy żaden limit nie jest ustawiony """
+        if not (Config.THROTTLE_BYTES_PER_SECOND or Config.THROTTLE_OPS_PER_SECOND
+                or Config.THROTTLE_DEVICE_LIMITS or Config.THROTTLE_WINDOWS):
+            return None
+        return cls(Config.THROTTLE_BYTES_PER_SECOND, Config.THROTTLE_OPS_PER_SECOND,
+                   Config.THROTTLE_DEVICE_LIMITS, Config.THROTTLE_WINDOWS, _shared_buckets)
+
+    def _rate(self, device, kind):
+        window = active_window(self.windows) if self.windows else None
+        if window is not None:
+            rate = window.get('bytes_per_second' if kind == BYTES else 'ops_per_second', 0)
+        else:
+            rate = self.limits[kind]
+        device_rate = self.device_limits.get(device, (0, 0))[kind]
+        if device_rate and (not rate or device_rate < rate):
+            rate = device_rate
+        return rate
+
+    def _bucket(self, device, kind):
+        key = (device, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    state, lock = self.shared.get(key, (None, None))
+                    bucket = self._buckets[key] = TokenBucket(state, lock)
+        return bucket
+
+    def _take(self, devices, kind, amount):
+        wait = 0.0
+        for device in devices:
+            rate = self._rate(device, kind)
+            if rate:
+                wait = max(wait, self._bucket(device, kind).take(amount, rate))
+        if wait:
+            with self._lock:
+                self.waited += wait
+            time.sleep(wait)
+
+    def operation(self, source_device, destination_device):
+        """ Jedna operacja na plik (zmiana nazwy na tym samym urządzeniu liczy się raz) """
+        devices = {source_device, destination_device}
+        self._take(devices, OPS, 1)
+
+    def consume(self, source_device, destination_device, size):
+        """ Bajty skopiowane z urządzenia źródłowego na docelowe (kopia na tym samym dysku liczy się podwójnie) """
+        if source_device == destination_device:
+            self._take((source_device,), BYTES, 2 * size)
+        else:
+            self._take((source_device, destination_device), BYTES, size)
+
+    def summary(self):
+        return f"czekano łącznie {self.waited:.1f} s"
+
+
+# Kubełki współdzielone z procesem schedulera (ustawiane w procesie zadania)
+_shared_buckets = {}
+
+
+def create_shared_buckets(context, devices, buckets):
+    """
+    Dopisuje do buckets współdzielone kubełki urządzeń (stan w pamięci współdzielonej)
+
+    Zadania na tym samym dysku dzielą jeden limit zamiast mieć każde własny.
+
+    Returns:
+        dict: Kubełki podanych urządzeń - do przekazania procesowi zadania
+    """
+    selected = {}
+    for device in devices:
+        for kind in (BYTES, OPS):
+            key = (device, kind)
+            if key not in buckets:
+                buckets[key] = (context.Array('d', 2, lock=False), context.Lock())
+            selected[key] = buckets[key]
+    return selected
+
+
+def use_shared_buckets(buckets):
+    """ Ustawia kubełki współdzielone przez zadania na tych samych urządzeniach (z JobRunner) """
+    global _shared_buckets
+    _shared_buckets = dict(buckets or {})
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Przenoszenie i kopiowanie plików dla Smart File Organizer
+Zmiana nazwy w obrębie systemu plików, kopiowanie bez buforowania
+w przestrzeni użytkownika (copy_file_range / sendfile) między systemami plików
+"""
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from config import Config
+from throttle import IOThrottle
+
+
+COPY_CHUNK = 1 << 30          # Maksymalny fragment jednego wywołania copy_file_range/sendfile
+READ_BUFFER = 1024 * 1024     # Bufor dla kopiowania przez read/write
+
+# Błędy oznaczające, że jądro nie obsługuje danej metody dla tej pary plików
+UNSUPPORTED_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.EBADF}
+
+
+class TransferStats:
+    """ Liczniki sposobów przeniesienia plików """
+
+    def __init__(self):
+        self.renamed = 0           # os.replace w obrębie systemu plików (O(1))
+        self.zero_copy = 0         # Kopie przez copy_file_range / sendfile
+        self.buffered = 0          # Kopie przez read/write
+        self.bytes_copied = 0
+        self._lock = threading.Lock()
+
+    def record(self, method, size):
+        """ Dolicza przeniesienie wykonane daną metodą """
+        with self._lock:
+            if method == 'rename':
+                self.renamed += 1
+                return
+            if method == 'buffered':
+                self.buffered += 1
+            else:
+                self.zero_copy += 1
+            self.bytes_copied += size
+
+    def summary(self):
+        return (f"zmiana nazwy: {self.renamed}, kopie zero-copy: {self.zero_copy}, "
+                f"kopie buforowane: {self.buffered}, skopiowano: {self.bytes_copied / (1024 * 1024):.1f} MB")
+
+
+class FileTransfer:
+    """
+    Przenosi lub kopiuje pliki wybierając najszybszą bezpieczną metodę
+
+    Urządzenie (st_dev) folderu docelowego sprawdzane jest raz na folder,
+    a urządzenie pliku pochodzi z jego juz pobranego stat - porównanie
+    nie kosztuje więc dodatkowych wywołań systemowych.
+    """
+
+    def __init__(self, move=True, fsync=True, throttle=None):
+        self.move = move
+        self.fsync = fsync
+        self.throttle = throttle      # IOThrottle (Config.THROTTLE_*) lub None
+        self.stats = TransferStats()
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.MOVE_FILES, Config.FSYNC_COPIES, IOThrottle.from_config())
+
+    @property
+    def operation(self):
+        """ Nazwa operacji do logów (MOVE lub COPY) """
+        return "MOVE" if self.move else "COPY"
+
+    def device(self, directory):
+        """ st_dev folderu (zapamiętywane na czas uruchomienia) """
+        with self._lock:
+            device = self._devices.get(directory)
+        if device is None:
+            device = os.stat(directory).st_dev
+            with self._lock:
+                self._devices[directory] = device
+        return device
+
+    def transfer(self, source_path, destination_path, source_info):
+        """
+        Przenosi (lub kopiuje) plik do scieżki docelowej
+
+        Args:
+            source_path (str): Scieżka źródłowa
+            destination_path (str): Scieżka docelowa (nazwa zarezerwowana przez wywołującego)
+            source_info (os.stat_result): Metadane pliku źródłowego
+
+        Returns:
+            str: Użyta metoda ('rename', 'copy_file_range', 'sendfile', 'buffered')
+        """
+        destination_device = self.device(os.path.dirname(destination_path))
+        same_device = destination_device == source_info.st_dev
+        method = None
+        pace = None
+        if self.throttle is not None:
+            self.throttle.operation(source_info.st_dev, destination_device)
+            pace = lambda size: self.throttle.consume(source_info.st_dev, destination_device, size)
+
+        if self.move and same_device:
+            # Ten sam system plików - atomowa zmiana nazwy bez kopiowania danych
+            try:
+                os.replace(source_path, destination_path)
+                method = 'rename'
+            except OSError as error:
+                # Np. dwa punkty montowania (bind mount) tego samego urządzenia
+                if error.errno != errno.EXDEV:
+                    raise
+
+        if method is None:
+            method = copy_file(source_path, destination_path, source_info, self.fsync, pace)
+            if self.move:
+                os.unlink(source_path)
+
+        self.stats.record(method, source_info.st_size)
+        return method
+
+
+def _copy_data(source, target, pace=None):
+    """
+    Kopiuje zawartosć między otwartymi plikami, zwraca nazwę użytej metody
+
+    Args:
+        pace (callable): Wołana z liczbą bajtów po każdym fragmencie (dławienie I/O) -
+                         fragmenty są wtedy małe (Config.THROTTLE_CHUNK_BYTES)
+    """
+    source_fd = source.fileno()
+    target_fd = target.fileno()
+    chunk = COPY_CHUNK if pace is None else Config.THROTTLE_CHUNK_BYTES
+
+    if hasattr(os, 'copy_file_range'):
+        copied = 0
+        try:
+            while True:
+                written = os.copy_file_range(source_fd, target_fd, chunk)
+                if written == 0:
+                    return 'copy_file_range'
+                copied += written
+                if pace is not None:
+                    pace(written)
+        except OSError as error:
+            if copied or error.errno not in UNSUPPORTED_ERRORS:
+                raise
+
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        offset = 0
+        try:
+            while True:
+                written = os.sendfile(target_fd, source_fd, offset, chunk)
+                if written == 0:
+                    return 'sendfile'
+                offset += written
+                if pace is not None:
+                    pace(written)
+        except OSError as error:
+            if offset or error.errno not in UNSUPPORTED_ERRORS:
+                raise
+
+    buffer = bytearray(READ_BUFFER)
+    view = memoryview(buffer)
+    while True:
+        read = source.readinto(buffer)
+        if not read:
+            return 'buffered'
+        written = 0
+        while written < read:
+            written += target.write(view[written:read])
+        if pace is not None:
+            pace(read)
+
+
+def copy_file(source_path, destination_path, source_info, fsync=True, pace=None):
+    """
+    Kopiuje plik przez plik tymczasowy w folderze docelowym
+
+    Dane trafiają najpierw do ukrytego pliku .part, który po zapisaniu
+    (i fsync) zmienia nazwę na docelową - przerwane kopiowanie nigdy
+    nie zostawia niekompletnego pliku pod właściwą nazwą.
+
+    Args:
+        pace (callable): Dławienie I/O - patrz _copy_data
+
+    Returns:
+        str: Użyta metoda kopiowania
+    """
+    directory, name = os.path.split(destination_path)
+    temp_fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.part', dir=directory)
+
+    try:
+        with open(source_path, 'rb', buffering=0) as source, os.fdopen(temp_fd, 'wb', buffering=0) as target:
+            method = _copy_data(source, target, pace)
+            if fsync:
+                os.fsync(target.fileno())
+        shutil.copystat(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync:
+        _fsync_directory(directory)
+    return method
+
+
+def _fsync_directory(directory):
+    """ Utrwala wpis katalogu po zmianie nazwy (tam, gdzie system to wspiera) """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
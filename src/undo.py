@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Dziennik cofania operacji dla Smart File Organizer
+Każde przeniesienie/kopia/link jest zapisywane przed wykonaniem (write-ahead),
+a polecenie undo odtwarza dziennik od końca - bez ponownego skanowania drzewa
+
+Uruchomienie: python undo.py --list | python undo.py <run-id>
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import threading
+from config import Config
+from executor import FileResult, FolderCache, run_pipeline
+from transfer import FileTransfer
+
+
+JOURNAL_SUFFIX = '.undo.jsonl'
+
+# Identyfikator uruchomienia: data-czas[.mikrosekundy][-licznik kolizji]
+RUN_ID = re.compile(r'^(\d{8})-(\d{6})(?:\.(\d{6}))?(?:-(\d+))?$')
+
+
+class UndoJournal:
+    """
+    Dziennik jednego uruchomienia, tylko do dopisywania
+
+    Dla każdej operacji zapisywane są dwie linie: zamiar (przed operacją)
+    i potwierdzenie (po niej). Każda linia to jeden zapis O_APPEND, więc
+    po przerwaniu procesu w dzienniku zostaje co najwyżej zamiar bez
+    potwierdzenia - undo rozstrzyga go na podstawie stanu dysku. fsync
+    wykonywany jest co fsync_every linii (i przy zamknięciu).
+
+    Plik (i identyfikator run_id) powstaje dopiero przy pierwszej operacji -
+    uruchomienia bez zmian na dysku (np. co 30 minut ze schedulera) nie
+    zostawiają pustych dzienników. Po zamknięciu zapisanego dziennika
+    usuwane są najstarsze ponad keep_runs.
+    """
+
+    def __init__(self, directory, fsync_every=256, keep_runs=None):
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.keep_runs = keep_runs
+        self.run_id = None      # Ustalany przy otwarciu pliku (pierwsza operacja)
+        self.path = None
+        self._fd = None
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._unsynced = 0
+
+    @classmethod
+    def from_config(cls):
+        """ Dziennik w Config.UNDO_DIRECTORY lub None, gdy cofanie jest wyłączone """
+        if not Config.UNDO_ENABLED:
+            return None
+        return cls(Config.UNDO_DIRECTORY, Config.UNDO_FSYNC_EVERY, Config.UNDO_KEEP_RUNS)
+
+    def _open(self):
+        """ Tworzy plik dziennika (wołane pod blokadą, przy pierwszym zapisie) """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # O_EXCL - równoległe zadania (osobne procesy) nie mogą dostać tego samego identyfikatora
+        timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S.%f')
+        run_id = timestamp
+        counter = 1
+        while True:
+            try:
+                self._fd = os.open(journal_path(run_id, self.directory),
+                                   os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+                break
+            except FileExistsError:
+                run_id = f"{timestamp}-{counter}"
+                counter += 1
+        self.run_id = run_id
+        self.path = journal_path(run_id, self.directory)
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, line)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._fd)
+                self._unsynced = 0
+
+    def begin(self, operation, source, destination, info):
+        """
+        Zapisuje zamiar operacji (przed jej wykonaniem)
+
+        Returns:
+            int: Numer operacji do przekazania do commit()
+        """
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        self._append({'seq': sequence, 'op': operation, 'src': source, 'dst': destination,
+                      'size': info.st_size, 'mtime_ns': info.st_mtime_ns})
+        return sequence
+
+    def commit(self, sequence, operation=None):
+        """ Potwierdza wykonanie operacji (operation - gdy faktycznie wykonano inną, np. MOVE zamiast LINK) """
+        record = {'seq': sequence, 'done': True}
+        if operation:
+            record['op'] = operation
+        self._append(record)
+
+    def close(self):
+        """ Oznacza dziennik jako kompletny i utrwala go (bez operacji - nic nie zapisuje) """
+        with self._lock:
+            if self._fd is None:
+                return
+        self._append({'end': True})
+        with self._lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self.keep_runs:
+            prune_journals(self.keep_runs, self.directory)
+
+
+def journal_path(run_id, directory=None):
+    return os.path.join(directory or Config.UNDO_DIRECTORY, run_id + JOURNAL_SUFFIX)
+
+
+def run_sort_key(run_id):
+    """ Klucz sortowania uruchomień wg czasu (licznik kolizji liczbowo, starsze identyfikatory bez mikrosekund) """
+    match = RUN_ID.match(run_id)
+    if match is None:
+        return (run_id, '', '', 0)
+    date, clock, microseconds, counter = match.groups()
+    return (date, clock, microseconds or '', int(counter or 0))
+
+
+def _journal_runs(directory):
+    """ Identyfikatory uruchomień z dziennikami w folderze, od najnowszego """
+    if not os.path.isdir(directory):
+        return []
+    run_ids = [name[:-len(JOURNAL_SUFFIX)] for name in os.listdir(directory) if name.endswith(JOURNAL_SUFFIX)]
+    return sorted(run_ids, key=run_sort_key, reverse=True)
+
+
+def prune_journals(keep_runs, directory=None):
+    """
+    Usuwa dzienniki starsze niż keep_runs najnowszych
+
+    Returns:
+        int: Liczba usuniętych dzienników
+    """
+    directory = directory or Config.UNDO_DIRECTORY
+    removed = 0
+    for run_id in _journal_runs(directory)[keep_runs:]:
+        try:
+            os.unlink(journal_path(run_id, directory))
+            removed += 1
+        except FileNotFoundError:
+            pass  # Usunięty równolegle przez inny proces
+    return removed
+
+
+def read_journal(path):
+    """
+    Wczytuje dziennik uruchomienia
+
+    Returns:
+        tuple: (lista operacji od najstarszej, czy dziennik jest kompletny, czy został już cofnięty)
+            Operacja to słownik z polami op, src, dst, size, mtime_ns, done
+            (False = zamiar bez potwierdzenia, np. po przerwaniu procesu) oraz reverted
+            (operacja cofnięta przez wczesniejsze, nieudane w całosci undo)
+    """
+    operations = {}
+    complete = undone = False
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue     # Urwana linia po awarii
+            if record.get('end'):
+                complete = True
+            elif record.get('undone'):
+                undone = True
+            elif record.get('reverted'):
+                operation = operations.get(record['seq'])
+                if operation is not None:
+                    operation['reverted'] = True
+            elif record.get('done'):
+                operation = operations.get(record['seq'])
+                if operation is not None:
+                    operation['done'] = True
+                    operation['op'] = record.get('op', operation['op'])
+            else:
+                record['done'] = False
+                record['reverted'] = False
+                operations[record['seq']] = record
+    return [operations[sequence] for sequence in sorted(operations)], complete, undone
+
+
+def list_runs(directory=None):
+    """ Zwraca listę (run_id, liczba operacji, status) od najnowszego """
+    directory = directory or Config.UNDO_DIRECTORY
+
+    runs = []
+    for run_id in _journal_runs(directory):
+        operations, complete, undone = read_journal(journal_path(run_id, directory))
+        status = ("cofnięte" if undone else
+                  "częsciowo cofnięte" if any(operation['reverted'] for operation in operations) else
+                  "kompletne" if complete else "przerwane")
+        runs.append((run_id, len(operations), status))
+    return runs
+
+
+def _matches(info, operation):
+    """
+    Czy plik jest tym samym, który przenieślismy (rozmiar i mtime zachowuje rename i copystat)
+
+    Link do oryginału ma mtime oryginału, więc dla LINK porównujemy tylko rozmiar.
+    """
+    if info.st_size != operation['size']:
+        return False
+    return operation['op'] == "LINK" or info.st_mtime_ns == operation['mtime_ns']
+
+
+def undo_operation(operation, transfer, folders=None):
+    """
+    Cofa jedną operację z dziennika
+
+    MOVE - plik wraca na miejsce (rename na tym samym dysku, kopia zero-copy między dyskami),
+    COPY - kopia jest usuwana, LINK - link wraca na miejsce źródła lub jest usuwany.
+    Pliki zmienione po operacji i zajęte scieżki źródłowe są pomijane.
+
+    Returns:
+        FileResult: Wynik cofnięcia
+    """
+    source = operation['src']
+    destination = operation['dst']
+    filename = os.path.basename(source)
+
+    try:
+        try:
+            info = os.stat(destination)
+        except FileNotFoundError:
+            # Zamiar bez potwierdzenia, którego nie zdążylismy wykonać - nic do cofnięcia
+            status = "NOT_APPLIED" if not operation['done'] else "MISSING"
+            return FileResult("SKIP", filename, destination, source, status,
+                              f"⚠️  Brak pliku do cofnięcia: {destination}")
+
+        if not _matches(info, operation):
+            return FileResult("SKIP", filename, destination, source, "MODIFIED",
+                              f"⚠️  Plik zmieniony po przeniesieniu, pomijam: {destination}")
+
+        source_exists = os.path.lexists(source)
+
+        if operation['op'] == "COPY" or (operation['op'] == "LINK" and source_exists):
+            # Źródło zostało na miejscu - wystarczy usunąć kopię/link
+            os.unlink(destination)
+            return FileResult("UNDO", filename, destination, source, "SUCCESS",
+                              f"🗑️  Usunięto kopię: {destination}", info)
+
+        if source_exists:
+            # Przerwane przeniesienie między dyskami: kopia gotowa, źródło jeszcze nieusunięte
+            if not operation['done']:
+                os.unlink(destination)
+                return FileResult("UNDO", filename, destination, source, "SUCCESS",
+                                  f"🗑️  Usunięto niedokończoną kopię: {destination}", info)
+            return FileResult("SKIP", filename, destination, source, "SOURCE_EXISTS",
+                              f"⚠️  Scieżka źródłowa jest zajęta: {source}")
+
+        if folders is not None:
+            folders.ensure(os.path.dirname(source))
+        else:
+            os.makedirs(os.path.dirname(source), exist_ok=True)
+        transfer.transfer(destination, source, info)
+        return FileResult("UNDO", filename, destination, source, "SUCCESS",
+                          f"↩️  Przywrócono: {filename} → {os.path.dirname(source)}", info)
+
+    except Exception as e:
+        return FileResult("ERROR", filename, destination, source, str(e),
+                          f"❌ Błąd przy cofaniu {filename}: {str(e)}")
+
+
+def undo_run(run_id, workers=None, directory=None):
+    """
+    Cofa uruchomienie na podstawie jego dziennika
+
+    Operacje odtwarzane są od najnowszej, w puli wątków (cele w jednym
+    uruchomieniu są unikalne, więc kolejnosć w obrębie partii nie ma znaczenia).
+    Każda cofnięta operacja jest dopisywana do dziennika, a znacznik "cofnięte"
+    dostaje on tylko wtedy, gdy nie było błędów - ponowne undo (np. po
+    zwolnieniu miejsca na dysku) powtarza wyłącznie operacje jeszcze niecofnięte.
+
+    Returns:
+        dict: Liczniki moved (cofnięte), skipped, errors lub None, gdy brak dziennika
+    """
+    # Import tutaj - file_organizer importuje ten moduł
+    from file_organizer import tally_results
+    from logger import setup_logger, setup_console, flush_logger
+
+    path = journal_path(run_id, directory)
+    if not os.path.exists(path):
+        print(f"❌ Brak dziennika uruchomienia: {run_id}")
+        return None
+    if workers is None:
+        workers = Config.MAX_WORKERS
+
+    operations, complete, undone = read_journal(path)
+    if undone:
+        print(f"⚠️  Uruchomienie {run_id} zostało już cofnięte")
+        return None
+    reverted = sum(1 for operation in operations if operation['reverted'])
+    operations = [operation for operation in operations if not operation['reverted']]
+
+    logger = setup_logger(Config.LOG_DIRECTORY) if Config.LOG_ENABLED else None
+    console = setup_console()
+
+    print("=" * 50)
+    print(f"↩️  COFANIE URUCHOMIENIA {run_id}")
+    print("=" * 50)
+    print(f"📋 Operacji w dzienniku: {len(operations)}" + ("" if complete else " (uruchomienie przerwane)")
+          + (f", cofniętych wczesniej: {reverted}" if reverted else ""))
+    if logger:
+        logger.info(f"Cofanie uruchomienia {run_id}: {len(operations)} operacji")
+
+    transfer = FileTransfer(move=True, fsync=Config.FSYNC_COPIES)
+    folders = FolderCache()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    # Nowa linia - ostatnia linia mogła zostać urwana przez awarię
+    os.write(fd, b'\n')
+
+    def undo(operation):
+        result = undo_operation(operation, transfer, folders)
+        if result.operation == "UNDO":
+            # Jeden zapis O_APPEND na linię - bezpieczny z wielu wątków
+            os.write(fd, (json.dumps({'seq': operation['seq'], 'reverted': True}) + '\n').encode('utf-8'))
+        return result
+
+    try:
+        counts = tally_results(run_pipeline(reversed(operations), undo, workers), logger, console=console)
+        if not counts['errors']:
+            os.write(fd, (json.dumps({'undone': True}) + '\n').encode('utf-8'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+        flush_logger(console)
+        flush_logger(logger)
+
+    print(f"\n↩️  Cofnięto: {counts['moved']}, pominięto: {counts['skipped']}, błędów: {counts['errors']}")
+    print(f"🚚 Transfer: {transfer.stats.summary()}")
+    if counts['errors']:
+        print(f"🔁 Po usunięciu przyczyny błędów ponów: python undo.py {run_id} (tylko operacje niecofnięte)")
+    if logger:
+        logger.info(f"Cofanie zakończone, Cofnięto: {counts['moved']}, Pominięto: {counts['skipped']}, "
+                    f"Błędów: {counts['errors']}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cofanie operacji Smart File Organizer")
+    parser.add_argument('run_id', nargs='?', help="Identyfikator uruchomienia do cofnięcia")
+    parser.add_argument('--list', action='store_true', help="Pokaż zapisane uruchomienia")
+    parser.add_argument('--workers', type=int, help="Liczba wątków (domyslnie Config.MAX_WORKERS)")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.run_id:
+        for run_id, count, status in list_runs():
+            print(f"{run_id}  operacji: {count:<8} {status}")
+        return None
+    return undo_run(args.run_id, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+Tryb obserwacji folderu dla Smart File Organizer
+Organizuje pliki zaraz po ich pojawieniu się zamiast cyklicznego skanowania
+(inotify na Linuksie, porównywanie migawek folderów na pozostałych systemach)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from config import Config
+from scanner import ScanStats, PathEntry
+from executor import DestinationLocks, FolderCache, run_pipeline
+from file_organizer import organize_files, create_folders, create_processor, tally_results
+from logger import setup_console
+from transfer import FileTransfer
+from undo import UndoJournal
+from metrics import WATCH_PENDING
+from source_lock import SourceLock
+
+
+# Rodzaje zdarzeń zgłaszanych przez źródła zdarzeń
+CHANGED = 'changed'      # Plik jest zapisywany - czekamy, aż się ustabilizuje
+CLOSED = 'closed'        # Plik zamknięty po zapisie - sprawdzamy stabilnosć od tego momentu
+COMPLETE = 'complete'    # Plik kompletny (przeniesiony atomowo do folderu)
+DIRECTORY = 'directory'  # Nowy podfolder (tryb rekurencyjny)
+RESCAN = 'rescan'        # Utracono zdarzenia - trzeba przejrzeć obserwowane foldery
+
+
+class InotifySource:
+    """ Źródło zdarzeń oparte na inotify (Linux, przez ctypes - bez dodatkowych bibliotek) """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT_HEADER = struct.Struct('iIII')
+    READ_SIZE = 256 * 1024
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify jest dostępne tylko na Linuksie")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._watches = {}
+
+    def add_watch(self, path):
+        """ Zaczyna obserwować folder """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        self._watches[wd] = path
+
+    def watched_directories(self):
+        return list(self._watches.values())
+
+    def read(self, timeout):
+        """
+        Czeka na zdarzenia najwyżej timeout sekund
+
+        Returns:
+            list: Pary (rodzaj zdarzenia, scieżka)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, self.READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                events.append((RESCAN, None))
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    events.append((DIRECTORY, path))
+            elif mask & self.IN_MOVED_TO:
+                events.append((COMPLETE, path))
+            elif mask & self.IN_CLOSE_WRITE:
+                events.append((CLOSED, path))
+            else:
+                events.append((CHANGED, path))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """ Przenosne źródło zdarzeń: porównuje migawki obserwowanych folderów co interval sekund """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._snapshots = {}
+        self._next_poll = time.monotonic() + interval
+
+    @staticmethod
+    def _snapshot(directory):
+        """ Zwraca słownik nazwa -> (czy folder, rozmiar, mtime) """
+        snapshot = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        snapshot[entry.name] = (True, 0, 0)
+                    elif entry.is_file():
+                        info = entry.stat()
+                        snapshot[entry.name] = (False, info.st_size, info.st_mtime_ns)
+                except OSError:
+                    continue
+        return snapshot
+
+    def add_watch(self, path):
+        """ Zaczyna obserwować folder (bieżąca zawartosć nie generuje zdarzeń) """
+        self._snapshots[path] = self._snapshot(path)
+
+    def watched_directories(self):
+        return list(self._snapshots)
+
+    def read(self, timeout):
+        """ Czeka do następnego porównania migawek (najwyżej timeout sekund) """
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+
+        events = []
+        for directory, previous in list(self._snapshots.items()):
+            try:
+                current = self._snapshot(directory)
+            except OSError:
+                del self._snapshots[directory]
+                continue
+
+            for name, signature in current.items():
+                if previous.get(name) != signature:
+                    kind = DIRECTORY if signature[0] else CLOSED
+                    events.append((kind, os.path.join(directory, name)))
+            self._snapshots[directory] = current
+
+        return events
+
+    def close(self):
+        self._snapshots.clear()
+
+
+class FolderWatcher:
+    """
+    Obserwuje folder źródłowy i organizuje nowe pliki
+
+    Plik trafia do organizacji dopiero, gdy jego rozmiar i mtime nie zmieniły
+    się przez okno WATCH_SETTLE_SECONDS (plik nie jest już zapisywany).
+    Gotowe pliki zbierane są w partie, dzięki czemu seria zdarzeń
+    (np. rozpakowanie archiwum) jest obsługiwana jednym przebiegiem puli wątków.
+    """
+
+    def __init__(self, source_folder=None, destination_folder=None, logger=None, workers=None):
+        self.source_folder = os.path.abspath(source_folder or Config.DEFAULT_SOURCE)
+        self.destination_folder = os.path.abspath(destination_folder or Config.DEFAULT_DESTINATION)
+        self.logger = logger
+        self.workers = workers or Config.MAX_WORKERS
+
+        self.settle_seconds = Config.WATCH_SETTLE_SECONDS
+        self.batch_seconds = Config.WATCH_BATCH_SECONDS
+        self.batch_size = Config.WATCH_BATCH_SIZE
+
+        self.source = None
+        self.process = None
+        self.destination_locks = None
+        self.duplicates = None
+        self.console = None
+        self.journal = None
+        self.is_running = False
+        self.totals = {'moved': 0, 'copied': 0, 'skipped': 0, 'errors': 0, 'unchanged': 0}
+
+        self._pending = {}        # scieżka -> (sygnatura (rozmiar, mtime) lub None, termin sprawdzenia)
+        self._ready = {}          # scieżka -> PathEntry gotowy do organizacji
+        self._batch_started = None
+        self._pruned = set()
+
+    def _create_source(self):
+        """ Wybiera inotify, a gdy jest niedostępne - porównywanie migawek """
+        if Config.WATCH_USE_INOTIFY:
+            try:
+                return InotifySource()
+            except (OSError, AttributeError):
+                pass
+        return PollingSource(Config.WATCH_POLL_SECONDS)
+
+    def _depth(self, path):
+        """ Głębokosć folderu względem folderu źródłowego """
+        return os.path.relpath(path, self.source_folder).count(os.sep) + 1
+
+    def _watch_tree(self, folder, enqueue_files):
+        """
+        Dodaje folder (i w trybie rekurencyjnym jego podfoldery) do obserwacji
+
+        Args:
+            folder (str): Folder do obserwacji
+            enqueue_files (bool): Czy dodać istniejące pliki do kolejki
+                                  (nowy folder mógł zostać przeniesiony razem z plikami)
+        """
+        stack = [folder]
+        while stack:
+            directory = stack.pop()
+            try:
+                self.source.add_watch(directory)
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=Config.FOLLOW_SYMLINKS):
+                    if self._accepts_directory(entry.path):
+                        stack.append(entry.path)
+                elif enqueue_files:
+                    self._mark_changed(entry.path, None)
+
+    def _accepts_directory(self, path):
+        """ Czy nowy podfolder należy obserwować """
+        if not Config.RECURSIVE:
+            return False
+        if os.path.normcase(path) in self._pruned:
+            return False
+        return not (Config.MAX_DEPTH and self._depth(path) > Config.MAX_DEPTH)
+
+    @staticmethod
+    def _file_info(path):
+        """ Zwraca (stat, czy link) dla zwykłego pliku lub (None, False) """
+        try:
+            info = os.lstat(path)
+            is_symlink = stat.S_ISLNK(info.st_mode)
+            if is_symlink:
+                info = os.stat(path)
+        except OSError:
+            return None, False
+        if not stat.S_ISREG(info.st_mode):
+            return None, False
+        return info, is_symlink
+
+    def _mark_changed(self, path, signature):
+        """ Odkłada sprawdzenie stabilnosci pliku o okno WATCH_SETTLE_SECONDS """
+        self._ready.pop(path, None)
+        self._pending[path] = (signature, time.monotonic() + self.settle_seconds)
+
+    def _mark_ready(self, path, info, is_symlink):
+        self._pending.pop(path, None)
+        self._ready[path] = PathEntry(path, info, is_symlink)
+        if self._batch_started is None:
+            self._batch_started = time.monotonic()
+
+    def _handle_event(self, kind, path):
+        """ Obsługuje pojedyncze zdarzenie ze źródła """
+        if kind == RESCAN:
+            for directory in self.source.watched_directories():
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if not entry.is_dir(follow_symlinks=False):
+                                self._mark_changed(entry.path, None)
+                except OSError:
+                    continue
+        elif kind == DIRECTORY:
+            if self._accepts_directory(path):
+                self._watch_tree(path, enqueue_files=True)
+        elif kind == COMPLETE:
+            info, is_symlink = self._file_info(path)
+            if info is not None:
+                self._mark_ready(path, info, is_symlink)
+        elif kind == CLOSED:
+            info, _ = self._file_info(path)
+            if info is not None:
+                self._mark_changed(path, (info.st_size, info.st_mtime_ns))
+        else:
+            self._mark_changed(path, None)
+
+    def _check_pending(self):
+        """ Przenosi do partii pliki, których rozmiar i mtime się nie zmieniły """
+        now = time.monotonic()
+        for path, (signature, deadline) in list(self._pending.items()):
+            if deadline > now:
+                continue
+
+            info, is_symlink = self._file_info(path)
+            if info is None:
+                del self._pending[path]
+                continue
+
+            current = (info.st_size, info.st_mtime_ns)
+            if current == signature:
+                self._mark_ready(path, info, is_symlink)
+            else:
+                self._pending[path] = (current, now + self.settle_seconds)
+
+    def _next_timeout(self):
+        """ Jak długo można czekać na zdarzenia bez opóźniania pracy """
+        now = time.monotonic()
+        deadlines = [deadline for _, deadline in self._pending.values()]
+        if self._batch_started is not None:
+            deadlines.append(self._batch_started + self.batch_seconds)
+        if not deadlines:
+            return 1.0
+        return min(1.0, max(0.0, min(deadlines) - now))
+
+    def _batch_due(self):
+        if not self._ready:
+            return False
+        if len(self._ready) >= self.batch_size:
+            return True
+        return time.monotonic() - self._batch_started >= self.batch_seconds
+
+    def flush(self):
+        """ Organizuje zebraną partię gotowych plików """
+        if not self._ready:
+            return
+
+        entries = list(self._ready.values())
+        self._ready.clear()
+        self._batch_started = None
+        # Między partiami pliki mogły trafić do folderów docelowych spoza organizera -
+        # wolne nazwy są sprawdzane na dysku, całe foldery wczytywane na nowo co WATCH_RESCAN_SECONDS
+        self.destination_locks.refresh(Config.WATCH_RESCAN_SECONDS)
+
+        counts = tally_results(run_pipeline(entries, self.process, self.workers), self.logger,
+                               console=self.console)
+        for key, value in counts.items():
+            self.totals[key] += value
+
+        if self.logger:
+            self.logger.info(f"Obserwacja - partia {len(entries)} plików, Przeniesiono: {counts['moved']}, "
+                             f"Pominięto: {counts['skipped']}, Błędów: {counts['errors']}")
+
+    def run(self, initial_scan=True):
+        """
+        Uruchamia obserwację (blokuje do wywołania stop() lub Ctrl+C)
+
+        Folder źródłowy jest zablokowany (source_lock.py) przez całą sesję -
+        zaplanowane zadania i ręczne uruchomienia na tym folderze są w tym
+        czasie pomijane.
+
+        Args:
+            initial_scan (bool): Czy najpierw zorganizować pliki, które już są w folderze
+
+        Returns:
+            bool: False, gdy folder źródłowy organizuje już inny proces
+        """
+        source_lock = SourceLock.from_config(self.source_folder)
+        if source_lock is not None and not source_lock.acquire():
+            message = (f"Folder źródłowy jest już organizowany przez inny proces "
+                       f"(PID {source_lock.holder()}): {self.source_folder}")
+            print(f"❌ {message} - obserwacja nie została uruchomiona")
+            if self.logger:
+                self.logger.error(message)
+            return False
+        try:
+            self._run(initial_scan)
+        finally:
+            if source_lock is not None:
+                source_lock.release()
+        return True
+
+    def _run(self, initial_scan):
+        folders = FolderCache()
+        categories = create_folders(self.destination_folder, folders)
+        self._pruned = {os.path.normcase(self.destination_folder)}
+        self._pruned.update(os.path.normcase(os.path.join(self.destination_folder, name)) for name in categories)
+
+        # Obserwacja rusza przed wstępnym skanowaniem - zdarzenia plików utworzonych
+        # w jego trakcie czekają w kolejce (plik już przeniesiony przez skanowanie
+        # zostanie przy sprawdzeniu pominięty)
+        self.source = self._create_source()
+        self._watch_tree(self.source_folder, enqueue_files=False)
+        if initial_scan:
+            try:
+                organize_files(self.source_folder, self.destination_folder, workers=self.workers,
+                               lock_source=False)
+            except BaseException:
+                self.source.close()
+                raise
+
+        # Indeks duplikatów po wstępnym skanowaniu - zawiera pliki, które ono przeniosło
+        if Config.DEDUP_POLICY:
+            from dedup import DuplicateIndex
+            self.duplicates = DuplicateIndex.from_config(self.destination_folder, categories)
+        self.journal = UndoJournal.from_config()
+        self.destination_locks = DestinationLocks()
+        self.process = create_processor(self.destination_folder, ScanStats(), FileTransfer.from_config(),
+                                        duplicates=self.duplicates, journal=self.journal,
+                                        source_folder=self.source_folder, folders=folders,
+                                        destination_locks=self.destination_locks)
+        self.console = setup_console()
+
+        mode = "inotify" if isinstance(self.source, InotifySource) else f"migawki co {Config.WATCH_POLL_SECONDS} s"
+        print(f"👀 Obserwuję folder: {self.source_folder} ({mode})")
+        if self.logger:
+            self.logger.info(f"Tryb obserwacji uruchomiony: {self.source_folder} ({mode})")
+
+        self.is_running = True
+        try:
+            while self.is_running:
+                for kind, path in self.source.read(self._next_timeout()):
+                    self._handle_event(kind, path)
+                self._check_pending()
+                WATCH_PENDING.set(len(self._pending) + len(self._ready))
+                if self._batch_due():
+                    self.flush()
+        finally:
+            self.flush()
+            self.source.close()
+            if self.duplicates is not None:
+                self.duplicates.close()
+            if self.journal is not None:
+                self.journal.close()
+                if self.journal.run_id:
+                    print(f"↩️  Cofnięcie operacji z obserwacji: python undo.py {self.journal.run_id}")
+
+    def stop(self):
+        """ Zatrzymuje obserwację po bieżącej iteracji """
+        self.is_running = False
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC)
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def isolated_config(monkeypatch, tmp_path):
+    """ Pliki stanu, blokad i logów w katalogu tymczasowym, bez logów i linii per plik """
+    state = tmp_path / 'state'
+    for attribute, value in {
+        'LOG_ENABLED': False,
+        'QUIET': True,
+        'LOG_DIRECTORY': str(tmp_path / 'logs'),
+        'STATE_FILE': str(state / 'scan_state.sqlite'),
+        'HASH_CACHE_FILE': str(state / 'hash_cache.sqlite'),
+        'UNDO_DIRECTORY': str(state / 'undo'),
+        'CHECKPOINT_DIRECTORY': str(state / 'checkpoints'),
+        'JOBS_STATE_DIRECTORY': str(state / 'jobs'),
+        'LOCK_DIRECTORY': str(state / 'locks'),
+        'PLAN_DIRECTORY': str(tmp_path / 'plans'),
+    }.items():
+        monkeypatch.setattr(Config, attribute, value)
+    return tmp_path
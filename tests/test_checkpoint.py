@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import file_organizer
+from config import Config
+
+
+def test_interrupted_run_resumes_where_it_stopped(isolated_config, monkeypatch):
+    monkeypatch.setattr(Config, 'MOVE_FILES', False)   # Kopie - źródło zostaje, wznowienie musi pominąć obsłużone
+    source = isolated_config / 'in'
+    (source / 'sub').mkdir(parents=True)
+    for path in ('a.pdf', 'b.pdf', 'sub/c.pdf'):
+        (source / path).write_text(path)
+    destination = isolated_config / 'out'
+
+    applied = []
+    interrupt_after = [2]
+    apply_entry = file_organizer.apply_entry
+
+    def counting_apply(plan_entry, *args, **kwargs):
+        if len(applied) == interrupt_after[0]:
+            raise KeyboardInterrupt
+        applied.append(os.path.basename(plan_entry.source))
+        return apply_entry(plan_entry, *args, **kwargs)
+
+    monkeypatch.setattr(file_organizer, 'apply_entry', counting_apply)
+    with pytest.raises(KeyboardInterrupt):
+        file_organizer.organize_files(str(source), str(destination), workers=1, recursive=True)
+    assert len(os.listdir(Config.CHECKPOINT_DIRECTORY)) == 1
+
+    interrupt_after[0] = None
+    assert file_organizer.organize_files(str(source), str(destination), workers=1, recursive=True)
+
+    # Drugie uruchomienie obsłużyło tylko plik, do którego pierwsze nie doszło
+    assert sorted(applied) == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert sorted(os.listdir(destination / 'Documents')) == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert os.listdir(Config.CHECKPOINT_DIRECTORY) == []
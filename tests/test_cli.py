@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+from benchmark import STARTUP_BUDGET_MS, STARTUP_FORBIDDEN_MODULES
+from config import Config
+from conftest import SRC
+
+# -X importtime sam dokłada narzut, a maszyny CI bywają zajęte - łączny czas importów
+# (najlepszy z kilku pomiarów) może przekroczyć budżet startu najwyżej o 50%
+IMPORT_TIME_TOLERANCE = 1.5
+IMPORT_TIME_RUNS = 3
+
+
+@pytest.fixture
+def restore_config(isolated_config, monkeypatch):
+    """ cli.main nadpisuje atrybuty Config - przywracane po tescie """
+    for attribute, value in Config.snapshot().items():
+        monkeypatch.setattr(Config, attribute, value)
+    return isolated_config
+
+
+def _import_trace():
+    """ -X importtime dla cli.py organize --help: (zaimportowane moduły, łączny czas importów w ms) """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(SRC, 'cli.py'), 'organize', '--help'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    imported = set()
+    total_us = 0
+    # Linie "import time: własny | łącznie | moduł" - moduły najwyższego poziomu bez wcięcia
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        imported.add(name.strip())
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+    return imported, total_us / 1000
+
+
+def test_help_does_not_import_subsystems():
+    imported, _ = _import_trace()
+
+    assert 'argparse' in imported
+    assert not imported & set(STARTUP_FORBIDDEN_MODULES)
+
+
+def test_help_import_time_within_budget():
+    import_ms = min(_import_trace()[1] for _ in range(IMPORT_TIME_RUNS))
+
+    assert import_ms <= STARTUP_BUDGET_MS * IMPORT_TIME_TOLERANCE
+
+
+def test_cli_flags_reach_jobs(restore_config):
+    source = restore_config / 'inbox'
+    (source / 'nested').mkdir(parents=True)
+    (source / 'nested' / 'a.pdf').write_text('a')
+    destination = restore_config / 'archive'
+    jobs_file = restore_config / 'jobs.json'
+    jobs_file.write_text(json.dumps({'jobs': [
+        {'name': 'inbox', 'source': str(source), 'destination': str(destination), 'move_files': True},
+    ]}))
+
+    assert cli.main(['organize', '--jobs', str(jobs_file), '--copy', '--recursive', '--no-log']) == 0
+
+    assert (source / 'nested' / 'a.pdf').exists()
+    assert (destination / 'Documents' / 'a.pdf').read_text() == 'a'
+
+
+def test_jobs_reject_folder_arguments(restore_config, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(['organize', 'inbox', '--jobs', 'jobs.json'])
+
+    assert exit_info.value.code == 2
+    assert '--jobs' in capsys.readouterr().err
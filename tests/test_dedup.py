@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from config import Config
+from dedup import DuplicateIndex, HashCache
+from file_organizer import organize_files
+from planner import read_plan
+
+
+def test_plan_does_not_write_hash_cache(isolated_config, monkeypatch):
+    monkeypatch.setattr(Config, 'DEDUP_POLICY', 'skip')
+    source = isolated_config / 'in'
+    source.mkdir()
+    (source / 'b.pdf').write_text('same')
+    destination = isolated_config / 'out'
+    (destination / 'Documents').mkdir(parents=True)
+    (destination / 'Documents' / 'a.pdf').write_text('same')
+    os.makedirs(os.path.dirname(Config.HASH_CACHE_FILE))
+    HashCache(Config.HASH_CACHE_FILE).close()
+    before = os.stat(Config.HASH_CACHE_FILE)
+    plan = isolated_config / 'plan.jsonl'
+
+    organize_files(str(source), str(destination), dry_run=True, plan_path=str(plan))
+
+    _, entries = read_plan(str(plan))
+    entry, = entries
+    assert (entry.reason, entry.original) == ('DUPLICATE', str(destination / 'Documents' / 'a.pdf'))
+    after = os.stat(Config.HASH_CACHE_FILE)
+    assert (after.st_size, after.st_mtime_ns) == (before.st_size, before.st_mtime_ns)
+    cache = HashCache(Config.HASH_CACHE_FILE)
+    assert cache.get(os.stat(source / 'b.pdf')) == (None, None)
+    cache.close()
+
+
+@pytest.fixture
+def index(isolated_config):
+    duplicates = DuplicateIndex(HashCache(str(isolated_config / 'hashes.sqlite')))
+    yield duplicates
+    duplicates.close()
+
+
+def _file(folder, name, content):
+    path = folder / name
+    path.write_bytes(content)
+    return str(path), os.stat(path)
+
+
+def test_unique_size_is_not_hashed(index, tmp_path):
+    original, _ = _file(tmp_path, 'original.bin', b'a' * 10)
+    index.add(original, 10)
+    path, info = _file(tmp_path, 'other.bin', b'a' * 11)
+
+    assert index.find_duplicate(path, info) is None
+    assert index.cache.misses == 0
+
+
+def test_same_size_compared_by_content(index, tmp_path):
+    original, original_info = _file(tmp_path, 'original.bin', b'abc' * 5000)
+    index.add(original, original_info.st_size)
+    different, different_info = _file(tmp_path, 'different.bin', b'abc' * 2500 + b'xyz' * 2500)
+    copy, copy_info = _file(tmp_path, 'copy.bin', b'abc' * 5000)
+
+    # Inny koniec pliku - odpada już na skrócie częsciowym
+    assert index.find_duplicate(different, different_info) is None
+    assert index.find_duplicate(copy, copy_info) == original
+    assert index.found == 1
+
+
+def test_hash_cache_entry_invalidated_by_change(index, tmp_path):
+    path, info = _file(tmp_path, 'a.bin', b'pierwsza')
+    first = index.cache.full(path, info)
+    assert index.cache.get(info)[1] == first
+
+    changed, changed_info = _file(tmp_path, 'a.bin', b'druga wersja')
+
+    assert index.cache.get(changed_info) == (None, None)
+    assert index.cache.full(changed, changed_info) != first
+    assert index.cache.misses == 2
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from executor import DestinationLocks
+
+
+def test_refresh_checks_names_without_relisting(tmp_path):
+    (tmp_path / 'a.pdf').write_text('a')
+    locks = DestinationLocks()
+    assert locks.reserve_numbered(str(tmp_path), 'a.pdf') == 'a (2).pdf'
+
+    locks.refresh()
+    (tmp_path / 'b.pdf').write_text('b')   # Spoza organizera, między partiami
+
+    assert locks.reserve(str(tmp_path), 'c.pdf')
+    assert locks.listed_directories == 1
+    assert not locks.reserve(str(tmp_path), 'b.pdf')
+    assert locks.stale_names == 1 and locks.listed_directories == 2
+
+
+def test_refresh_with_max_age_forgets_removed_files(tmp_path):
+    (tmp_path / 'a.pdf').write_text('a')
+    locks = DestinationLocks()
+    assert not locks.reserve(str(tmp_path), 'a.pdf')
+
+    (tmp_path / 'a.pdf').unlink()
+    locks.refresh(max_age=0)
+
+    assert locks.reserve(str(tmp_path), 'a.pdf')
+    assert locks.listed_directories == 2
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import os
+
+from config import Config
+from jobs import Job, JobRunner
+
+
+def test_parent_settings_reach_job_process(isolated_config, monkeypatch):
+    # Proces zadania (spawn) importuje Config od nowa - nadpisanie musi dotrzeć w migawce
+    monkeypatch.setattr(Config, 'MOVE_FILES', False)
+    source = isolated_config / 'src'
+    source.mkdir()
+    (source / 'a.pdf').write_text('a')
+    destination = isolated_config / 'dst'
+
+    results = JobRunner(worker_budget=2).run([Job('copy', str(source), str(destination))])
+
+    assert results == {'copy': True}
+    assert (source / 'a.pdf').exists()
+    assert (destination / 'Documents' / 'a.pdf').read_text() == 'a'
+
+
+def test_job_settings_layer_over_snapshot(isolated_config, monkeypatch):
+    monkeypatch.setattr(Config, 'MOVE_FILES', False)
+    monkeypatch.setattr(Config, 'RECURSIVE', True)
+
+    settings = Job('scans', 'src', 'dst', {'MOVE_FILES': True}, workers=3).resolved_settings()
+
+    assert settings['MOVE_FILES'] is True
+    assert settings['RECURSIVE'] is True
+    assert settings['MAX_WORKERS'] == 3
+    assert settings['LOG_DIRECTORY'] == os.path.join(Config.LOG_DIRECTORY, 'scans')
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import time
+
+from logger import SegmentRotatingHandler
+
+
+def _emit(handler, message):
+    handler.emit(logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None))
+
+
+def test_rotation_interval_anchored_to_segment_start(tmp_path):
+    path = str(tmp_path / 'organizer.log')
+    first = SegmentRotatingHandler(path, interval_seconds=3600, compress=False)
+    _emit(first, 'pierwszy')
+    deadline = first.rollover_at
+    first.close()
+
+    # Kolejny proces dopisuje do segmentu (mtime rosnie) - termin rotacji się nie przesuwa
+    os.utime(path, (time.time() + 600, time.time() + 600))
+    second = SegmentRotatingHandler(path, interval_seconds=3600, compress=False)
+    _emit(second, 'drugi')
+    second.close()
+
+    assert abs(second.rollover_at - deadline) < 1
+    assert not second.segments()
+
+
+def test_segment_without_header_rotates_on_first_record(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text('{"operation": "MOVE"}\n')
+
+    handler = SegmentRotatingHandler(str(path), interval_seconds=3600, compress=False)
+    _emit(handler, '{"operation": "COPY"}')
+    handler.close()
+
+    assert len(handler.segments()) == 1
+    assert path.read_text().splitlines()[0].startswith('{"segment_started": ')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from dedup import full_hash
+from executor import DestinationLocks
+from planner import reserve_destination
+
+
+@pytest.fixture
+def collision(tmp_path):
+    """ Folder docelowy z plikiem a.pdf i nowszy plik źródłowy o tej samej nazwie """
+    folder = tmp_path / 'Documents'
+    folder.mkdir()
+    (folder / 'a.pdf').write_text('stary')
+    source = tmp_path / 'a.pdf'
+    source.write_text('nowy')
+    os.utime(folder / 'a.pdf', ns=(1_000_000_000, 1_000_000_000))
+    return str(folder), str(source), os.stat(source)
+
+
+def _reserve(collision, policy, locks=None):
+    folder, source, info = collision
+    return reserve_destination(folder, 'a.pdf', source, info, locks or DestinationLocks(), policy)
+
+
+def test_free_name_is_reserved_as_is(tmp_path):
+    source = tmp_path / 'b.pdf'
+    source.write_text('b')
+
+    assert reserve_destination(str(tmp_path / 'Documents'), 'b.pdf', str(source), os.stat(source),
+                               DestinationLocks(), 'skip') == ('b.pdf', None)
+
+
+def test_skip_policy_leaves_file(collision):
+    assert _reserve(collision, 'skip') == (None, None)
+
+
+def test_number_policy_counts_up(collision):
+    locks = DestinationLocks()
+
+    assert _reserve(collision, 'number', locks) == ('a (2).pdf', 'RENAMED')
+    assert _reserve(collision, 'number', locks) == ('a (3).pdf', 'RENAMED')
+
+
+def test_hash_policy_names_by_content(collision):
+    folder, source, _ = collision
+    locks = DestinationLocks()
+    expected = f"a_{full_hash(source)[:12]}.pdf"
+
+    assert _reserve(collision, 'hash', locks) == (expected, 'RENAMED')
+    # Ta sama nazwa = ta sama zawartosć - drugi taki plik jest pomijany
+    assert _reserve(collision, 'hash', locks) == (None, None)
+
+
+def test_overwrite_newer_only_once_per_run(collision):
+    locks = DestinationLocks()
+
+    assert _reserve(collision, 'overwrite_newer', locks) == ('a.pdf', 'OVERWRITE')
+    assert _reserve(collision, 'overwrite_newer', locks) == (None, None)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from rules import RuleEngine
+
+
+@pytest.fixture
+def info(tmp_path):
+    path = tmp_path / 'plik'
+    path.write_bytes(b'x')
+    return os.stat(path)
+
+
+def _match(rules, name, info, root='/src'):
+    rule = RuleEngine(rules, root).match(name, os.path.join(root, name), info)
+    return rule.name if rule else None
+
+
+@pytest.mark.parametrize('regex, name, expected', [
+    ('^foo|bar', 'xbar.txt', 'r'),   # Gałąź bez ^ działa jak re.search
+    ('^foo|bar', 'foo.txt', 'r'),
+    ('^foo', 'xfoo.txt', None),
+    (r'\Afoo', 'foo.txt', 'r'),
+    ('^(?:a|b)x', 'bx.txt', 'r'),
+    ('^(?:a|b)x', 'cbx.txt', None),
+])
+def test_regex_anchoring_follows_search(info, regex, name, expected):
+    assert _match([{'name': 'r', 'regex': regex, 'destination': 'R'}], name, info) == expected
+
+
+RULES = [
+    {'name': 'duże', 'extensions': ['.pdf'], 'min_size_mb': 1, 'destination': 'Duże'},
+    {'name': 'faktury', 'glob': 'faktura_*', 'destination': 'Faktury'},
+    {'name': 'raporty', 'regex': 'raport', 'destination': 'Raporty'},
+    {'name': 'archiwa', 'extensions': ['.tar.gz'], 'destination': 'Archiwa'},
+    {'name': 'płytkie', 'max_depth': 0, 'destination': 'Płytkie'},
+]
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('faktura_raport.pdf', 'faktury'),    # Reguła z rozszerzeniem odpada na rozmiarze, glob przed regexem
+    ('roczny_raport.tar.gz', 'raporty'),  # Wzorzec nazwy przed regułą sufiksu
+    ('kopia.tar.gz', 'archiwa'),          # Sufiks złożony, przed regułą bez wzorca
+    ('Faktura_1.txt', 'faktury'),         # Glob bez rozróżniania wielkosci liter
+    ('notatka.txt', 'płytkie'),
+])
+def test_first_matching_rule_wins(info, name, expected):
+    assert _match(RULES, name, info) == expected
+
+
+def test_no_rule_matches_deeper_file(info):
+    rule = RuleEngine(RULES, '/src').match('notatka.txt', '/src/a/notatka.txt', info)
+
+    assert rule is None
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from source_lock import SourceLock
+from watcher import FolderWatcher
+
+
+def test_lock_is_exclusive(isolated_config):
+    lock = SourceLock(str(isolated_config / 'src'))
+    assert lock.acquire()
+    try:
+        other = SourceLock(str(isolated_config / 'src' / ''))
+        assert not other.acquire()
+        assert other.holder() is not None
+    finally:
+        lock.release()
+    assert SourceLock(str(isolated_config / 'src')).holder() is None
+
+
+def test_watch_refuses_locked_source(isolated_config):
+    source = isolated_config / 'src'
+    source.mkdir()
+    (source / 'a.pdf').write_text('a')
+
+    with SourceLock(str(source)) as lock:
+        assert lock.acquire()
+        watcher = FolderWatcher(str(source), str(isolated_config / 'dst'))
+        assert watcher.run() is False
+
+    assert (source / 'a.pdf').exists()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+
+import pytest
+
+import transfer
+from transfer import FileTransfer
+
+
+@pytest.fixture
+def files(tmp_path):
+    source = tmp_path / 'src' / 'a.pdf'
+    source.parent.mkdir()
+    source.write_bytes(b'zawartosc' * 1000)
+    os.utime(source, ns=(1_000_000_000, 1_000_000_000))
+    destination = tmp_path / 'dst' / 'a.pdf'
+    destination.parent.mkdir()
+    return source, destination
+
+
+def _other_device(mover, monkeypatch):
+    """ Folder docelowy jak na innym systemie plików """
+    monkeypatch.setattr(mover, 'device', lambda directory: -1)
+
+
+def test_cross_device_move_copies_and_removes_source(files, monkeypatch):
+    source, destination = files
+    mover = FileTransfer(move=True, fsync=False)
+    _other_device(mover, monkeypatch)
+
+    method = mover.transfer(str(source), str(destination), os.stat(source))
+
+    assert method != 'rename'
+    assert not source.exists()
+    assert destination.read_bytes() == b'zawartosc' * 1000
+    assert os.stat(destination).st_mtime_ns == 1_000_000_000
+    assert os.listdir(destination.parent) == ['a.pdf']
+
+
+def test_failed_copy_removes_temp_file_and_keeps_source(files, monkeypatch):
+    source, destination = files
+    mover = FileTransfer(move=True, fsync=False)
+    _other_device(mover, monkeypatch)
+
+    def broken_copy(source_file, target_file, pace=None):
+        target_file.write(b'urwane')
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(transfer, '_copy_data', broken_copy)
+
+    with pytest.raises(OSError):
+        mover.transfer(str(source), str(destination), os.stat(source))
+
+    assert source.exists()
+    assert os.listdir(destination.parent) == []
+
+
+def test_rename_across_mounts_falls_back_to_copy(files, monkeypatch):
+    source, destination = files
+    mover = FileTransfer(move=True, fsync=False)
+    replace = os.replace
+
+    def cross_mount_replace(src, dst):
+        if src == str(source):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        replace(src, dst)
+
+    monkeypatch.setattr(transfer.os, 'replace', cross_mount_replace)
+
+    assert mover.transfer(str(source), str(destination), os.stat(source)) != 'rename'
+    assert not source.exists()
+    assert os.listdir(destination.parent) == ['a.pdf']
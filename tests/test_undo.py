@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+from config import Config
+from file_organizer import organize_files
+from undo import UndoJournal, list_runs, run_sort_key, undo_run
+
+
+def _write_run(journal, tmp_path, name='a.pdf'):
+    source = tmp_path / name
+    source.write_text(name)
+    sequence = journal.begin("MOVE", str(source), str(tmp_path / 'out' / name), os.stat(source))
+    journal.commit(sequence)
+    journal.close()
+    return journal.run_id
+
+
+def test_journal_without_operations_leaves_no_file(isolated_config):
+    journal = UndoJournal.from_config()
+    journal.close()
+
+    assert journal.run_id is None
+    assert not os.path.exists(Config.UNDO_DIRECTORY) or not os.listdir(Config.UNDO_DIRECTORY)
+
+
+def test_run_ids_sort_newest_first(isolated_config):
+    os.makedirs(Config.UNDO_DIRECTORY)
+    for run_id in ('20260101-120000-1', '20260101-120000', '20260101-120000-10', '20260101-120000-2',
+                   '20260101-120000.000001'):
+        open(os.path.join(Config.UNDO_DIRECTORY, run_id + '.undo.jsonl'), 'w').close()
+
+    assert [run_id for run_id, _, _ in list_runs()] == [
+        '20260101-120000.000001', '20260101-120000-10', '20260101-120000-2', '20260101-120000-1', '20260101-120000']
+    assert run_sort_key('20260101-120001') > run_sort_key('20260101-120000.999999')
+
+
+def test_old_journals_are_pruned(isolated_config, monkeypatch):
+    monkeypatch.setattr(Config, 'UNDO_KEEP_RUNS', 2)
+
+    run_ids = [_write_run(UndoJournal.from_config(), isolated_config, f"{index}.pdf") for index in range(3)]
+
+    assert [run_id for run_id, _, _ in list_runs()] == run_ids[:0:-1]
+
+
+def _organize_tree(tmp_path):
+    source = tmp_path / 'in'
+    (source / 'sub').mkdir(parents=True)
+    (source / 'a.pdf').write_text('a')
+    (source / 'sub' / 'b.jpg').write_text('b')
+    destination = tmp_path / 'out'
+    assert organize_files(str(source), str(destination), recursive=True)
+    (run_id, count, status), = list_runs()
+    assert (count, status) == (2, "kompletne")
+    return source, destination, run_id
+
+
+def test_undo_restores_files(isolated_config):
+    source, destination, run_id = _organize_tree(isolated_config)
+
+    counts = undo_run(run_id)
+
+    assert (counts['moved'], counts['errors']) == (2, 0)
+    assert (source / 'a.pdf').read_text() == 'a' and (source / 'sub' / 'b.jpg').read_text() == 'b'
+    assert not (destination / 'Documents' / 'a.pdf').exists()
+    assert list_runs()[0][2] == "cofnięte"
+    assert undo_run(run_id) is None   # Drugie cofnięcie niczego nie zmienia
+
+
+def test_undo_retries_only_failed_operations(isolated_config):
+    source, destination, run_id = _organize_tree(isolated_config)
+    # Plik w miejscu folderu źródłowego - b.jpg nie może wrócić
+    shutil.rmtree(source / 'sub')
+    (source / 'sub').write_text('blokada')
+
+    counts = undo_run(run_id)
+
+    assert (counts['moved'], counts['errors']) == (1, 1)
+    assert (source / 'a.pdf').exists()
+    assert list_runs()[0][2] == "częsciowo cofnięte"
+
+    (source / 'sub').unlink()
+    counts = undo_run(run_id)
+
+    assert (counts['moved'], counts['skipped'], counts['errors']) == (1, 0, 0)
+    assert (source / 'sub' / 'b.jpg').read_text() == 'b'
+    assert list_runs()[0][2] == "cofnięte"
+
+
+def test_undo_replays_interrupted_journal(isolated_config):
+    # Proces przerwany po zapisaniu zamiarów: a.pdf przeniesiony bez potwierdzenia, b.pdf nietknięty
+    moved, untouched = isolated_config / 'a.pdf', isolated_config / 'b.pdf'
+    moved.write_text('a')
+    untouched.write_text('b')
+    target = isolated_config / 'out'
+    target.mkdir()
+    journal = UndoJournal.from_config()
+    journal.begin("MOVE", str(moved), str(target / 'a.pdf'), os.stat(moved))
+    journal.begin("MOVE", str(untouched), str(target / 'b.pdf'), os.stat(untouched))
+    os.replace(moved, target / 'a.pdf')
+    os.close(journal._fd)   # Bez close() - dziennik bez znacznika końca
+
+    (run_id, count, status), = list_runs()
+    assert (count, status) == (2, "przerwane")
+    counts = undo_run(run_id)
+
+    assert (counts['moved'], counts['skipped'], counts['errors']) == (1, 1, 0)
+    assert moved.read_text() == 'a' and untouched.read_text() == 'b'